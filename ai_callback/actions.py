@@ -1,40 +1,93 @@
 # ai_callback/actions.py
-import requests
 import re
 
+from ai_callback import conditions, weather
+from ai_callback.patterns import first_weather_location
+from ai_callback.streaming import Rewrite
+
 ###################
 # DISCLAIMER ACTIONS
 ###################
 
+FINANCIAL_DISCLAIMER = "\n\n[Disclaimer: This information is not professional financial advice. Please consult a licensed financial advisor.]"
+MEDICAL_DISCLAIMER = "\n\n[Disclaimer: This information is not professional medical advice. Please consult a certified medical professional.]"
+LEGAL_DISCLAIMER = "\n\n[Disclaimer: This information is not professional legal advice. Consult a qualified attorney for legal matters.]"
+
 def add_financial_disclaimer(response):
     """
     Append a financial disclaimer to the text.
     """
-    disclaimer_text = "\n\n[Disclaimer: This information is not professional financial advice. Please consult a licensed financial advisor.]"
-    return response + disclaimer_text
+    return response + FINANCIAL_DISCLAIMER
 
 def add_medical_disclaimer(response):
-    disclaimer_text = "\n\n[Disclaimer: This information is not professional medical advice. Please consult a certified medical professional.]"
-    return response + disclaimer_text
+    return response + MEDICAL_DISCLAIMER
 
 def add_legal_disclaimer(response):
-    disclaimer_text = "\n\n[Disclaimer: This information is not professional legal advice. Consult a qualified attorney for legal matters.]"
-    return response + disclaimer_text
+    return response + LEGAL_DISCLAIMER
+
+def _append_edit(suffix):
+    # Edit-plan form (see ai_callback.edits) of an action that appends a fixed suffix.
+    def edit(text, plan):
+        plan.append(suffix)
+    return edit
+
+# Disclaimers only add text at the end, so streamed text can be released right away.
+add_financial_disclaimer.appends = True
+add_medical_disclaimer.appends = True
+add_legal_disclaimer.appends = True
+add_financial_disclaimer.edit = _append_edit(FINANCIAL_DISCLAIMER)
+add_medical_disclaimer.edit = _append_edit(MEDICAL_DISCLAIMER)
+add_legal_disclaimer.edit = _append_edit(LEGAL_DISCLAIMER)
 
 
 ###################
 # MODERATION ACTIONS
 ###################
 
+ABUSIVE_KEYWORDS = ["idiot", "stupid", "hate you", "dumb", "kill yourself", "hell"]
+
+
+def _in_order_pattern(words):
+    # One alternation that redacts like replacing `words` one after another, so an
+    # earlier word wins where two overlap ("stupidiot" -> "stup[REDACTED]"). At the same
+    # position the alternation already prefers earlier words. A word that an earlier
+    # word can start inside of is followed by a lookahead rejecting the rest of that
+    # word, and a word containing an earlier one is never matched. Returns the pattern
+    # and the most text a match plus its lookahead looks at.
+    words = [word.lower() for word in words]
+    alternatives = []
+    reach = 0
+    for i, word in enumerate(words):
+        earlier = words[:i]
+        if any(other in word for other in earlier):
+            continue
+        rests = [other[len(word) - offset:] for other in earlier
+                 for offset in range(1, len(word)) if other.startswith(word[offset:])]
+        guard = f"(?!{'|'.join(map(re.escape, rests))})" if rests else ""
+        alternatives.append(re.escape(word) + guard)
+        reach = max(reach, len(word) + max(map(len, rests), default=0))
+    return "|".join(alternatives), reach
+
+# One case-insensitive pass over the text, matching what detect_abuse finds in the
+# lowercased text ("Stupid" is detected, so it must be redacted too). ASCII-only case
+# folding, so that every match is also a detect_abuse hit (Unicode folding would let
+# the long s in "ſtupid" match, which lower() keeps as is).
+_abusive_source, _ABUSIVE_REACH = _in_order_pattern(ABUSIVE_KEYWORDS)
+_ABUSIVE_PATTERN = re.compile(_abusive_source, re.IGNORECASE | re.ASCII)
+
 def redact_abusive_language(response):
     """
-    Replace abusive terms with [REDACTED].
+    Replace abusive terms, in any letter case, with [REDACTED].
     """
-    abusive_keywords = ["idiot", "stupid", "hate you", "dumb", "kill yourself" ,"hell"]
-    censored_response = response
-    for word in abusive_keywords:
-        censored_response = censored_response.replace(word, "[REDACTED]")
-    return censored_response
+    return _ABUSIVE_PATTERN.sub("[REDACTED]", response)
+
+def _redact_abusive_edit(text, plan):
+    for match in _ABUSIVE_PATTERN.finditer(text):
+        plan.replace(match.start(), match.end(), "[REDACTED]")
+
+redact_abusive_language.rewrite = Rewrite(_ABUSIVE_PATTERN, "[REDACTED]", _ABUSIVE_REACH,
+                                         implies=(conditions.detect_abuse,))
+redact_abusive_language.edit = _redact_abusive_edit
 
 
 ###################
@@ -45,63 +98,77 @@ def append_weather_info(response):
     """
     Detect a naive pattern "weather in X" or "climate in X", 
     call a weather API (or mock it), and append real-time info.
+    See ai_callback.weather for the caching/timeout behaviour of the API call.
     """
-    # Regex to capture location
-    pattern = r"(?:weather|climate)\s+(?:in\s+)?([A-Z][a-z]+)"
-    match = re.search(pattern, response)
-    if not match:
-        return response
+    return response + _weather_suffix(response)
 
-    location = match.group(1)
-    
-    # Replace with a real API key for actual fetch
-    OPENWEATHER_API_KEY = "<YOUR_OPENWEATHER_API_KEY>"
+def _weather_suffix(response):
+    # Same "weather/climate in X" match that detect_weather_query uses
+    location = first_weather_location(response)
+    if location is None:
+        return ""
     
-    if OPENWEATHER_API_KEY == "<YOUR_OPENWEATHER_API_KEY>":
-        # If you don't have a real key, mock the data
+    # Configure a real client with ai_callback.weather.configure(api_key=...) or the
+    # OPENWEATHER_API_KEY environment variable; otherwise mock the data.
+    client = weather.get_default_client()
+    if client is None:
         weather_data = f"25°C, Clear Skies (mock data for {location})"
     else:
-        url = (
-            f"http://api.openweathermap.org/data/2.5/weather"
-            f"?q={location}&appid={OPENWEATHER_API_KEY}&units=metric"
-        )
-        try:
-            r = requests.get(url)
-            data = r.json()
-            if data.get("cod") == 200:
-                temp = data["main"]["temp"]
-                desc = data["weather"][0]["description"]
-                weather_data = f"{temp}°C, {desc}"
-            else:
-                weather_data = f"Weather data not available for {location}"
-        except Exception as e:
-            weather_data = f"Error fetching weather: {str(e)}"
-
-    enriched_response = (
-        f"{response}\n\n---\n"
+        # Pooled, cached and bounded by connect/read timeouts
+        weather_data = client.get(location)
+
+    return (
+        f"\n\n---\n"
         f"[Real-Time Weather Info for {location}]\n"
         f"{weather_data}\n---"
     )
-    return enriched_response
+
+def _weather_edit(text, plan):
+    suffix = _weather_suffix(text)
+    if suffix:
+        plan.append(suffix)
+
+append_weather_info.appends = True
+append_weather_info.edit = _weather_edit
+# Estimated seconds for an uncached upstream lookup, for the rule scheduler.
+append_weather_info.cost = 0.2
+# Live data: its output must not be replayed from the memo cache (see ai_callback.memo).
+append_weather_info.deterministic = False
+# Enrichment only: may be skipped when a process() call is short of budget.
+append_weather_info.optional = True
 
 
 ###################
 # HANDLE INCOMPLETE RESPONSES
 ###################
 
+INCOMPLETE_NOTE = "\n\n[Note: This response seems incomplete. Please clarify or retry the request.]"
+
 def handle_incomplete_response(response):
     """
     Append a note prompting for more detail or clarity if response is incomplete.
     """
-    return response + "\n\n[Note: This response seems incomplete. Please clarify or retry the request.]"
+    return response + INCOMPLETE_NOTE
+
+handle_incomplete_response.appends = True
+handle_incomplete_response.edit = _append_edit(INCOMPLETE_NOTE)
 
 
 ###################
 # TOXIC RESPONSE
 ###################
 
+TOXIC_REPLACEMENT = "[REDACTED: Toxic content detected]"
+
 def redact_entire_text(response):
     """
     If detected as toxic, replace the entire response.
     """
-    return "[REDACTED: Toxic content detected]"
+    return TOXIC_REPLACEMENT
+
+def _redact_entire_edit(text, plan):
+    plan.replace_all(TOXIC_REPLACEMENT)
+
+# The output ignores the input, so once this fires no other rule needs to run.
+redact_entire_text.terminal = True
+redact_entire_text.edit = _redact_entire_edit
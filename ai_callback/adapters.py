@@ -0,0 +1,271 @@
+# ai_callback/adapters.py
+"""
+Streaming adapters that stop LLM generation as soon as a terminal rule fires.
+
+usage_openai.py and usage_hf.py wait for the whole completion before running the
+callback. If the first sentence is already toxic, the rest is generated, paid for and
+then thrown away by redact_entire_text. These adapters stream the generation, check the
+text received so far every `check_chars` characters and at each sentence end, and stop
+generating as soon as a terminal rule (see ai_callback.rules) fires on it:
+
+    result = stream_openai(callback, client, model="gpt-4o-mini", max_tokens=400,
+                           messages=[{"role": "user", "content": prompt}])
+    result.output        # what callback.process returns, or the terminal rule's output
+    result.aborted       # True if generation was cut short
+    result.tokens_saved  # max_tokens minus the tokens actually generated
+
+    result = stream_hf(callback, generator, prompt, max_new_tokens=200)
+
+If no terminal rule fires, the output is callback.process on the full completion. If
+one fires, the output is that rule's output for the text so far. A terminal action
+ignores its input, so this is what the full completion would have given too, as long
+as the condition would still hold on the longer text.
+
+A check only evaluates the terminal rules' conditions, plus the rewrite actions (see
+ai_callback.streaming) whose output a later terminal condition reads; it runs no other
+action, so side effects such as append_weather_info's lookup never happen on a prefix.
+Terminal conditions therefore see the generated text without the annotations that
+appends actions would add. A terminal rule that reads the output of any other action
+cannot be checked on a prefix, and neither can the terminal rules after it; they are
+only applied by the final callback.process. Each check re-evaluates the conditions on
+the whole prefix, so a model-backed terminal condition such as detect_toxicity costs
+one model call per check. Raise check_chars to check less often.
+"""
+import threading
+
+from ai_callback.context import AnalysisContext
+from ai_callback.rules import _overlap
+
+# Checking after these characters catches a bad sentence as soon as it is complete.
+_SENTENCE_END = (".", "!", "?", "\n")
+
+
+class StreamResult:
+    """
+    Outcome of a guarded generation.
+
+    Attributes:
+        output (str): The processed text.
+        aborted (bool): Whether generation was stopped by a terminal rule.
+        rule (str or None): Name of the terminal rule that fired.
+        tokens_generated (int): Tokens received before generation stopped.
+        tokens_saved (int or None): Tokens not generated (max tokens minus generated)
+                                    when aborted and the limit is known; 0 otherwise.
+    """
+
+    def __init__(self, output, aborted, rule, tokens_generated, tokens_saved):
+        self.output = output
+        self.aborted = aborted
+        self.rule = rule
+        self.tokens_generated = tokens_generated
+        self.tokens_saved = tokens_saved
+
+    def __repr__(self):
+        return (f"StreamResult(aborted={self.aborted}, rule={self.rule!r}, "
+                f"tokens_generated={self.tokens_generated}, tokens_saved={self.tokens_saved})")
+
+
+class EarlyStop:
+    """
+    Framework-agnostic core of the adapters: feed it deltas, stop when feed() says so.
+
+    Args:
+        callback (AICallback): The configured callback.
+        check_chars (int): Check for a terminal rule after this many new characters
+                           (and at every sentence end).
+
+    Example usage:
+        guard = EarlyStop(callback)
+        for delta in deltas:
+            if guard.feed(delta):
+                cancel_generation()
+                break
+        result = guard.result(max_tokens=400)
+    """
+
+    def __init__(self, callback, check_chars=80):
+        self.callback = callback
+        self.check_chars = check_chars
+        self.rules = _checked_rules(callback._scheduled_rules())
+        self.parts = []
+        self.tokens = 0
+        self._length = 0
+        self._checked = 0
+        self.rule = None
+        self._output = None
+
+    def feed(self, delta, tokens=1):
+        """
+        Add generated text; return True if a terminal rule fired and generation should stop.
+
+        Args:
+            delta (str): The newly generated text.
+            tokens (int): Tokens it represents.
+        """
+        self.parts.append(delta)
+        self.tokens += tokens
+        self._length += len(delta)
+        if not self.rules or self.rule is not None:
+            return self.rule is not None
+        if self._length - self._checked >= self.check_chars or delta.rstrip(" ").endswith(_SENTENCE_END):
+            self._checked = self._length
+            return self._check("".join(self.parts))
+        return False
+
+    def _check(self, response):
+        # The checked rules, in scheduled order, as AICallback._process runs them, except
+        # that a rewrite is applied through its pattern rather than by calling the action.
+        context = AnalysisContext(response)
+        for rule in self.rules:
+            if rule.terminal:
+                if rule.condition(context if rule.contextual else response):
+                    self.rule = rule.name
+                    self._output = rule.action(response)
+                    return True
+                continue
+            # A Rule.rewrite changes nothing when its condition is False, so the
+            # condition need not be evaluated.
+            if rule.rewrite is None and not rule.condition(context if rule.contextual else response):
+                continue
+            rewrite = rule.action.rewrite
+            response = rewrite.pattern.sub(rewrite.replacement, response)
+            if response != context.text:
+                context = AnalysisContext(response)
+        return False
+
+    def result(self, max_tokens=None):
+        """
+        Return the StreamResult; runs the callback on the full text if no terminal rule fired.
+
+        Args:
+            max_tokens (int, optional): The generation's token limit, for tokens_saved.
+        """
+        if self.rule is not None:
+            saved = None if max_tokens is None else max(0, max_tokens - self.tokens)
+            return StreamResult(self._output, True, self.rule, self.tokens, saved)
+        return StreamResult(self.callback.process("".join(self.parts)), False, None, self.tokens, 0)
+
+
+def _checked_rules(order):
+    # The rules a check runs, in scheduled order: the terminal rules that can be decided
+    # on a prefix, and the rewrites whose output one of them reads.
+    checked = []
+    unknown = frozenset()  # parts of the text written by actions a check does not run
+    for rule in order:
+        if rule.terminal:
+            if _overlap(rule.reads, unknown):
+                # Its condition depends on an action that is not run; a later terminal
+                # rule must not decide before it.
+                break
+            checked.append(rule)
+        elif getattr(rule.action, "appends", False):
+            # Annotations after the generated text; left to the final process().
+            continue
+        elif getattr(rule.action, "rewrite", None) is not None and not _overlap(rule.reads, unknown):
+            checked.append(rule)
+        else:
+            unknown |= rule.writes
+    # Keep only the rewrites some later checked rule reads the output of.
+    needed, reads = [], frozenset()
+    for rule in reversed(checked):
+        if rule.terminal or _overlap(rule.writes, reads):
+            needed.append(rule)
+            reads |= rule.reads
+    return needed[::-1]
+
+
+def stream_openai(callback, client, check_chars=80, **create_kwargs):
+    """
+    Stream a chat completion from an OpenAI client, stopping early on a terminal rule.
+
+    Closing the stream closes the HTTP response, so the server stops generating (and
+    billing) at that point. Each streamed delta is counted as one token.
+
+    Args:
+        callback (AICallback): The configured callback.
+        client (openai.OpenAI): The client (any base_url, e.g. a local server).
+        check_chars (int): See EarlyStop.
+        **create_kwargs: Passed to client.chat.completions.create (model, messages,
+                         max_tokens, ...); stream=True is added.
+
+    Returns:
+        StreamResult: The processed output and what was saved.
+
+    Example usage:
+        result = stream_openai(callback, openai.OpenAI(), model="gpt-4o-mini",
+                               messages=[{"role": "user", "content": prompt}], max_tokens=400)
+        print(result.output)
+    """
+    guard = EarlyStop(callback, check_chars)
+    stream = client.chat.completions.create(stream=True, **create_kwargs)
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta and guard.feed(delta):
+                break
+    finally:
+        stream.close()
+    max_tokens = create_kwargs.get("max_tokens", create_kwargs.get("max_completion_tokens"))
+    return guard.result(max_tokens)
+
+
+def stream_hf(callback, generator, prompt, check_chars=80, **generate_kwargs):
+    """
+    Run a Hugging Face text-generation pipeline, stopping early on a terminal rule.
+
+    Generation runs in a background thread with a TextIteratorStreamer. A stopping
+    criterion ends it at the next token once a terminal rule has fired.
+
+    Args:
+        callback (AICallback): The configured callback.
+        generator (transformers.Pipeline): A "text-generation" pipeline.
+        prompt (str): The prompt; only the generated continuation is processed.
+        check_chars (int): See EarlyStop.
+        **generate_kwargs: Passed to the pipeline call (max_new_tokens, do_sample, ...).
+
+    Returns:
+        StreamResult: The processed output and what was saved.
+
+    Example usage:
+        generator = pipeline("text-generation", model="gpt2")
+        result = stream_hf(callback, generator, prompt, max_new_tokens=200)
+    """
+    from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+    stop = threading.Event()
+    steps = [0]
+
+    class _Stop(StoppingCriteria):
+        # Called once per generated token; also counts the tokens.
+        def __call__(self, input_ids, scores, **kwargs):
+            steps[0] += 1
+            return stop.is_set()
+
+    streamer = TextIteratorStreamer(generator.tokenizer, skip_prompt=True, skip_special_tokens=True)
+    failure = []
+
+    def generate():
+        try:
+            generator(prompt, streamer=streamer, stopping_criteria=StoppingCriteriaList([_Stop()]),
+                      **generate_kwargs)
+        except BaseException as e:
+            failure.append(e)
+            streamer.end()
+
+    guard = EarlyStop(callback, check_chars)
+    thread = threading.Thread(target=generate, name="stream_hf", daemon=True)
+    thread.start()
+    for text in streamer:
+        if guard.feed(text, tokens=0):
+            stop.set()
+            break
+    thread.join()
+    if failure:
+        raise failure[0]
+    guard.tokens = steps[0]
+    max_tokens = generate_kwargs.get("max_new_tokens")
+    if max_tokens is None:
+        max_tokens = getattr(generator.model.generation_config, "max_new_tokens", None)
+    return guard.result(max_tokens)
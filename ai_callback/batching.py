@@ -0,0 +1,169 @@
+# ai_callback/batching.py
+"""
+Dynamic micro-batching: coalesce items submitted concurrently into batched calls.
+
+Model-backed rules are much cheaper per item when run on a batch, but a server sees
+requests one at a time from many threads. MicroBatcher queues submitted items, and a
+single worker thread hands them to a batch function. A batch is sent as soon as it
+has `max_batch` items, or `max_wait_ms` after its first item arrived, whichever comes
+first. Under light load a request waits at most max_wait_ms. Under heavy load batches
+fill up and the wait disappears.
+
+The queue is bounded. When `max_queue` items are already waiting, submit() raises
+Overloaded at once instead of letting latency grow without limit. The caller can then
+shed load or retry later.
+
+Example usage:
+    batcher = MicroBatcher(callback.process_batch, max_batch=32, max_wait_ms=5)
+    output = batcher.submit(response).result()
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class Overloaded(RuntimeError):
+    """Raised when a request is rejected because the queue is full."""
+
+
+class MicroBatcher:
+    """
+    Runs `batch_fn` on batches of concurrently submitted items, in a worker thread.
+
+    Args:
+        batch_fn (callable): Takes a list of items and returns a list with one result
+                             per item, in the same order (e.g. AICallback.process_batch).
+        max_batch (int): Largest batch passed to batch_fn.
+        max_wait_ms (float): Longest time the first item of a batch waits for others.
+        max_queue (int): Items allowed to wait before submit() raises Overloaded.
+
+    Raises:
+        ValueError: If max_batch or max_queue is below 1, or max_wait_ms is negative.
+
+    Example usage:
+        with MicroBatcher(callback.process_batch, max_batch=16, max_wait_ms=2) as batcher:
+            futures = [batcher.submit(r) for r in responses]
+            outputs = [f.result() for f in futures]
+    """
+
+    def __init__(self, batch_fn, max_batch=32, max_wait_ms=5.0, max_queue=1024):
+        if max_batch < 1 or max_queue < 1:
+            raise ValueError("max_batch and max_queue must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative")
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue(max_queue)
+        self._closed = False
+        # Makes the closed check and the enqueue in submit() atomic with close(), so
+        # nothing is queued behind the worker's stop sentinel.
+        self._lock = threading.Lock()
+        # Plain increments without a lock, as in ai_callback.metrics.
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self._worker = threading.Thread(target=self._run, name="MicroBatcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        """
+        Queue `item` for the next batch.
+
+        Returns:
+            concurrent.futures.Future: Resolves to batch_fn's result for the item, or to
+                                       the exception batch_fn raised for its batch.
+
+        Raises:
+            Overloaded: If the queue is full.
+            RuntimeError: If the batcher has been closed.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            try:
+                self._queue.put_nowait((item, future))
+            except queue.Full:
+                self.rejected += 1
+                raise Overloaded(f"queue full ({self._queue.maxsize} waiting)") from None
+        return future
+
+    def __call__(self, item):
+        """Submit `item` and wait for its result."""
+        return self.submit(item).result()
+
+    def _run(self):
+        get = self._queue.get
+        while True:
+            first = get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    entry = get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+            self._dispatch(batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch):
+        # Drop the items whose callers cancelled while they were queued.
+        batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        items = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+        self.batches += 1
+        self.items += len(items)
+        try:
+            results = list(self.batch_fn(items))
+            if len(results) != len(items):
+                raise ValueError(f"batch_fn returned {len(results)} results for {len(items)} items")
+        except BaseException as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def stats(self):
+        """
+        Returns:
+            dict: batches, items, mean_batch (items per batch), rejected, and queued
+                  (items waiting right now).
+        """
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": self.items / self.batches if self.batches else 0.0,
+            "rejected": self.rejected,
+            "queued": self._queue.qsize(),
+        }
+
+    def close(self):
+        """Process everything already queued, then stop the worker thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        # Every item accepted by submit() is already queued ahead of the sentinel, which
+        # may have to wait for room in a full queue.
+        self._queue.put(None)
+        self._worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
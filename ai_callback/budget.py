@@ -0,0 +1,177 @@
+# ai_callback/budget.py
+"""
+Per-request latency budgets: required rules always run, optional rules only if they fit.
+
+    callback.add_rule(detect_pii, redact_pii)                            # required
+    callback.add_rule(detect_weather_query, append_weather_info)         # optional (declared)
+    callback.add_rule(detect_citation_needed, add_citation_note, optional=True)
+
+    report = callback.process(response, budget=0.050, report=True)
+    report.output   # the processed text
+    report.skipped  # [{"rule": "detect_weather_query", "reason": "budget", "remaining": 0.012}]
+
+A rule is optional if add_rule(optional=True) says so, or if its action or condition has
+`optional = True` (append_weather_info and detect_citation_needed do). Everything else is
+required. Required rules always run in full, even past the deadline, so a budget never
+weakens PII or toxicity handling.
+
+Rules run in the usual scheduled order. Before an optional rule, the time left is
+compared with its estimated cost (Rule.cost, see ai_callback.rules):
+- "budget": the estimate does not fit in what is left, so the rule is skipped.
+- "cut_off": the rule started but did not finish before the deadline. Its result is
+  discarded and the response goes on without it.
+To cut a rule off without waiting for it, optional rules run in a small shared thread
+pool while the caller waits at most the remaining time. A rule that is cut off may still
+be running in the background, so optional actions must have no side effects beyond their
+return value.
+
+Elapsed time comes from `clock` (time.monotonic by default). Pass your own clock to
+check the skipping deterministically: both skipping and cut-off are decided only by its
+readings, so with a clock that advances only when the test says so, the report does not
+depend on how fast the machine is.
+"""
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from ai_callback.context import AnalysisContext
+
+# Threads for optional rules; a rule that is cut off keeps its thread until it returns.
+OPTIONAL_WORKERS = 4
+# Real seconds between reads of a clock other than time.monotonic while an optional
+# rule runs.
+POLL_INTERVAL = 0.001
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(OPTIONAL_WORKERS, thread_name_prefix="ai_callback-optional")
+    return _executor
+
+
+def _after_fork_in_child():
+    # The parent's pool threads do not exist in the child.
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class RunReport:
+    """
+    Result of AICallback.process(..., report=True).
+
+    Attributes:
+        output (str): The processed text.
+        skipped (list[dict]): One {"rule", "reason", "remaining"} entry per optional rule
+                              that did not contribute, in scheduled order; reason is
+                              "budget" or "cut_off", remaining the seconds left when it
+                              was considered.
+        elapsed (float): Seconds spent, by the clock used.
+        budget (float or None): The budget the call was given.
+    """
+
+    def __init__(self, output, skipped, elapsed, budget):
+        self.output = output
+        self.skipped = skipped
+        self.elapsed = elapsed
+        self.budget = budget
+
+    @property
+    def over_budget(self):
+        """True if the required rules alone took longer than the budget."""
+        return self.budget is not None and self.elapsed > self.budget
+
+    def __repr__(self):
+        names = [entry["rule"] for entry in self.skipped]
+        return f"RunReport(elapsed={self.elapsed:.4f}, budget={self.budget}, skipped={names})"
+
+
+def _evaluate(rule, context, response):
+    if rule.condition(context if rule.contextual else response):
+        return True, rule.action(response)
+    return False, response
+
+
+def _wait(future, deadline, clock):
+    # Whether `future` finished by `deadline` as read from `clock`. Only the clock
+    # decides: with time.monotonic the caller blocks for the time left, while any other
+    # clock is polled, so a test clock that does not advance waits for the rule.
+    while True:
+        remaining = deadline - clock()
+        if remaining < 0:
+            return False
+        step = remaining if clock is time.monotonic else min(remaining, POLL_INTERVAL) or POLL_INTERVAL
+        try:
+            future.result(timeout=step)
+        except FutureTimeout:
+            continue
+        except BaseException:
+            pass  # re-raised by the caller's future.result()
+        return clock() <= deadline
+
+
+def process_with_budget(callback, response, budget, clock=time.monotonic):
+    """
+    Run `response` through the callback's rules within `budget` seconds.
+
+    Used by AICallback.process when given a budget; see the module docstring.
+
+    Args:
+        callback (AICallback): The configured callback.
+        response (str): The LLM-generated text to inspect and optionally modify.
+        budget (float): Seconds available, from now.
+        clock (callable): Returns the current time in seconds.
+
+    Returns:
+        RunReport: The output and the optional rules that were skipped.
+
+    Raises:
+        ValueError: If budget is negative.
+    """
+    if budget < 0:
+        raise ValueError("budget must not be negative")
+    start = clock()
+    deadline = start + budget
+    metrics = callback.metrics
+    skipped = []
+    context = AnalysisContext(response)
+    for rule in callback._scheduled_rules():
+        if rule.optional:
+            remaining = deadline - clock()
+            if remaining < rule.cost:
+                skipped.append({"rule": rule.name, "reason": "budget", "remaining": max(0.0, remaining)})
+                continue
+            call = contextvars.copy_context().run
+            future = _get_executor().submit(call, _evaluate, rule, context, response)
+            if not _wait(future, deadline, clock):
+                future.cancel()
+                skipped.append({"rule": rule.name, "reason": "cut_off", "remaining": remaining})
+                continue
+            fired, output = future.result()
+        else:
+            fired, output = _evaluate(rule, context, response)
+        if metrics is not None:
+            # Counted directly: budgeted calls are not part of the derived counts
+            # (see Metrics.fold), and the latency histograms are left to process().
+            rule.stats.evaluations += 1
+            if fired:
+                rule.stats.fired(len(output) - len(response))
+        if fired:
+            response = output
+            if rule.terminal:
+                break
+            if response is not context.text:
+                context = AnalysisContext(response)
+    return RunReport(response, skipped, clock() - start, budget)
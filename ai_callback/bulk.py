@@ -0,0 +1,252 @@
+# ai_callback/bulk.py
+"""
+Bulk post-processing of JSONL files, for re-running a rule set over logged completions.
+
+    python -m ai_callback.bulk --ruleset rules.bin --input logs.jsonl --output out.jsonl \\
+        --field completion --workers 16
+
+Every input line is a JSON object. Its `--field` (default "response") is run through
+the rules, and the object is written back with the result in `--output-field` (default
+"output"). Output lines are in input order.
+
+The input is read in chunks of --chunk-size lines. Each chunk is parsed, processed with
+process_batch and serialized inside a CallbackPool worker. At most two chunks per
+worker are in flight, so memory stays bounded whatever the file size.
+
+After each chunk is written, the input and output byte offsets are saved to a checkpoint
+file (default: the output path plus ".ckpt"). After a crash, rerun the same command with
+--resume. The output is truncated back to the last checkpoint and reading continues from
+the matching input offset, so no record is lost or written twice. The checkpoint is
+removed when the run completes.
+
+With --hits-only the text is not rewritten. Each output line is {"record": n, "hits": [...]},
+listing the rules whose condition holds on the original text. n counts the records from
+0, skipping blank lines. Every condition is evaluated, even after a terminal rule.
+
+Progress (records and records/sec) is printed to stderr every --progress seconds.
+"""
+import argparse
+import collections
+import contextlib
+import json
+import os
+import sys
+import time
+
+from ai_callback.context import AnalysisContext
+from ai_callback.parallel import CallbackPool
+
+###################
+# WORKER SIDE
+###################
+
+def rule_hits(callback, responses, batch_size=32):
+    """
+    Return, for each response, the names of the rules whose condition holds on it.
+
+    Actions are not run, so every condition sees the original text.
+
+    Args:
+        callback (AICallback): The configured callback.
+        responses (list[str]): The texts to inspect.
+        batch_size (int): Maximum batch size passed to batched conditions.
+
+    Returns:
+        list[list[str]]: Rule names per response, in registration order.
+    """
+    contexts = None
+    hits = [[] for _ in responses]
+    for rule in callback.rules:
+        batch_fn = getattr(rule.condition, "batch", None)
+        if batch_fn is not None:
+            flags = batch_fn(responses, batch_size)
+        elif rule.contextual:
+            if contexts is None:
+                contexts = [AnalysisContext(text) for text in responses]
+            flags = [rule.condition(context) for context in contexts]
+        else:
+            flags = [rule.condition(text) for text in responses]
+        for names, flag in zip(hits, flags):
+            if flag:
+                names.append(rule.name)
+    return hits
+
+
+def _run_chunk(callback, task):
+    # Parse, process and serialize one chunk; returns the output bytes.
+    first, lines, options = task
+    records, texts = [], []
+    for n, line in enumerate(lines, first):
+        try:
+            record = json.loads(line)
+            text = record[options["field"]]
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"record {n}: expected a JSON object with a {options['field']!r} string ({e})") from None
+        if not isinstance(text, str):
+            raise ValueError(f"record {n}: {options['field']!r} is not a string")
+        records.append(record)
+        texts.append(text)
+    out = []
+    if options["hits_only"]:
+        for n, names in enumerate(rule_hits(callback, texts, options["batch_size"]), first):
+            out.append(json.dumps({"record": n, "hits": names}, ensure_ascii=False))
+    else:
+        for record, output in zip(records, callback.process_batch(texts, options["batch_size"])):
+            record[options["output_field"]] = output
+            out.append(json.dumps(record, ensure_ascii=False))
+    out.append("")
+    return "\n".join(out).encode("utf-8")
+
+
+###################
+# DRIVER
+###################
+
+def _chunks(f, offset, first, size):
+    # Yield (number of the first record, lines, input offset after the chunk).
+    lines = []
+    for line in f:
+        offset += len(line)
+        if line.strip():
+            lines.append(line)
+        if len(lines) == size:
+            yield first, lines, offset
+            first += len(lines)
+            lines = []
+    if lines:
+        yield first, lines, offset
+
+
+def _save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def run(callback, input_path, output_path, field="response", output_field="output", hits_only=False,
+        workers=None, chunk_size=1000, batch_size=32, checkpoint=None, resume=False, progress=5.0,
+        log=sys.stderr):
+    """
+    Process a JSONL file into another, in input order; see the module docstring.
+
+    Args:
+        callback (AICallback): The configured callback.
+        input_path (str): JSONL input.
+        output_path (str): JSONL output; replaced unless resuming.
+        field (str): Input key holding the text.
+        output_field (str): Output key for the processed text.
+        hits_only (bool): Write rule hits instead of processed text.
+        workers (int, optional): Worker processes; 1 runs in this process. Defaults to
+                                 os.cpu_count().
+        chunk_size (int): Lines per chunk (the unit of work and of checkpointing).
+        batch_size (int): Maximum batch size passed to batched conditions.
+        checkpoint (str, optional): Checkpoint path. Defaults to output_path + ".ckpt".
+        resume (bool): Continue from the checkpoint if there is one.
+        progress (float): Seconds between progress lines on `log`; 0 disables them.
+        log (file): Where progress goes.
+
+    Returns:
+        int: Records processed in this run.
+
+    Raises:
+        ValueError: If chunk_size is below 1, or a record is not a JSON object with a
+                    string in `field`.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    checkpoint = checkpoint or output_path + ".ckpt"
+    state = {"input_offset": 0, "output_offset": 0, "records": 0}
+    if resume and os.path.exists(checkpoint):
+        with open(checkpoint, encoding="utf-8") as f:
+            state = json.load(f)
+    options = {"field": field, "output_field": output_field, "hits_only": hits_only, "batch_size": batch_size}
+    workers = workers or os.cpu_count() or 1
+    pool = CallbackPool(callback, workers=workers) if workers > 1 else None
+
+    start = last_report = time.monotonic()
+    done = 0
+    inflight = collections.deque()
+    try:
+        with open(input_path, "rb") as src, open(output_path, "r+b" if state["output_offset"] else "wb") as dst:
+            src.seek(state["input_offset"])
+            # Drop anything written after the last checkpoint.
+            dst.truncate(state["output_offset"])
+            dst.seek(state["output_offset"])
+
+            def drain():
+                nonlocal done, last_report
+                result, count, input_offset = inflight.popleft()
+                dst.write(result.get() if pool is not None else result)
+                dst.flush()
+                os.fsync(dst.fileno())
+                done += count
+                state["input_offset"] = input_offset
+                state["output_offset"] = dst.tell()
+                state["records"] += count
+                _save_checkpoint(checkpoint, state)
+                now = time.monotonic()
+                if progress and now - last_report >= progress:
+                    last_report = now
+                    log.write(f"{state['records']} records, {done / (now - start):.0f} records/s\n")
+                    log.flush()
+
+            for first, lines, input_offset in _chunks(src, state["input_offset"], state["records"], chunk_size):
+                task = (first, lines, options)
+                if pool is not None:
+                    inflight.append((pool.apply_async(_run_chunk, task), len(lines), input_offset))
+                    if len(inflight) >= 2 * workers:
+                        drain()
+                else:
+                    inflight.append((_run_chunk(callback, task), len(lines), input_offset))
+                    drain()
+            while inflight:
+                drain()
+    except BaseException:
+        if pool is not None:
+            pool.terminate()
+        raise
+    if pool is not None:
+        pool.close()
+    # An input without records never writes a checkpoint.
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(checkpoint)
+    elapsed = time.monotonic() - start
+    if progress:
+        log.write(f"done: {done} records in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.0f} records/s)\n")
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a rule set over a JSONL file.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--ruleset", help="artifact written by CompiledRuleSet.save")
+    source.add_argument("--spec", help="JSON rule-set spec, compiled at startup")
+    parser.add_argument("--input", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--field", default="response", help="input key holding the text")
+    parser.add_argument("--output-field", default="output")
+    parser.add_argument("--hits-only", action="store_true", help="write rule hits, not processed text")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--checkpoint", help="default: OUTPUT.ckpt")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint")
+    parser.add_argument("--progress", type=float, default=5.0, help="seconds between progress lines")
+    args = parser.parse_args(argv)
+
+    from ai_callback.ruleset import compile_ruleset, load_ruleset
+    if args.ruleset:
+        ruleset = load_ruleset(args.ruleset)
+    else:
+        with open(args.spec, encoding="utf-8") as f:
+            ruleset = compile_ruleset(json.load(f))
+    run(ruleset.callback(), args.input, args.output, args.field, args.output_field, args.hits_only,
+        args.workers, args.chunk_size, args.batch_size, args.checkpoint, args.resume, args.progress)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
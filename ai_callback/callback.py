@@ -1,4 +1,19 @@
 # ai_callback/callback.py
+import asyncio
+import contextvars
+import inspect
+import time
+
+from ai_callback.budget import RunReport, process_with_budget
+from ai_callback.context import AnalysisContext
+from ai_callback.edits import EditPlan
+from ai_callback.large import DEFAULT_WINDOW, process_large
+from ai_callback.memo import Memo
+from ai_callback.metrics import Metrics
+from ai_callback.rules import Rule, schedule
+from ai_callback.streaming import StreamProcessor
+from ai_callback.time_tracking import current_timer
+
 
 class AICallback:
     """
@@ -12,33 +27,430 @@ class AICallback:
         print(modified_response)  # Output: This is an issue message.
     """
 
-    def __init__(self):
-        # Each element in `rules` is a tuple: (condition_fn, action_fn).
+    def __init__(self, metrics=False, memo=None):
+        """
+        Args:
+            metrics (bool or Metrics): Record per-rule latency, hit and size metrics,
+                                       readable via `self.metrics.snapshot()` and
+                                       `self.metrics.prometheus()`; pass a Metrics
+                                       instance to tune sampling (see ai_callback.metrics).
+                                       When False, `self.metrics` is None and no
+                                       instrumentation runs.
+            memo (bool or Memo, optional): Cache outputs and expensive condition results
+                                           by response content (see ai_callback.memo).
+                                           A Memo instance may be shared between callbacks.
+        """
+        # Each element in `rules` is a Rule, which unpacks as (condition_fn, action_fn).
         self.rules = []
+        # Execution order computed from the rules' metadata; rebuilt after add_rule.
+        self._order = None
+        # Identity of the current rule set in memo keys; replaced on every add_rule.
+        self._ruleset_token = object()
+        self.memo = Memo() if memo is True else memo or None
+        if metrics is True:
+            metrics = Metrics()
+        self.metrics = metrics or None
+        if self.metrics is not None:
+            self.metrics.bind(self)
 
-    def add_rule(self, condition_fn: callable, action_fn: callable) -> None:
+    def add_rule(self, condition_fn: callable, action_fn: callable, *, name=None, cost=None,
+                 terminal=None, reads=None, writes=None, optional=None) -> None:
         """
         Register a new condition–action rule.
+
+        The keyword arguments let the scheduler run rules out of registration order when
+        that cannot change the result (see ai_callback.rules). Each defaults to the
+        matching attribute of the condition/action, e.g. `detect_toxicity.cost` or
+        `redact_entire_text.terminal`; undeclared rules keep their registration order.
         
         Args:
             condition_fn (callable): A function that takes a single string (the LLM response)
                                      and returns True/False indicating whether the action should fire.
+                                     Conditions marked `takes_context = True` get the response's
+                                     shared AnalysisContext instead (see ai_callback.context).
             action_fn (callable): A function that takes a string (the LLM response) and 
                                   returns a (possibly modified) string.
+            name (str, optional): Name used in reports and metrics. Defaults to the condition's name.
+            cost (float, optional): Estimated seconds for the condition plus the action.
+            terminal (bool, optional): The action's output ignores its input; stop after it fires.
+            reads (iterable[str], optional): Parts of the text the condition reads, e.g. {"body"}.
+            writes (iterable[str], optional): Parts of the text the action writes, e.g. {"suffix"}.
+            optional (bool, optional): The rule may be skipped when a process() call runs
+                                       short of its budget (see ai_callback.budget).
         """
-        self.rules.append((condition_fn, action_fn))
+        rule = Rule(condition_fn, action_fn, name=name, cost=cost,
+                    terminal=terminal, reads=reads, writes=writes, optional=optional)
+        if self.memo is not None:
+            self.memo.wrap(rule)
+        self.rules.append(rule)
+        self._ruleset_token = object()
+        if self.metrics is not None and self._order is not None:
+            self.metrics.fold(self._order)
+        self._order = None
 
-    def process(self, response: str) -> str:
+    def _scheduled_rules(self):
+        order = self._order
+        if order is None:
+            order = self._order = schedule(self.rules)
+        return order
+
+    def process(self, response: str, budget=None, *, clock=None, report=False):
         """
         Run the response through each condition–action pair in sequence.
+
+        Rules run in the scheduler's order, which gives the same result as registration
+        order, and processing stops as soon as a terminal action fires. While a request
+        timer is active (see ai_callback.time_tracking), each evaluated rule is recorded
+        as a span.
+
+        With a budget, optional rules are skipped or cut off once they no longer fit in
+        the time left, while required rules always run (see ai_callback.budget). Budgeted
+        calls bypass the memo's output cache, since their output depends on timing.
         
         Args:
             response (str): The LLM-generated text to inspect and optionally modify.
+            budget (float, optional): Seconds this call may take.
+            clock (callable, optional): Time source for the budget, in seconds.
+                                        Defaults to time.monotonic.
+            report (bool): Return a RunReport (output plus skipped rules) instead of the text.
         
+        Returns:
+            str: The final modified (or unmodified) LLM response, or a RunReport if
+                 `report` is set.
+        """
+        if budget is not None or report:
+            clock = clock or time.monotonic
+            if budget is not None:
+                result = process_with_budget(self, response, budget, clock)
+            else:
+                start = clock()
+                output = self.process(response)
+                result = RunReport(output, [], clock() - start, None)
+            return result if report else result.output
+        if self.memo is not None:
+            return self.memo.process(self, response)
+        return self._process(response)
+
+    def _process(self, response):
+        timer = current_timer()
+        if timer is not None:
+            return self._process_traced(response, timer)
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.calls = calls = metrics.calls + 1
+            if calls % metrics.sample_every:
+                return self._process_counted(response)
+            return self._process_timed(response)
+        context = AnalysisContext(response)
+        for rule in self._scheduled_rules():
+            if rule.condition(context if rule.contextual else response):
+                response = rule.action(response)
+                if rule.terminal:
+                    break
+                if response is not context.text:
+                    context = AnalysisContext(response)
+        return response
+
+    # The instrumented variants of process() are kept apart from the plain loop so
+    # that with metrics off and no request timer nothing extra runs, and an untimed
+    # metrics call only pays for the rules that fire. Every variant hands conditions
+    # marked `takes_context` one AnalysisContext per version of the text.
+
+    def _process_traced(self, response, timer):
+        # Records a span per evaluated rule in the request's timer (and metrics, if on).
+        clock = timer.clock
+        metrics = self.metrics
+        context = AnalysisContext(response)
+        for rule in self._scheduled_rules():
+            t0 = clock()
+            fired = bool(rule.condition(context if rule.contextual else response))
+            t1 = clock()
+            if fired:
+                before = len(response)
+                response = rule.action(response)
+                t2 = clock()
+                timer.add(rule.name, t0, t2, kind="rule", fired=True)
+                if metrics is not None:
+                    rule.stats.record(t1 - t0, t2 - t1, len(response) - before)
+                if rule.terminal:
+                    break
+                if response is not context.text:
+                    context = AnalysisContext(response)
+            else:
+                timer.add(rule.name, t0, t1, kind="rule", fired=False)
+                if metrics is not None:
+                    rule.stats.record(t1 - t0)
+        return response
+
+    def _process_counted(self, response):
+        context = AnalysisContext(response)
+        for rule in self._scheduled_rules():
+            if rule.condition(context if rule.contextual else response):
+                stats = rule.stats
+                delta = -len(response)
+                response = rule.action(response)
+                delta += len(response)
+                stats.hits += 1
+                if delta > 0:
+                    stats.chars_added += delta
+                elif delta:
+                    stats.chars_removed -= delta
+                if rule.terminal:
+                    stats.stops += 1
+                    break
+                if response is not context.text:
+                    context = AnalysisContext(response)
+        return response
+
+    def _process_timed(self, response):
+        clock = time.perf_counter_ns
+        context = AnalysisContext(response)
+        for rule in self._scheduled_rules():
+            stats = rule.stats
+            t0 = clock()
+            fired = rule.condition(context if rule.contextual else response)
+            t1 = clock()
+            stats.condition.observe(t1 - t0)
+            if fired:
+                before = len(response)
+                response = rule.action(response)
+                stats.action.observe(clock() - t1)
+                stats.fired(len(response) - before)
+                if rule.terminal:
+                    stats.stops += 1
+                    break
+                if response is not context.text:
+                    context = AnalysisContext(response)
+        return response
+
+    def plan(self, response: str) -> EditPlan:
+        """
+        Collect the edits the rules would make to the response, without building any
+        intermediate strings; call `.apply()` on the result for the final text.
+
+        Unlike process(), where each condition sees the output of the rules before it,
+        every condition here sees the original response, and every action that has an
+        `edit(text, plan)` attribute (see ai_callback.edits) records its replacements and
+        appends against it. The edits are merged and applied in one pass. An action
+        without `edit` acts as a barrier: the edits so far are applied, the action runs
+        on the result, and later rules continue from its output. Processing stops once
+        a terminal action fires, as in process().
+
+        The result therefore equals process() only when no condition's answer depends on
+        edits recorded by the rules before it. A redaction that removes or creates a
+        match for a later condition, or an appended text a later condition matches,
+        makes the two differ. For example, redacting "hell" in "the weather in Hellsinki"
+        stops detect_weather_query from firing in process() but not here.
+
+        Args:
+            response (str): The LLM-generated text to inspect.
+
+        Returns:
+            EditPlan: The pending edits; `plan.apply()` returns the modified response.
+
+        Example usage:
+            edits = callback.plan("You are an idiot.")
+            edits.replacements  # [(11, 16, "[REDACTED]")]
+            edits.apply()       # "You are an [REDACTED]."
+        """
+        plan = EditPlan(response)
+        context = AnalysisContext(response)
+        for rule in self._scheduled_rules():
+            if not rule.condition(context if rule.contextual else plan.text):
+                continue
+            edit = getattr(rule.action, "edit", None)
+            if edit is not None:
+                edit(plan.text, plan)
+            else:
+                plan = EditPlan(rule.action(plan.apply()))
+                context = AnalysisContext(plan.text)
+            if rule.terminal:
+                break
+        return plan
+
+    def process_batch(self, responses: list, batch_size: int = 32) -> list:
+        """
+        Run many responses through the rules, one rule at a time across the whole batch.
+
+        Conditions that carry a batched implementation in a `batch` attribute
+        (called as `condition.batch(responses, batch_size)` and returning one bool per
+        response, like `detect_toxicity`) are evaluated with a single call per rule;
+        all other conditions are called once per response.
+
+        Args:
+            responses (list[str]): The LLM-generated texts to inspect and optionally modify.
+            batch_size (int): Maximum batch size passed to batched conditions.
+
+        Returns:
+            list[str]: The same results as calling process() on each response, in input order.
+        """
+        responses = list(responses)
+        measured = self.metrics is not None
+        clock = time.perf_counter_ns
+        contexts = [AnalysisContext(text) for text in responses]
+        # Indices of responses no terminal action has fired on yet.
+        active = list(range(len(responses)))
+        for rule in self._scheduled_rules():
+            if not active:
+                break
+            batch_fn = getattr(rule.condition, "batch", None)
+            texts = [responses[i] for i in active]
+            t0 = clock() if measured else 0
+            if batch_fn is not None:
+                flags = batch_fn(texts, batch_size)
+            elif rule.contextual:
+                flags = [rule.condition(contexts[i]) for i in active]
+            else:
+                flags = [rule.condition(text) for text in texts]
+            # Batched conditions are timed as a whole; each response is charged its share.
+            per_text = (clock() - t0) // len(texts) if measured else 0
+            finished = set()
+            for i, flag in zip(active, flags):
+                if flag:
+                    if measured:
+                        before = len(responses[i])
+                        t1 = clock()
+                        responses[i] = rule.action(responses[i])
+                        rule.stats.record(per_text, clock() - t1, len(responses[i]) - before)
+                    else:
+                        responses[i] = rule.action(responses[i])
+                    if rule.terminal:
+                        finished.add(i)
+                    elif responses[i] is not contexts[i].text:
+                        contexts[i] = AnalysisContext(responses[i])
+                elif measured:
+                    rule.stats.record(per_text)
+            if finished:
+                active = [i for i in active if i not in finished]
+        return responses
+
+    def process_stream(self, chunks):
+        """
+        Process a response that arrives in chunks, yielding output as soon as it is safe.
+
+        Text is released once no rule can still change it: appended annotations (such
+        as the disclaimers) come at end of stream, and only a short tail is held back
+        for substitution rules whose match could continue into the next chunk. The
+        concatenated output is always identical to process("".join(chunks)). See
+        ai_callback.streaming for how actions declare themselves stream-friendly.
+
+        Args:
+            chunks (iterable[str]): The response text, in order (e.g. LLM stream deltas).
+
+        Yields:
+            str: Non-empty pieces of the final output, in order.
+        """
+        stream = StreamProcessor(self)
+        for chunk in chunks:
+            out = stream.feed(chunk)
+            if out:
+                yield out
+        tail = stream.finish()
+        if tail:
+            yield tail
+
+    def process_large(self, source, sink, window=DEFAULT_WINDOW):
+        """
+        Process a response too large to hold comfortably, in bounded memory.
+
+        The text is read from `source` in windows of `window` characters and the output
+        is written to `sink` as it goes. Only rules whose conditions declare a match
+        length (`window`) and whose actions stream are allowed; see ai_callback.large.
+
+        Args:
+            source (str or file): The response text, or a text file object to read it from.
+            sink (file): Anything with write(str), such as a file or socket.makefile("w").
+            window (int): Characters per window.
+
+        Returns:
+            list[str]: Names of the rules that fired.
+
+        Raises:
+            ValueError: If a registered rule cannot be processed in windows.
+
+        Example usage:
+            with open("big.txt") as src, open("out.txt", "w") as dst:
+                callback.process_large(src, dst)
+        """
+        return process_large(self, source, sink, window)
+
+    async def process_async(self, response: str, executor=None) -> str:
+        """
+        Asyncio-native process(): same rules and result, without blocking the event loop.
+
+        Conditions and actions may be plain functions or `async def` coroutine functions.
+        Coroutine functions are awaited on the loop; plain functions are treated as
+        potentially blocking (model inference, HTTP calls) and run in `executor`.
+
+        The remaining conditions are evaluated concurrently against the current text.
+        Results are consumed in rule order; when a firing rule's action changes the
+        text, condition results computed on the old text are discarded (unfinished ones
+        are cancelled) and the following conditions are evaluated again on the new text,
+        so each condition sees exactly the text it would see in process().
+
+        Args:
+            response (str): The LLM-generated text to inspect and optionally modify.
+            executor (concurrent.futures.Executor, optional): Executor for plain functions.
+                                                              Defaults to the loop's default executor.
+
         Returns:
             str: The final modified (or unmodified) LLM response.
         """
-        for condition, action in self.rules:
-            if condition(response):
-                response = action(response)
-        return response
\ No newline at end of file
+        rules = self._scheduled_rules()
+        measured = self.metrics is not None
+        timer = current_timer()
+        clock = timer.clock if timer is not None else time.perf_counter_ns
+        start = 0
+        while start < len(rules):
+            context = AnalysisContext(response)
+            pending = [
+                asyncio.ensure_future(_call_async_timed(
+                    rule.condition, context if rule.contextual else response, executor, clock))
+                for rule in rules[start:]
+            ]
+            next_start = len(rules)
+            try:
+                for offset, task in enumerate(pending):
+                    fired, t0, t1 = await task
+                    rule = rules[start + offset]
+                    if not fired:
+                        if timer is not None:
+                            timer.add(rule.name, t0, t1, kind="rule", fired=False)
+                        if measured:
+                            rule.stats.record(t1 - t0)
+                        continue
+                    result, t2, t3 = await _call_async_timed(rule.action, response, executor, clock)
+                    if timer is not None:
+                        timer.add(rule.name, t0, t3, kind="rule", fired=True)
+                    if measured:
+                        rule.stats.record(t1 - t0, t3 - t2, len(result) - len(response))
+                    if rule.terminal:
+                        return result
+                    if result != response:
+                        response = result
+                        next_start = start + offset + 1
+                        break
+            finally:
+                for task in pending:
+                    task.cancel()
+            start = next_start
+        return response
+
+
+async def _call_async(fn, arg, executor):
+    # Await coroutine functions directly; push everything else off the event loop,
+    # carrying the caller's context (request timer etc.) into the executor thread.
+    if inspect.iscoroutinefunction(fn) or inspect.iscoroutinefunction(getattr(fn, "__call__", None)):
+        return await fn(arg)
+    context = contextvars.copy_context()
+    result = await asyncio.get_running_loop().run_in_executor(executor, context.run, fn, arg)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def _call_async_timed(fn, arg, executor, clock):
+    # _call_async plus its start and end readings of `clock`, for metrics and spans.
+    start = clock()
+    result = await _call_async(fn, arg, executor)
+    return result, start, clock()
@@ -0,0 +1,193 @@
+# ai_callback/cascade.py
+"""
+Cheap-first cascade in front of the toxicity model.
+
+Most responses are clearly benign, yet detect_toxicity runs a toxic-bert forward
+pass on every one. ToxicityCascade asks a list of cheap signals first. Each signal
+answers True (toxic), False (benign) or None (can't tell), and the first definite
+answer decides. The model only runs when every signal is inconclusive.
+
+The default signals, in order:
+- LengthSignal: a response with fewer than 3 non-blank characters is benign;
+- KeywordSignal: a whole-word hit from the detect_abuse or
+  detect_harmful_instructions lists is toxic;
+- CueSignal: a response containing none of TOXICITY_CUES (insults, profanity,
+  threats) is benign.
+
+Signals read the shared AnalysisContext (ai_callback.context), so the abuse and
+harmful-instruction lists are answered by the same scan as the other keyword rules.
+TOXICITY_CUES live on the cascade's own KeywordEngine rather than default_engine, so
+importing this module does not change what the other keyword rules scan for.
+
+A cascade can disagree with the model alone: the model may flag a text without any
+cue word, and a keyword such as "stupid" may be used harmlessly. Measure this on your
+own labeled data with `python -m benchmarks.eval_cascade --corpus data.jsonl` before
+putting a cascade in front of production traffic. `stats()` reports which stage
+decided each call and what fraction of traffic reached the model.
+
+Example usage:
+    cascade = ToxicityCascade()
+    callback.add_rule(cascade, redact_entire_text, reads={"body"})
+    ...
+    cascade.stats()  # {"calls": 1000, "model_calls": 84, "model_fraction": 0.084, ...}
+"""
+import re
+
+from ai_callback.conditions import _is_toxic, _toxicity_results, detect_toxicity, detect_toxicity_batch
+from ai_callback.context import analyze
+from ai_callback.keywords import KeywordEngine, default_engine
+
+# Words whose absence makes a response clearly benign for CueSignal. Matched as
+# lowercase substrings, like the other keyword lists, so "kill" also covers "killing".
+TOXICITY_CUES = [
+    "hate", "kill", "die", "dead", "murder", "hurt", "attack", "threat", "destroy",
+    "stupid", "idiot", "dumb", "moron", "fool", "loser", "pathetic", "worthless",
+    "useless", "disgusting", "ugly", "trash", "garbage", "scum", "filth", "shut up",
+    "suck", "damn", "hell", "crap", "fuck", "shit", "bitch", "bastard", "ass",
+    "racist", "retard", "freak", "creep", "slut", "whore", "nazi",
+]
+_CUE_ENGINE = KeywordEngine()
+_CUE_ENGINE.register("toxicity_cues", TOXICITY_CUES)
+
+
+class LengthSignal:
+    """Benign if the response has fewer than `min_chars` non-blank characters."""
+
+    name = "length"
+
+    def __init__(self, min_chars=3):
+        self.min_chars = min_chars
+
+    def __call__(self, context):
+        return False if len(context.stripped) < self.min_chars else None
+
+
+class KeywordSignal:
+    """
+    Toxic if a keyword of the named lists occurs as a whole word.
+
+    The shared keyword scan finds candidate hits; a word-boundary regex then confirms
+    them, so "hell" does not fire on "hello".
+    """
+
+    name = "keywords"
+
+    def __init__(self, lists=("abuse", "harmful_instructions"), engine=default_engine):
+        self.lists = tuple(lists)
+        self.engine = engine
+        keywords = sorted({kw for name in self.lists for kw in engine.keywords(name)}, key=len, reverse=True)
+        self.pattern = re.compile(r"\b(?:" + "|".join(re.escape(kw) for kw in keywords) + r")\b")
+
+    def __call__(self, context):
+        hits = context.keyword_hits(self.engine)
+        if any(name in hits for name in self.lists) and self.pattern.search(context.lower):
+            return True
+        return None
+
+
+class CueSignal:
+    """
+    Benign if none of the keywords in list `cues` of `engine` occurs. Defaults to
+    TOXICITY_CUES on the cascade's own engine.
+    """
+
+    name = "no_cues"
+
+    def __init__(self, cues="toxicity_cues", engine=_CUE_ENGINE):
+        self.cues = cues
+        self.engine = engine
+
+    def __call__(self, context):
+        return None if self.cues in context.keyword_hits(self.engine) else False
+
+
+class ToxicityCascade:
+    """
+    A drop-in replacement for detect_toxicity that runs cheap signals before the model.
+
+    Args:
+        signals (list, optional): Callables taking an AnalysisContext and returning
+                                  True, False or None, tried in order. Each needs a
+                                  `name` for stats(). Defaults to LengthSignal(),
+                                  KeywordSignal(), CueSignal().
+        threshold (float): Model score above which a "toxic" label counts.
+
+    Counters are plain increments without a lock, as in ai_callback.metrics. Each
+    CallbackPool worker counts its own calls.
+    """
+
+    takes_context = True
+    # Worst case, when every signal is inconclusive; for the rule scheduler and the memo.
+    cost = detect_toxicity.cost
+    models = ("toxicity",)
+
+    def __init__(self, signals=None, threshold=0.7):
+        if signals is None:
+            signals = [LengthSignal(), KeywordSignal(), CueSignal()]
+        self.signals = list(signals)
+        self.threshold = threshold
+        self.__name__ = "detect_toxicity_cascade"
+        self.reset()
+
+    def reset(self):
+        """Zero the counters."""
+        self.calls = 0
+        self.model_calls = 0
+        self.decided = {signal.name: {"toxic": 0, "benign": 0} for signal in self.signals}
+
+    def decide(self, response):
+        """
+        Return (verdict, stage): the signals' answer and the name of the signal that gave
+        it, or (None, "model") if the model has to decide. Does not touch the counters.
+        """
+        return self._decide(analyze(response))
+
+    def _decide(self, context):
+        for signal in self.signals:
+            verdict = signal(context)
+            if verdict is not None:
+                return bool(verdict), signal.name
+        return None, "model"
+
+    def __call__(self, response):
+        self.calls += 1
+        context = analyze(response)
+        verdict, stage = self._decide(context)
+        if verdict is None:
+            self.model_calls += 1
+            return _is_toxic(_toxicity_results(context.text), self.threshold)
+        self.decided[stage]["toxic" if verdict else "benign"] += 1
+        return verdict
+
+    def batch(self, responses, batch_size=32):
+        """Cascade over a batch; the undecided responses share batched model calls."""
+        responses = list(responses)
+        flags = [False] * len(responses)
+        undecided = []
+        for i, response in enumerate(responses):
+            verdict, stage = self.decide(response)
+            if verdict is None:
+                undecided.append(i)
+            else:
+                self.decided[stage]["toxic" if verdict else "benign"] += 1
+                flags[i] = verdict
+        self.calls += len(responses)
+        self.model_calls += len(undecided)
+        if undecided:
+            scored = detect_toxicity_batch([responses[i] for i in undecided], batch_size, self.threshold)
+            for i, flag in zip(undecided, scored):
+                flags[i] = flag
+        return flags
+
+    def stats(self):
+        """
+        Returns:
+            dict: calls, model_calls, model_fraction (share of calls that reached the
+                  model) and decided_by: {signal name: {"toxic": n, "benign": n}}.
+        """
+        return {
+            "calls": self.calls,
+            "model_calls": self.model_calls,
+            "model_fraction": self.model_calls / self.calls if self.calls else 0.0,
+            "decided_by": {name: dict(counts) for name, counts in self.decided.items()},
+        }
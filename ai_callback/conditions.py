@@ -1,15 +1,37 @@
 # ai_callback/conditions.py
 import re
-from transformers import pipeline
 
-# Initialize the pipeline once at the module level (avoid re-initializing on each call)
-toxicity_model = pipeline("text-classification", model="unitary/toxic-bert")
+from ai_callback import inference
+from ai_callback.context import analyze
+from ai_callback.keywords import default_engine
+from ai_callback.models import get_model, register_model
+from ai_callback.patterns import MAX_MATCH_LENGTH, year_before_found_that
+
+
+def _load_toxicity_model():
+    # transformers (and torch) are imported here rather than at module level so that
+    # users of the keyword/regex rules never pay for them.
+    from transformers import pipeline
+    return pipeline("text-classification", model="unitary/toxic-bert")
+
+# The model is built lazily on the first detect_toxicity call, or eagerly via
+# ai_callback.models.warm_up("toxicity") (e.g. before forking workers).
+register_model("toxicity", _load_toxicity_model)
+
+
+def __getattr__(name):
+    # `toxicity_model` used to be a module-level global; keep it reachable.
+    if name == "toxicity_model":
+        return get_model("toxicity")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 ###################
 # DISCLAIMER RULES
 ###################
 
+default_engine.register("financial_advice", ["invest", "stock", "mutual fund", "crypto", "financial advice"])
+
 def detect_financial_advice(response):
     """
     Return True if the text suggests financial advice or mentions 
@@ -24,9 +46,9 @@ def detect_financial_advice(response):
     Example usage:
         detect_financial_advice("You should invest in stocks.")  # Returns: True
     """
-    keywords = ["invest", "stock", "mutual fund", "crypto", "financial advice"]
-    text_lower = response.lower()
-    return any(kw in text_lower for kw in keywords)
+    return "financial_advice" in analyze(response).keyword_hits()
+
+default_engine.register("medical_advice", ["medical advice", "diagnosis", "treatment", "cure", "prescription"])
 
 def detect_medical_advice(response):
     """
@@ -43,9 +65,9 @@ def detect_medical_advice(response):
         detect_medical_advice("This treatment will cure your illness.")  # Returns: True
     """
     # A simple keyword approach
-    keywords = ["medical advice", "diagnosis", "treatment", "cure", "prescription"]
-    text_lower = response.lower()
-    return any(kw in text_lower for kw in keywords)
+    return "medical_advice" in analyze(response).keyword_hits()
+
+default_engine.register("legal_advice", ["legal advice", "lawsuit", "court", "attorney", "lawyer"])
 
 def detect_legal_advice(response):
     """
@@ -60,15 +82,15 @@ def detect_legal_advice(response):
     Example usage:
         detect_legal_advice("You should consult a lawyer.")  # Returns: True
     """
-    keywords = ["legal advice", "lawsuit", "court", "attorney", "lawyer"]
-    text_lower = response.lower()
-    return any(kw in text_lower for kw in keywords)
+    return "legal_advice" in analyze(response).keyword_hits()
 
 
 ####################
 # MODERATION RULES
 ####################
 
+default_engine.register("abuse", ["idiot", "stupid", "hate you", "dumb", "kill yourself", "hell"])
+
 def detect_abuse(response):
     """
     Return True if the text contains common abusive or hateful phrases.
@@ -82,9 +104,7 @@ def detect_abuse(response):
     Example usage:
         detect_abuse("You are an idiot.")  # Returns: True
     """
-    abusive_keywords = ["idiot", "stupid", "hate you", "dumb", "kill yourself", "hell" ]
-    text_lower = response.lower()
-    return any(word in text_lower for word in abusive_keywords)
+    return "abuse" in analyze(response).keyword_hits()
 
 
 ###################
@@ -105,14 +125,8 @@ def detect_weather_query(response):
     Example usage:
         detect_weather_query("What's the weather in New York?")  # Returns: True
     """
-    text_lower = response.lower()
-    # Check for key terms
-    if "weather" in text_lower or "climate" in text_lower:
-        # Then look for "weather in X" or "climate in X" (capitalized word)
-        pattern = r"(weather|climate)\s+(in\s+)?([A-Z][a-z]+)"
-        if re.search(pattern, response):
-            return True
-    return False
+    # Look for "weather in X" or "climate in X" (capitalized word)
+    return analyze(response).regex_match("weather")
 
 
 ###################
@@ -132,7 +146,8 @@ def detect_incomplete_response(response):
     Example usage:
         detect_incomplete_response("This is an incomplete response...")  # Returns: True
     """
-    return "..." in response or "[incomplete]" in response.lower()
+    context = analyze(response)
+    return "..." in context.text or "[incomplete]" in context.lower
 
 
 
@@ -153,7 +168,9 @@ def detect_question(response: str) -> bool:
     Example usage:
         detect_question("Is this a question?")  # Returns: True
     """
-    return response.strip().endswith('?')
+    return analyze(response).stripped.endswith('?')
+
+default_engine.register("greeting", ["hello", "hi", "greetings", "hey", "good morning", "good afternoon", "good evening"])
 
 def detect_greeting(response: str) -> bool:
     """
@@ -168,10 +185,12 @@ def detect_greeting(response: str) -> bool:
     Example usage:
         detect_greeting("Hello, how are you?")  # Returns: True
     """
-    greetings = ["hello", "hi", "greetings", "hey", "good morning", "good afternoon", "good evening"]
-    text_lower = response.lower()
-    return any(greeting in text_lower for greeting in greetings)
+    return "greeting" in analyze(response).keyword_hits()
+
 
+# Names of the ai_callback.patterns entries each rule looks at
+PII_PATTERNS = ("email", "phone", "ssn", "credit_card")
+CITATION_PATTERNS = ("research_shows", "studies_indicate", "according_to", "scientists_discovered")
 
 def detect_pii(response: str) -> bool:
     """
@@ -187,14 +206,8 @@ def detect_pii(response: str) -> bool:
         detect_pii("Contact john@email.com")  # Returns: True
         detect_pii("Call 123-456-7890")  # Returns: True
     """
-    import re
-    patterns = {
-        'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-        'phone': r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
-        'ssn': r'\b\d{3}-?\d{2}-?\d{4}\b',
-        'credit_card': r'\b\d{4}[-. ]?\d{4}[-. ]?\d{4}[-. ]?\d{4}\b'
-    }
-    return any(bool(re.search(pattern, response)) for pattern in patterns.values())
+    context = analyze(response)
+    return any(context.regex_match(name) for name in PII_PATTERNS)
 
 def detect_code_snippet(response: str) -> bool:
     """
@@ -211,7 +224,10 @@ def detect_code_snippet(response: str) -> bool:
         detect_code_snippet("import pandas as pd")  # Returns: True
     """
     code_indicators = ['def ', 'class ', 'import ', 'function', '```', 'var ', 'const ']
-    return any(indicator in response for indicator in code_indicators)
+    text = analyze(response).text
+    return any(indicator in text for indicator in code_indicators)
+
+default_engine.register("harmful_instructions", ['hack', 'exploit', 'bypass security', 'crack password', 'ddos'])
 
 def detect_harmful_instructions(response: str) -> bool:
     """
@@ -226,8 +242,7 @@ def detect_harmful_instructions(response: str) -> bool:
     Example usage:
         detect_harmful_instructions("How to hack a website")  # Returns: True
     """
-    harmful_keywords = ['hack', 'exploit', 'bypass security', 'crack password', 'ddos']
-    return any(keyword in response.lower() for keyword in harmful_keywords)
+    return "harmful_instructions" in analyze(response).keyword_hits()
 
 def detect_url(response: str) -> bool:
     """
@@ -242,9 +257,10 @@ def detect_url(response: str) -> bool:
     Example usage:
         detect_url("Visit https://example.com")  # Returns: True
     """
-    import re
-    url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-    return bool(re.search(url_pattern, response))
+    return analyze(response).regex_match("url")
+
+default_engine.register("positive_sentiment", ['great', 'excellent', 'good', 'happy', 'wonderful'])
+default_engine.register("negative_sentiment", ['bad', 'terrible', 'awful', 'poor', 'horrible'])
 
 def detect_sentiment(response: str) -> str:
     """
@@ -260,15 +276,14 @@ def detect_sentiment(response: str) -> str:
         detect_sentiment("This is great!")  # Returns: 'positive'
         detect_sentiment("This is terrible")  # Returns: 'negative'
     """
-    positive = ['great', 'excellent', 'good', 'happy', 'wonderful']
-    negative = ['bad', 'terrible', 'awful', 'poor', 'horrible']
-    
-    text_lower = response.lower()
-    pos_count = sum(word in text_lower for word in positive)
-    neg_count = sum(word in text_lower for word in negative)
+    hits = analyze(response).keyword_hits()
+    pos_count = len(hits.get("positive_sentiment", ()))
+    neg_count = len(hits.get("negative_sentiment", ()))
     
     return 'positive' if pos_count > neg_count else 'negative' if neg_count > pos_count else 'neutral'
 
+default_engine.register("factual_claim", ['according to', 'studies show', 'research indicates', 'scientists found', 'statistics show'])
+
 def detect_factual_claim(response: str) -> bool:
     """
     Identifies statements that are presented as factual claims.
@@ -282,8 +297,9 @@ def detect_factual_claim(response: str) -> bool:
     Example usage:
         detect_factual_claim("Studies show that...")  # Returns: True
     """
-    claim_indicators = ['according to', 'studies show', 'research indicates', 'scientists found', 'statistics show']
-    return any(indicator in response.lower() for indicator in claim_indicators)
+    return "factual_claim" in analyze(response).keyword_hits()
+
+default_engine.register("emergency", ['emergency', '911', 'urgent', 'immediately', 'life-threatening', 'crisis', 'medical emergency', 'fire alarm'])
 
 def detect_emergency_situation(response: str) -> bool:
     """
@@ -298,8 +314,7 @@ def detect_emergency_situation(response: str) -> bool:
     Example usage:
         detect_emergency_situation("Call 911 immediately!")  # Returns: True
     """
-    emergency_keywords = ['emergency', '911', 'urgent', 'immediately', 'life-threatening', 'crisis', 'medical emergency', 'fire alarm']
-    return any(keyword in response.lower() for keyword in emergency_keywords)
+    return "emergency" in analyze(response).keyword_hits()
 
 
 def detect_citation_needed(response: str) -> bool:
@@ -315,21 +330,62 @@ def detect_citation_needed(response: str) -> bool:
     Example usage:
         detect_citation_needed("Research shows that...")  # Returns: True
     """
-    import re
-    patterns = [
-        r'research shows',
-        r'studies indicate',
-        r'according to .{3,30}',
-        r'\d{4}.*found that',
-        r'scientists discovered'
-    ]
-    return any(bool(re.search(pattern, response, re.IGNORECASE)) for pattern in patterns)
+    # research shows / studies indicate / according to .{3,30} / scientists discovered,
+    # or a year followed by "found that" on the same line
+    context = analyze(response)
+    if any(context.regex_match(name) for name in CITATION_PATTERNS):
+        return True
+    if not context.regex_match("found_that"):
+        return False
+    return year_before_found_that(context.text, context.regex_spans("year"), context.regex_spans("found_that"))
+
+
+# Every condition above also accepts an AnalysisContext (see ai_callback.context);
+# AICallback passes one shared per response to the conditions marked here.
+for _condition in (
+    detect_financial_advice, detect_medical_advice, detect_legal_advice, detect_abuse,
+    detect_weather_query, detect_incomplete_response, detect_question, detect_greeting,
+    detect_pii, detect_code_snippet, detect_harmful_instructions, detect_url,
+    detect_sentiment, detect_factual_claim, detect_emergency_situation, detect_citation_needed,
+):
+    _condition.takes_context = True
+
+# Annotation only: rules on it may be skipped when a process() call is short of budget
+# (see ai_callback.budget).
+detect_citation_needed.optional = True
+
+# Longest text a single match can span, so the condition can be evaluated on
+# overlapping windows of a large response (see ai_callback.large). The others either
+# look at the whole text (detect_question) or have no bounded match (detect_weather_query).
+for _condition, _name in (
+    (detect_financial_advice, "financial_advice"), (detect_medical_advice, "medical_advice"),
+    (detect_legal_advice, "legal_advice"), (detect_abuse, "abuse"), (detect_greeting, "greeting"),
+    (detect_harmful_instructions, "harmful_instructions"), (detect_factual_claim, "factual_claim"),
+    (detect_emergency_situation, "emergency"),
+):
+    _condition.window = max(map(len, default_engine.keywords(_name)))
+# For the PII and URL patterns, their longest match plus the character after it, which
+# decides a trailing \b.
+detect_pii.window = max(MAX_MATCH_LENGTH[name] for name in PII_PATTERNS) + 1
+detect_url.window = MAX_MATCH_LENGTH["url"] + 1
+del _condition, _name
+
+
+# Long responses are scored in overlapping windows of this many tokens (the 512-token
+# limit of BERT-class models, less [CLS] and [SEP]), starting every
+# TOXICITY_STRIDE_TOKENS tokens. A larger stride means fewer windows (faster) and less
+# overlap, so toxic text spanning a window boundary is more likely to be split.
+TOXICITY_WINDOW_TOKENS = 510
+TOXICITY_STRIDE_TOKENS = 384
 
 
 def detect_toxicity(response):
     """
     Identifies text that might be considered toxic or hateful using the 'unitary/toxic-bert' model.
 
+    Responses longer than the model's input limit are not truncated: they are scored
+    in overlapping windows (see toxicity_scores) and the highest score counts.
+
     Args:
         response (str): The LLM-generated text to inspect.
 
@@ -342,11 +398,152 @@ def detect_toxicity(response):
         >>> detect_toxicity(text)
         True
     """
-    # This model typically returns a list of dicts, e.g.:
-    # [{'label': 'toxic', 'score': 0.85}] or [{'label': 'non-toxic', 'score': 0.98}]
-    results = toxicity_model(response)
-    # We decide that if any returned label is "toxic" and score > 0.7, it's considered toxic.
+    # Every label's score is looked at, e.g.:
+    # [{'label': 'toxic', 'score': 0.85}, {'label': 'insult', 'score': 0.64}, ...]
+    return _is_toxic(_toxicity_results(response))
+
+
+def toxicity_scores(response, window=None, stride=None, batch_size=32):
+    """
+    Score every label of the toxicity model over the whole response.
+
+    The text is tokenized once to find overlapping windows of `window` tokens starting
+    every `stride` tokens (the last window ends at the end of the text). All windows
+    are scored in one batched pipeline call, and each label keeps its highest score.
+
+    Args:
+        response (str): The text to score; any length.
+        window (int, optional): Tokens per window. Defaults to TOXICITY_WINDOW_TOKENS.
+        stride (int, optional): Tokens between window starts, 1 <= stride <= window.
+                                Defaults to TOXICITY_STRIDE_TOKENS.
+        batch_size (int): Windows per forward pass.
+
+    Returns:
+        dict: Maps each label to its highest score across the windows.
+
+    Example usage:
+        toxicity_scores(long_answer, stride=256)  # Returns: {"toxic": 0.91, "insult": 0.64, ...}
+    """
+    model = get_model("toxicity")
+    windows = _windows(model, response, window or TOXICITY_WINDOW_TOKENS, stride or TOXICITY_STRIDE_TOKENS)
+    best = {}
+    for result in model(windows, batch_size=batch_size, top_k=None, truncation=True):
+        _keep_best(best, result)
+    return best
+
+
+def _toxicity_results(response):
+    # Every label's score for one response (see _score). With coalescing enabled
+    # (see ai_callback.inference) the call joins a shared batch.
+    results = inference.submit("toxicity", response)
+    if results is not None:
+        return results
+    return _score(get_model("toxicity"), [response])[0]
+
+
+def _toxicity_results_batch(responses):
+    # _toxicity_results for each response in one pipeline call; the batch function of
+    # the coalescing queue.
+    return _score(get_model("toxicity"), responses) if responses else []
+
+inference.register_batch_fn("toxicity", _toxicity_results_batch)
+
+
+def _score(model, responses, batch_size=None):
+    # Pipeline-shaped results, one list of {"label", "score"} per response, with every
+    # label (top_k=None) whatever the response's length. Whether a response is windowed
+    # depends on its token count: one that fits the model is scored as is, a longer one
+    # window by window, each label keeping its best score. A text of at most
+    # TOXICITY_WINDOW_TOKENS characters always fits (a token covers at least one
+    # character), so it is not tokenized first. All texts go in one pipeline call.
+    texts, owners = [], []
+    for i, response in enumerate(responses):
+        if len(response) <= TOXICITY_WINDOW_TOKENS:
+            windows = [response]
+        else:
+            windows = _windows(model, response, TOXICITY_WINDOW_TOKENS, TOXICITY_STRIDE_TOKENS)
+        texts.extend(windows)
+        owners.extend([i] * len(windows))
+    best = [{} for _ in responses]
+    results = model(texts, batch_size=batch_size or len(texts), top_k=None, truncation=True)
+    for i, result in zip(owners, results):
+        _keep_best(best[i], result)
+    return [[{"label": label, "score": score} for label, score in scores.items()] for scores in best]
+
+
+def _keep_best(best, result):
+    # Fold one text's pipeline result into `best` (label -> highest score so far).
+    for r in [result] if isinstance(result, dict) else result:
+        if r["score"] > best.get(r["label"], -1.0):
+            best[r["label"]] = r["score"]
+
+
+_WORD = re.compile(r"\S+")
+
+
+def _windows(model, text, window, stride):
+    # Texts of the overlapping token windows of `text`. Token offsets come from the
+    # pipeline's fast tokenizer when it has one, else from whitespace-separated words.
+    if not 0 < stride <= window:
+        raise ValueError(f"stride must be between 1 and window ({window}), got {stride}")
+    tokenizer = getattr(model, "tokenizer", None)
+    if getattr(tokenizer, "is_fast", False):
+        offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    else:
+        offsets = [m.span() for m in _WORD.finditer(text)]
+    if len(offsets) <= window:
+        return [text]
+    starts = list(range(0, len(offsets) - window, stride))
+    starts.append(len(offsets) - window)
+    return [text[offsets[i][0]:offsets[i + window - 1][1]] for i in starts]
+
+
+def detect_toxicity_batch(responses, batch_size=32, threshold=0.7):
+    """
+    Batched form of detect_toxicity: one pipeline call per batch instead of one per response.
+
+    Responses are sorted by length before being split into batches of `batch_size`, so
+    each batch is only padded to the length of its own longest item. Responses too long
+    for the model are scored window by window, as in detect_toxicity.
+
+    Args:
+        responses (list[str]): The LLM-generated texts to inspect.
+        batch_size (int): Maximum number of texts per forward pass.
+        threshold (float): Score above which a "toxic" label counts.
+
+    Returns:
+        list[bool]: detect_toxicity(response) for each response, in input order.
+
+    Example usage:
+        detect_toxicity_batch(["Have a nice day.", "You are worthless scum."])  # Returns: [False, True]
+    """
+    responses = list(responses)
+    flags = [False] * len(responses)
+    if not responses:
+        return flags
+    model = get_model("toxicity")
+    order = sorted(range(len(responses)), key=lambda i: len(responses[i]))
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        results = _score(model, [responses[i] for i in bucket], batch_size)
+        for i, result in zip(bucket, results):
+            flags[i] = _is_toxic(result, threshold)
+    return flags
+
+# Picked up by AICallback.process_batch to score a whole batch in one go.
+detect_toxicity.batch = detect_toxicity_batch
+# Estimated seconds per call on CPU, so the rule scheduler runs cheaper checks first.
+detect_toxicity.cost = 0.05
+# Models to load before forking workers (see ai_callback.parallel.CallbackPool).
+detect_toxicity.models = ("toxicity",)
+
+
+def _is_toxic(results, threshold=0.7):
+    # A single input yields a list of dicts; batched calls may give one bare dict per input.
+    if isinstance(results, dict):
+        results = [results]
+    # We decide that if any returned label is "toxic" and score > threshold, it's considered toxic.
     return any(
-        r["label"].lower() == "toxic" and r["score"] > 0.7
+        r["label"].lower() == "toxic" and r["score"] > threshold
         for r in results
     )
@@ -0,0 +1,152 @@
+# ai_callback/context.py
+"""
+Per-response analysis context shared by the conditions of one process() call.
+
+Many conditions start from the same derived views of a response: the lowercased
+text, the stripped text, the keyword scan, the regex searches. AICallback builds one
+AnalysisContext per response and hands it to every condition that declares
+`takes_context = True`, so each view is computed at most once, and only if some
+condition asks for it. When an action changes the text, the next conditions get a
+fresh context for the new text.
+
+Conditions without the attribute keep receiving the plain string. The stock
+conditions accept either, via analyze():
+
+    def detect_shouting(response):
+        return analyze(response).text.isupper()
+
+    detect_shouting.takes_context = True
+"""
+import re
+
+from ai_callback.keywords import default_engine
+from ai_callback.patterns import default_regex_set
+
+_TOKEN = re.compile(r"\w+")
+# A sentence runs up to and including its closing punctuation, or to the end of the text.
+_SENTENCE = re.compile(r"[^.!?\s][^.!?]*(?:[.!?]+|$)")
+
+
+class AnalysisContext:
+    """
+    Lazily computed views of one response text.
+
+    Every view is computed on first access and cached for the lifetime of the context.
+    Treat the returned values as read-only; they are shared by all conditions.
+
+    Example usage:
+        ctx = AnalysisContext("Good morning. What's the weather in Paris?")
+        ctx.lower           # "good morning. what's the weather in paris?"
+        ctx.sentences       # [(0, 13), (14, 42)]
+        ctx.keyword_hits()  # {"greeting": {"good morning"}, "positive_sentiment": {"good"}}
+        ctx.regex_match("weather")  # True
+        ctx.regex_spans("weather")  # [(25, 41)]
+    """
+
+    __slots__ = ("text", "_lower", "_stripped", "_tokens", "_sentences", "_keywords", "_regex")
+
+    def __init__(self, text):
+        self.text = text
+        self._lower = None
+        self._stripped = None
+        self._tokens = None
+        self._sentences = None
+        self._keywords = None
+        self._regex = None
+
+    @property
+    def lower(self):
+        """`text.lower()`."""
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def stripped(self):
+        """`text.strip()`."""
+        if self._stripped is None:
+            self._stripped = self.text.strip()
+        return self._stripped
+
+    @property
+    def tokens(self):
+        """(start, end) spans of the word tokens (`\\w+` runs) in `text`."""
+        if self._tokens is None:
+            self._tokens = [m.span() for m in _TOKEN.finditer(self.text)]
+        return self._tokens
+
+    @property
+    def sentences(self):
+        """(start, end) spans of the sentences in `text`, split after `.`, `!` and `?`."""
+        if self._sentences is None:
+            self._sentences = [m.span() for m in _SENTENCE.finditer(self.text)]
+        return self._sentences
+
+    def keyword_hits(self, engine=default_engine):
+        """
+        Result of `engine.scan(text)`, reusing the lowercased text.
+
+        Args:
+            engine (KeywordEngine): Engine to scan with; defaults to the stock one.
+
+        Returns:
+            dict: Maps each keyword list with a hit to the set of its keywords found.
+        """
+        if self._keywords is None:
+            self._keywords = {}
+        hits = self._keywords.get(engine)
+        if hits is None:
+            hits = self._keywords[engine] = engine.scan(self.text, self.lower)
+        return hits
+
+    def regex_match(self, name, regex_set=default_regex_set):
+        """
+        Result of `regex_set.matches(name, text)`.
+
+        Args:
+            name (str): Pattern to search for.
+            regex_set (RegexSet): Set the pattern belongs to; defaults to the stock set.
+
+        Returns:
+            bool: True if the pattern occurs in the text.
+        """
+        if self._regex is None:
+            self._regex = {}
+        key = (regex_set, name)
+        found = self._regex.get(key)
+        if found is None:
+            spans = self._regex.get((regex_set, name, "spans"))
+            found = self._regex[key] = bool(spans) if spans is not None else regex_set.matches(name, self.text)
+        return found
+
+    def regex_spans(self, name, regex_set=default_regex_set):
+        """
+        Result of `regex_set.spans(name, text)`.
+
+        Args:
+            name (str): Pattern to find.
+            regex_set (RegexSet): Set the pattern belongs to; defaults to the stock set.
+
+        Returns:
+            list: (start, end) spans of the pattern's matches.
+        """
+        if self._regex is None:
+            self._regex = {}
+        key = (regex_set, name, "spans")
+        spans = self._regex.get(key)
+        if spans is None:
+            if self._regex.get((regex_set, name)) is False:
+                return []
+            spans = self._regex[key] = regex_set.spans(name, self.text)
+        return spans
+
+    def __repr__(self):
+        preview = self.text if len(self.text) <= 40 else self.text[:37] + "..."
+        return f"AnalysisContext({preview!r})"
+
+
+def analyze(response):
+    """Return `response` if it is already an AnalysisContext, else a new one for the string."""
+    if type(response) is AnalysisContext:
+        return response
+    return AnalysisContext(response)
@@ -0,0 +1,114 @@
+# ai_callback/edits.py
+"""
+Edit plans: span replacements and appends recorded against one original text and
+applied in a single pass.
+
+Plain actions return a new string, so every rule that fires copies the whole
+response. An action can also expose an `edit(text, plan)` attribute that records
+what it would change instead:
+
+    def redact(response):
+        return PATTERN.sub("[REDACTED]", response)
+
+    def _redact_edit(text, plan):
+        for match in PATTERN.finditer(text):
+            plan.replace(match.start(), match.end(), "[REDACTED]")
+
+    redact.edit = _redact_edit
+
+AICallback.plan(response) collects the edits of every firing rule and
+EditPlan.apply() builds the output with one join. See AICallback.plan for how
+conditions see the text and how actions without `edit` are handled.
+"""
+import bisect
+
+
+class EditPlan:
+    """
+    Pending edits against `text`.
+
+    Span replacements use offsets into the original `text`. When two recorded
+    replacements overlap, the one recorded first wins and the other is dropped.
+    Appended text goes after the (edited) body in the order recorded.
+    replace_all() discards everything recorded so far and replaces the whole text.
+
+    Example usage:
+        plan = EditPlan("you idiot")
+        plan.replace(4, 9, "[REDACTED]")
+        plan.append("\\n\\n[Note]")
+        plan.apply()  # Returns: "you [REDACTED]\\n\\n[Note]"
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.replacements = []  # (start, end, replacement), in recording order
+        self.suffixes = []
+        self.replaced_all = None
+
+    def replace(self, start, end, replacement):
+        """Replace text[start:end] of the original text with `replacement`."""
+        if not 0 <= start <= end <= len(self.text):
+            raise ValueError(f"Span ({start}, {end}) is outside the text (length {len(self.text)})")
+        self.replacements.append((start, end, replacement))
+
+    def append(self, suffix):
+        """Add `suffix` after the body (and after earlier appends)."""
+        self.suffixes.append(suffix)
+
+    def replace_all(self, replacement):
+        """Drop every edit so far and make `replacement` the whole output."""
+        self.replaced_all = replacement
+        self.replacements = []
+        self.suffixes = []
+
+    def __bool__(self):
+        return bool(self.replacements or self.suffixes) or self.replaced_all is not None
+
+    def apply(self):
+        """Return the edited text, built with a single join."""
+        if self.replaced_all is not None:
+            return self.replaced_all + "".join(self.suffixes)
+        if not self.replacements:
+            if not self.suffixes:
+                return self.text
+            return self.text + "".join(self.suffixes)
+        text = self.text
+        pieces = []
+        pos = 0
+        for start, end, replacement in self._accepted():
+            pieces.append(text[pos:start])
+            pieces.append(replacement)
+            pos = end
+        pieces.append(text[pos:])
+        pieces.extend(self.suffixes)
+        return "".join(pieces)
+
+    def _accepted(self):
+        # Replacements that do not conflict with one recorded earlier, sorted by position
+        # (insertions at a point before a replacement starting there).
+        keys, accepted = [], []
+        for seq, (start, end, replacement) in enumerate(self.replacements):
+            key = (start, end > start, seq)
+            i = bisect.bisect_left(keys, key)
+            if i and _conflict(accepted[i - 1], start, end):
+                continue
+            j = i
+            while j < len(accepted) and accepted[j][0] < end:
+                if _conflict(accepted[j], start, end):
+                    break
+                j += 1
+            else:
+                keys.insert(i, key)
+                accepted.insert(i, (start, end, replacement))
+        return accepted
+
+
+def _conflict(edit, start, end):
+    # Whether (start, end) overlaps the accepted `edit`. A zero-length insertion only
+    # conflicts with a replacement that strictly contains its position.
+    s, e = edit[0], edit[1]
+    if start == end:
+        return s < start < e
+    if s == e:
+        return start < s < end
+    return start < e and s < end
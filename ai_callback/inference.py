@@ -0,0 +1,138 @@
+# ai_callback/inference.py
+"""
+In-process inference queues: coalesce concurrent single-text model calls into batches.
+
+When AICallback.process runs on a thread pool, every thread calls the model on its own
+text. The calls contend for the same weights and each runs at batch size 1. With
+coalescing enabled for a model, those calls go to one worker thread instead. The worker
+gathers the texts submitted within a short window and makes one batched call, and each
+calling thread waits on a future for its own result (see ai_callback.batching).
+
+    from ai_callback import inference
+    inference.enable("toxicity", max_wait_ms=1, max_batch=32)
+    # detect_toxicity, ToxicityAbove and ToxicityCascade now share the queue
+    inference.disable("toxicity")
+
+A model can be coalesced once a batch function is registered for it with
+register_batch_fn; ai_callback.conditions registers one for "toxicity". Coalescing is
+off by default: a lone caller pays a thread handoff, plus up to max_wait_ms when no
+other call arrives. With max_wait_ms=0 the worker does not wait. Calls that arrive
+while a batch is running still form the next batch.
+
+The queue is per process. A child created with fork starts its own worker on first
+use, with the parent's settings.
+"""
+import os
+import threading
+
+from ai_callback.batching import MicroBatcher, Overloaded
+
+# model name -> function taking a list of inputs and returning one result per input
+_BATCH_FNS = {}
+# model name -> (max_wait_ms, max_batch, max_queue) of each enabled queue
+_SETTINGS = {}
+# model name -> running MicroBatcher; started lazily from _SETTINGS
+_QUEUES = {}
+_LOCK = threading.Lock()
+
+
+def _after_fork_in_child():
+    # The parent's worker threads do not exist in the child.
+    global _LOCK
+    _QUEUES.clear()
+    _LOCK = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def register_batch_fn(name, batch_fn):
+    """
+    Register the function a coalescing queue for model `name` runs on each batch.
+
+    Args:
+        name (str): Model registry key (see ai_callback.models), e.g. "toxicity".
+        batch_fn (callable): Takes a list of inputs and returns a list with one
+                             result per input, in the same order.
+    """
+    _BATCH_FNS[name] = batch_fn
+
+
+def enable(name, max_wait_ms=1.0, max_batch=32, max_queue=4096):
+    """
+    Route single calls to model `name` through one batching worker thread.
+
+    Enabling an already enabled model restarts its queue with the new settings;
+    calls already queued finish first.
+
+    Args:
+        name (str): Model registry key with a registered batch function.
+        max_wait_ms (float): Longest time the first call of a batch waits for others.
+        max_batch (int): Largest batch passed to the model.
+        max_queue (int): Calls allowed to wait; beyond that, callers run the model
+                         themselves instead of queueing.
+
+    Raises:
+        KeyError: If no batch function is registered for `name`.
+        ValueError: If max_batch or max_queue is below 1, or max_wait_ms is negative.
+    """
+    if name not in _BATCH_FNS:
+        raise KeyError(f"No batch function registered for {name!r}")
+    batcher = MicroBatcher(_BATCH_FNS[name], max_batch, max_wait_ms, max_queue)
+    with _LOCK:
+        _SETTINGS[name] = (max_wait_ms, max_batch, max_queue)
+        old, _QUEUES[name] = _QUEUES.get(name), batcher
+    if old is not None:
+        old.close()
+
+
+def disable(name):
+    """Stop coalescing calls to model `name` (no-op if it is not enabled)."""
+    with _LOCK:
+        _SETTINGS.pop(name, None)
+        batcher = _QUEUES.pop(name, None)
+    if batcher is not None:
+        batcher.close()
+
+
+def enabled(name):
+    """Return True if calls to model `name` are coalesced."""
+    return name in _SETTINGS
+
+
+def submit(name, item):
+    """
+    Run `item` through model `name`'s queue and return its result.
+
+    Called by model-backed conditions; returns None when coalescing is not enabled
+    for the model or the queue is full, and the caller then runs the model itself.
+    """
+    if name not in _SETTINGS:
+        return None
+    batcher = _QUEUES.get(name)
+    if batcher is None:
+        with _LOCK:
+            batcher = _QUEUES.get(name)
+            if batcher is None:
+                settings = _SETTINGS.get(name)
+                if settings is None:
+                    return None
+                max_wait_ms, max_batch, max_queue = settings
+                batcher = _QUEUES[name] = MicroBatcher(_BATCH_FNS[name], max_batch, max_wait_ms, max_queue)
+    try:
+        future = batcher.submit(item)
+    except (Overloaded, RuntimeError):
+        # Full, or closed by a concurrent enable()/disable().
+        return None
+    return future.result()
+
+
+def stats(name):
+    """
+    Returns:
+        dict: The queue's MicroBatcher.stats() (batches, items, mean_batch, ...), or
+              None if coalescing is not running for `name`.
+    """
+    batcher = _QUEUES.get(name)
+    return batcher.stats() if batcher is not None else None
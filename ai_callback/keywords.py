@@ -0,0 +1,204 @@
+# ai_callback/keywords.py
+"""
+Shared keyword matching for the keyword-list conditions.
+
+Every keyword list is registered by name into one KeywordEngine. A response is
+lowercased and scanned once, and the result answers all registered lists, so a rule
+set with a dozen keyword conditions no longer re-scans the same text a dozen times.
+
+When the optional `pyahocorasick` package is installed the scan is a single pass of
+a compiled Aho-Corasick automaton. Without it, the engine falls back to one C-level
+substring search per distinct keyword over the shared lowercased copy; in CPython
+that is faster than a pure-Python automaton or a combined regex alternation.
+"""
+import pickle
+import threading
+
+try:
+    import ahocorasick
+except ImportError:  # optional: pip install pyahocorasick
+    ahocorasick = None
+
+
+class KeywordEngine:
+    """
+    Matches named keyword lists against a text with one scan per text.
+
+    Matching has the same semantics as the original conditions: a keyword hits if
+    it occurs anywhere in `text.lower()` as a substring.
+
+    Example usage:
+        engine = KeywordEngine()
+        engine.register("greeting", ["hello", "hi"])
+        engine.scan("Hello there")  # Returns: {"greeting": {"hello"}}
+    """
+
+    def __init__(self):
+        self._groups = {}
+        self._lock = threading.Lock()
+        # Built lazily from _groups; reset to None whenever a list is (re)registered.
+        self._compiled = None
+
+    @property
+    def backend(self):
+        """Name of the matching backend in use: "aho-corasick" or "substring"."""
+        return "aho-corasick" if ahocorasick is not None else "substring"
+
+    def register(self, name, keywords, replace=False):
+        """
+        Register the keyword list called `name`.
+
+        Registering the same keywords under a name again is a no-op, so a condition can
+        re-register its list (e.g. when unpickled).
+
+        Args:
+            name (str): Name the hits are reported under.
+            keywords (iterable[str]): Keywords to match, case-insensitively.
+            replace (bool): Allow replacing a list already registered under `name`
+                            with different keywords.
+
+        Raises:
+            ValueError: If a keyword is empty, or `name` is taken by a different list
+                        and `replace` is False.
+        """
+        keywords = tuple(kw.lower() for kw in keywords)
+        if not keywords or not all(keywords):
+            raise ValueError(f"Keyword list {name!r} must contain non-empty keywords")
+        with self._lock:
+            existing = self._groups.get(name)
+            if existing == keywords:
+                return
+            if existing is not None and not replace:
+                raise ValueError(
+                    f"Keyword list {name!r} is already registered with different keywords; "
+                    "pick another name or pass replace=True"
+                )
+            self._groups[name] = keywords
+            self._compiled = None
+
+    def keywords(self, name):
+        """Return the (lowercased) keywords registered under `name`."""
+        return self._groups[name]
+
+    def scan(self, text, lowered=None):
+        """
+        Scan `text` once and report hits for every registered keyword list.
+
+        Args:
+            text (str): The text to scan.
+            lowered (str, optional): `text.lower()`, if the caller already has it.
+
+        Returns:
+            dict: Maps each list name with at least one hit to the set of its keywords
+                  found in the text. Lists without hits are absent. Treat as read-only;
+                  AnalysisContext shares it between the conditions of a response.
+        """
+        owners, automaton, keywords = self._compile()
+        if lowered is None:
+            lowered = text.lower()
+        if automaton is not None:
+            found = {keywords[i] for _, i in automaton.iter(lowered)}
+        else:
+            found = [kw for kw in owners if kw in lowered]
+        hits = {}
+        for kw in found:
+            for name in owners[kw]:
+                hits.setdefault(name, set()).add(kw)
+        return hits
+
+    def matches(self, name, text):
+        """Return True if any keyword registered under `name` occurs in `text`."""
+        return name in self.scan(text)
+
+    def count(self, name, text):
+        """Return how many distinct keywords registered under `name` occur in `text`."""
+        return len(self.scan(text).get(name, ()))
+
+    def __getstate__(self):
+        # Pickled with its compiled tables (see ai_callback.ruleset). The automaton is
+        # stored as bytes so an artifact still loads where pyahocorasick is missing.
+        owners, automaton, _ = self._compile()
+        return {
+            "groups": self._groups,
+            "owners": owners,
+            "automaton": pickle.dumps(automaton) if automaton is not None else None,
+        }
+
+    def __setstate__(self, state):
+        self._groups = state["groups"]
+        self._lock = threading.Lock()
+        automaton = state["automaton"]
+        if automaton is not None:
+            automaton = pickle.loads(automaton) if ahocorasick is not None else None
+        if automaton is None and ahocorasick is not None and state["owners"]:
+            # Saved by the substring backend; build the automaton on first use.
+            self._compiled = None
+        else:
+            self._compiled = (state["owners"], automaton, tuple(state["owners"]))
+
+    def _compile(self):
+        compiled = self._compiled
+        if compiled is None:
+            with self._lock:
+                if self._compiled is None:
+                    owners = {}
+                    for name, keywords in self._groups.items():
+                        for kw in keywords:
+                            owners.setdefault(kw, []).append(name)
+                    keywords = tuple(owners)
+                    automaton = None
+                    if ahocorasick is not None and owners:
+                        # Values are indexes into `keywords`; an int automaton also
+                        # unpickles several times faster than one storing strings.
+                        automaton = ahocorasick.Automaton(ahocorasick.STORE_INTS)
+                        for i, kw in enumerate(keywords):
+                            automaton.add_word(kw, i)
+                        automaton.make_automaton()
+                    self._compiled = (owners, automaton, keywords)
+                compiled = self._compiled
+        return compiled
+
+
+# Engine shared by the stock conditions and by KeywordCondition instances.
+default_engine = KeywordEngine()
+
+
+class KeywordCondition:
+    """
+    A user-defined keyword condition matched in the same scan as the stock ones.
+
+    Instances are plain callables (`response -> bool`) and can be passed straight to
+    AICallback.add_rule. AICallback passes them an AnalysisContext instead (see
+    ai_callback.context) so they share one scan with the other conditions. They pickle
+    by name and keyword list, and re-register themselves into the default engine when
+    unpickled. A name already used by a different list, such as the stock "abuse" or
+    "greeting" lists, raises ValueError rather than changing the stock conditions.
+
+    Example usage:
+        detect_refund = KeywordCondition("refund", ["refund", "chargeback"])
+        callback.add_rule(detect_refund, add_refund_policy)
+    """
+
+    takes_context = True
+
+    def __init__(self, name, keywords, engine=None):
+        self.name = name
+        self.engine = engine if engine is not None else default_engine
+        self.engine.register(name, keywords)
+        self.__name__ = f"detect_{name}"
+
+    def __call__(self, response):
+        if isinstance(response, str):
+            return self.engine.matches(self.name, response)
+        return self.name in response.keyword_hits(self.engine)
+
+    @property
+    def window(self):
+        """Length of the longest keyword (see ai_callback.large)."""
+        return max(map(len, self.engine.keywords(self.name)))
+
+    def __reduce__(self):
+        return (KeywordCondition, (self.name, self.engine.keywords(self.name)))
+
+    def __repr__(self):
+        return f"KeywordCondition({self.name!r}, {list(self.engine.keywords(self.name))!r})"
@@ -0,0 +1,237 @@
+# ai_callback/large.py
+"""
+Bounded-memory processing of multi-megabyte responses.
+
+process() holds the response plus a lowercased copy for the conditions, and every
+firing action builds another full-size string. For code generation or document
+summaries of several MB, peak memory per request is then a multiple of the response
+size. AICallback.process_large(source, sink) instead reads the response in windows and
+writes the output to `sink` as it goes, so memory depends on the window size and not on
+the response.
+
+Each rule becomes a stage of a pipeline the text flows through, in scheduled order:
+- Its condition is evaluated on overlapping windows of the text reaching it, and it
+  holds if any window matches. A condition can only be evaluated this way if it
+  declares `window`: the longest text a single match can span (for keyword lists, the
+  longest keyword). Consecutive windows overlap by that much, and are cut at whitespace
+  where possible, so a match is never split across windows.
+- Its action must stream (see ai_callback.streaming). A `rewrite` action whose
+  pattern implies the rule's condition (Rule.rewrite) is applied as the text passes. An `appends` action adds its suffix at end of stream; the suffix is
+  taken from the action's output for the window where the condition first matched. A
+  `terminal` action is decided in a first pass over the source, which must then be
+  seekable. If it fires, only its output is written.
+
+The output is the same as process() for conditions whose matches stay inside
+`window` characters, and for appends actions whose suffix depends only on the window
+that matched (the stock disclaimers are constant). Rules that cannot be windowed, such
+as detect_question (reads the end of the text), detect_toxicity or append_weather_info,
+are rejected with ValueError. Run them with process() on a bounded excerpt instead.
+
+Example usage:
+    with open("summary.txt", encoding="utf-8") as src, open("out.txt", "w", encoding="utf-8") as dst:
+        callback.process_large(src, dst)
+"""
+import io
+import re
+
+from ai_callback.context import AnalysisContext
+from ai_callback.streaming import _RewriteStage
+
+# Characters per window; each stage holds about one window plus twice its overlap.
+DEFAULT_WINDOW = 1 << 16
+
+_SPACE = re.compile(r"\s")
+
+
+class _Scanner:
+    # Evaluates one rule's condition over overlapping windows of its input.
+
+    def __init__(self, rule, size):
+        self.condition = rule.condition
+        self.contextual = rule.contextual
+        self.size = size
+        self.overlap = rule.condition.window
+        self.buffer = ""
+        # Characters at the start of `buffer` that an evaluated window already covered.
+        self.seen = 0
+        self.fired = False
+        # The window the condition first matched in.
+        self.hit = None
+
+    def feed(self, text):
+        if self.fired:
+            return
+        self.buffer += text
+        self._scan(final=False)
+
+    def finish(self):
+        if not self.fired:
+            self._scan(final=True)
+
+    def _evaluate(self, window):
+        if self.condition(AnalysisContext(window) if self.contextual else window):
+            self.fired = True
+            self.hit = window
+            self.buffer = ""
+
+    def _scan(self, final):
+        size, overlap = self.size, self.overlap
+        limit = size + overlap
+        while not self.fired:
+            buffer = self.buffer
+            n = len(buffer)
+            if n <= limit:
+                if final and n > self.seen:
+                    self._evaluate(buffer)
+                return
+            # End the window at whitespace so a boundary never falls inside a word...
+            space = _SPACE.search(buffer, limit, limit + overlap)
+            if space is not None:
+                end = space.start()
+            elif n < limit + overlap and not final:
+                return
+            else:
+                end = limit
+            self._evaluate(buffer[:end])
+            if self.fired:
+                return
+            # ...and start the next one after whitespace, at most `overlap` before `size`.
+            # A match starting before `start` has at most `overlap` characters, so it
+            # ended inside the window just evaluated.
+            start = size
+            for space in _SPACE.finditer(buffer, max(1, size - overlap), size):
+                start = space.end()
+            self.buffer = buffer[start:]
+            self.seen = end - start
+
+
+class _Stage:
+    def __init__(self, rule, size):
+        self.rule = rule
+        self.scanner = _Scanner(rule, size)
+        self.rewrite = _RewriteStage(rule.rewrite) if rule.rewrite is not None else None
+        self.appends = not rule.terminal and rule.rewrite is None
+
+    def feed(self, text):
+        self.scanner.feed(text)
+        if self.rewrite is not None:
+            return self.rewrite.feed(text)
+        return text
+
+    def finish(self, text):
+        self.scanner.feed(text)
+        self.scanner.finish()
+        if self.rewrite is not None:
+            return self.rewrite.feed(text) + self.rewrite.flush()
+        if self.appends and self.scanner.fired:
+            hit = self.scanner.hit
+            output = self.rule.action(hit)
+            if not output.startswith(hit):
+                raise RuntimeError(f"Rule {self.rule.name!r}: action is marked appends but rewrote its input")
+            text += output[len(hit):]
+        return text
+
+
+def _check(rules):
+    for rule in rules:
+        if getattr(rule.condition, "window", None) is None:
+            raise ValueError(
+                f"Rule {rule.name!r} cannot be windowed: its condition declares no `window` "
+                "(the longest text one match can span)"
+            )
+        if not (rule.terminal or getattr(rule.action, "appends", False) or rule.rewrite is not None):
+            raise ValueError(
+                f"Rule {rule.name!r} cannot be streamed: its action declares no appends, and no "
+                "rewrite whose pattern implies the rule's condition"
+            )
+
+
+def _chunks(source, size):
+    while True:
+        chunk = source.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _first_terminal(stages, final):
+    # The first terminal stage that fired, once no terminal stage before it can still fire.
+    for stage in stages:
+        if stage.rule.terminal:
+            if stage.scanner.fired:
+                return stage
+            if not final:
+                return None
+    return None
+
+
+def _terminal_pass(rules, source, size):
+    # First pass over the rules up to the last terminal one, writing nothing. Returns the
+    # terminal stage that decides the output, or None.
+    last = max(i for i, rule in enumerate(rules) if rule.terminal)
+    stages = [_Stage(rule, size) for rule in rules[:last + 1]]
+    for chunk in _chunks(source, size):
+        for stage in stages:
+            chunk = stage.feed(chunk)
+            if not chunk:
+                break
+        stage = _first_terminal(stages, final=False)
+        if stage is not None:
+            return stage
+    pending = ""
+    for stage in stages:
+        pending = stage.finish(pending)
+    return _first_terminal(stages, final=True)
+
+
+def process_large(callback, source, sink, window=DEFAULT_WINDOW):
+    """
+    Run a large response from `source` through the callback's rules into `sink`.
+
+    See the module docstring for which rules qualify.
+
+    Args:
+        callback (AICallback): The configured callback.
+        source (str or file): The response text, or a text file object to read it from.
+        sink (file): Anything with write(str): a file, socket.makefile("w"), sys.stdout...
+        window (int): Characters per window.
+
+    Returns:
+        list[str]: Names of the rules that fired, in scheduled order.
+
+    Raises:
+        ValueError: If a rule cannot be windowed or streamed, window is below 1, or a
+                    terminal rule needs a second pass over a non-seekable source.
+    """
+    if window < 1:
+        raise ValueError("window must be at least 1")
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    rules = list(callback._scheduled_rules())
+    _check(rules)
+
+    if any(rule.terminal for rule in rules):
+        if not source.seekable():
+            raise ValueError("Terminal rules need a seekable source (a file or str) for the first pass")
+        start = source.tell()
+        stage = _terminal_pass(rules, source, window)
+        if stage is not None:
+            sink.write(stage.rule.action(stage.scanner.hit))
+            return [stage.rule.name]
+        source.seek(start)
+        rules = [rule for rule in rules if not rule.terminal]
+
+    stages = [_Stage(rule, window) for rule in rules]
+    for chunk in _chunks(source, window):
+        for stage in stages:
+            chunk = stage.feed(chunk)
+            if not chunk:
+                break
+        else:
+            sink.write(chunk)
+    pending = ""
+    for stage in stages:
+        pending = stage.finish(pending)
+    if pending:
+        sink.write(pending)
+    return [stage.rule.name for stage in stages if stage.scanner.fired]
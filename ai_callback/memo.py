@@ -0,0 +1,226 @@
+# ai_callback/memo.py
+"""
+Content-addressed memoization for AICallback.
+
+Repeated responses (canned greetings, retries, identical cached completions) do
+not need the rules run again. With AICallback(memo=True):
+
+- process() looks up its final output by (rule-set identity, hash of the response);
+  any change to the rule set (add_rule) starts from a new identity;
+- expensive conditions (declared `cost` >= Memo.min_cost, such as detect_toxicity)
+  cache their result per text, in every processing path including process_batch
+  and process_async, and across rule sets sharing the same Memo;
+- callables marked `deterministic = False` (append_time_taken, append_weather_info)
+  are never cached, and an output they contributed to is not stored, so such rules
+  keep running on every call.
+
+Keys are 128-bit BLAKE2b digests of the text. Both caches are bounded LRUs with an
+optional TTL and keep hit/miss counters (Memo.stats()). An output cache hit skips the
+rules entirely, so it shows up in neither per-rule metrics nor request spans.
+"""
+import hashlib
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+from ai_callback.rules import DEFAULT_COST
+
+_MISSING = object()
+
+# Per-thread record of whether a non-deterministic callable ran during process().
+_local = threading.local()
+
+
+def content_key(text):
+    """Return a 16-byte BLAKE2b digest identifying `text`."""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with an optional per-entry TTL and hit/miss counters.
+
+    Args:
+        max_entries (int): Entries kept before the least recently used is evicted.
+        ttl (float, optional): Seconds an entry stays valid; None keeps it until evicted.
+        clock (callable): Monotonic time source, injectable for tests.
+    """
+
+    def __init__(self, max_entries=10_000, ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or self.clock() - entry[0] < self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # Entries and the lock stay in this process; a copy starts empty.
+        return {"max_entries": self.max_entries, "ttl": self.ttl, "clock": self.clock}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class Memo:
+    """
+    Memo layer for one or more AICallbacks (see module docstring).
+
+    Args:
+        max_entries (int): Capacity of each of the output and condition caches.
+        ttl (float, optional): Seconds a cached result stays valid.
+        min_cost (float): Conditions declaring at least this `cost` (seconds) are cached.
+        clock (callable): Monotonic time source, injectable for tests.
+
+    Example usage:
+        callback = AICallback(memo=Memo(max_entries=50_000, ttl=3600))
+        ...
+        callback.memo.stats()  # {"outputs": {"hits": ..., ...}, "conditions": {...}}
+    """
+
+    def __init__(self, max_entries=10_000, ttl=None, min_cost=1e-3, clock=time.monotonic):
+        self.outputs = LRUCache(max_entries, ttl, clock)
+        self.conditions = LRUCache(max_entries, ttl, clock)
+        self.min_cost = min_cost
+
+    def wrap(self, rule):
+        """Install the caching / bypass wrappers on a newly added Rule."""
+        condition = rule.condition
+        if not _is_async(condition):
+            if not getattr(condition, "deterministic", True):
+                rule.condition = _Volatile(condition)
+            elif getattr(condition, "cost", DEFAULT_COST) >= self.min_cost:
+                rule.condition = _MemoCondition(condition, self.conditions)
+        if not getattr(rule.action, "deterministic", True) and not _is_async(rule.action):
+            rule.action = _Volatile(rule.action)
+
+    def process(self, callback, response):
+        """Return the cached output of `callback` for `response`, or compute and store it."""
+        key = (callback._ruleset_token, content_key(response))
+        output = self.outputs.get(key, _MISSING)
+        if output is not _MISSING:
+            return output
+        outer = getattr(_local, "tainted", False)
+        _local.tainted = False
+        try:
+            output = callback._process(response)
+            tainted = _local.tainted
+        finally:
+            _local.tainted = outer or _local.tainted
+        if not tainted:
+            self.outputs.put(key, output)
+        return output
+
+    def stats(self):
+        """
+        Returns:
+            dict: {"outputs": ..., "conditions": ...}, each with entries, hits, misses,
+                  evictions and hit_rate.
+        """
+        return {"outputs": self.outputs.stats(), "conditions": self.conditions.stats()}
+
+    def clear(self):
+        self.outputs.clear()
+        self.conditions.clear()
+
+
+class _Wrapper:
+    # Forwards attribute lookups (cost, reads, appends, ...) to the wrapped callable.
+
+    def __init__(self, fn):
+        self.__wrapped__ = fn
+        self.__name__ = getattr(fn, "__name__", type(fn).__name__)
+        self.__doc__ = getattr(fn, "__doc__", None)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.__wrapped__, name)
+
+
+class _MemoCondition(_Wrapper):
+    # Caches an expensive condition's result per text.
+
+    def __init__(self, condition, cache):
+        super().__init__(condition)
+        self.cache = cache
+
+    def __call__(self, response):
+        # `response` is an AnalysisContext when the condition takes one.
+        key = (self.__wrapped__, content_key(getattr(response, "text", response)))
+        result = self.cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = self.__wrapped__(response)
+            self.cache.put(key, result)
+        return result
+
+    def batch(self, responses, batch_size=32):
+        keys = [(self.__wrapped__, content_key(r)) for r in responses]
+        results = [self.cache.get(key, _MISSING) for key in keys]
+        # Misses, one index per distinct text, so duplicates within a batch run once.
+        todo = {}
+        for i, result in enumerate(results):
+            if result is _MISSING:
+                todo.setdefault(keys[i], i)
+        if todo:
+            batch_fn = getattr(self.__wrapped__, "batch", None)
+            texts = [responses[i] for i in todo.values()]
+            fresh = batch_fn(texts, batch_size) if batch_fn is not None else [self.__wrapped__(t) for t in texts]
+            computed = dict(zip(todo, fresh))
+            for key, result in computed.items():
+                self.cache.put(key, result)
+            results = [computed[key] if result is _MISSING else result for key, result in zip(keys, results)]
+        return results
+
+
+class _Volatile(_Wrapper):
+    # Marks the current process() call as uncacheable whenever the callable runs.
+
+    def __call__(self, response):
+        _local.tainted = True
+        return self.__wrapped__(response)
+
+
+def _is_async(fn):
+    return inspect.iscoroutinefunction(fn) or inspect.iscoroutinefunction(getattr(fn, "__call__", None))
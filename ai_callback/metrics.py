@@ -0,0 +1,229 @@
+# ai_callback/metrics.py
+"""
+Per-rule metrics for AICallback: condition/action latency, how often each rule
+is evaluated and fires, and how many characters its action adds or removes.
+
+Enable with AICallback(metrics=True); with metrics off the processing loop runs
+no instrumentation code at all. To stay within a couple of percent of the cost of
+cheap keyword rules:
+- counts and sizes are exact; in process() evaluations are derived from the number
+  of calls and where terminal rules stopped them, so a rule that does not fire
+  costs nothing extra;
+- latencies are sampled: process() times one call in every `sample_every`
+  (process_batch and process_async time every call, their overhead is negligible;
+  process_async counts only the condition results it uses, not discarded speculative
+  evaluations);
+- histograms use power-of-two nanosecond buckets (`int.bit_length` picks the bucket);
+- updates are plain attribute increments without a lock. Under the GIL they are not
+  interrupted in practice; elsewhere an occasional concurrent update may be lost.
+"""
+
+# Bucket i holds observations with ns.bit_length() == i, i.e. ns < 2**i.
+_BUCKETS = 40
+
+# Upper bounds exported to Prometheus: 2**10 ns (~1us) to 2**36 ns (~69s), in 4x steps.
+_EXPORT_BITS = tuple(range(10, 37, 2))
+
+
+class Histogram:
+    """Latency histogram with power-of-two nanosecond buckets."""
+
+    __slots__ = ("counts", "count", "sum_ns")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.sum_ns = 0
+
+    def observe(self, ns):
+        self.counts[min(ns.bit_length(), _BUCKETS - 1)] += 1
+        self.count += 1
+        self.sum_ns += ns
+
+    def quantile(self, q):
+        """Approximate quantile in seconds (upper bound of the bucket holding it)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bits, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return (1 << bits) / 1e9
+        return (1 << (_BUCKETS - 1)) / 1e9
+
+    def snapshot(self):
+        counts = list(self.counts)
+        cumulative = []
+        seen = 0
+        bits_iter = iter(_EXPORT_BITS)
+        bits = next(bits_iter)
+        for i, n in enumerate(counts):
+            while bits is not None and i > bits:
+                cumulative.append(((1 << bits) / 1e9, seen))
+                bits = next(bits_iter, None)
+            seen += n
+        while bits is not None:
+            cumulative.append(((1 << bits) / 1e9, seen))
+            bits = next(bits_iter, None)
+        return {
+            "count": sum(counts),
+            "sum_seconds": self.sum_ns / 1e9,
+            "p50_seconds": self.quantile(0.5),
+            "p99_seconds": self.quantile(0.99),
+            "buckets": cumulative,
+        }
+
+
+class RuleStats:
+    """Counters and latency histograms for one rule."""
+
+    __slots__ = ("condition", "action", "evaluations", "hits", "chars_added", "chars_removed", "stops")
+
+    def __init__(self):
+        self.condition = Histogram()
+        self.action = Histogram()
+        self.evaluations = 0
+        self.hits = 0
+        self.chars_added = 0
+        self.chars_removed = 0
+        # Times this (terminal) rule ended a process() call since Metrics last folded
+        # the derived evaluation counts in.
+        self.stops = 0
+
+    def fired(self, delta):
+        self.hits += 1
+        if delta > 0:
+            self.chars_added += delta
+        elif delta < 0:
+            self.chars_removed -= delta
+
+    def record(self, condition_ns, action_ns=None, delta=0):
+        # One fully timed evaluation, from process_batch / process_async.
+        self.evaluations += 1
+        self.condition.observe(condition_ns)
+        if action_ns is not None:
+            self.action.observe(action_ns)
+            self.fired(delta)
+
+
+class Metrics:
+    """
+    Metrics of one AICallback: snapshot and Prometheus export of its rules' stats.
+
+    Args:
+        sample_every (int): process() times the conditions and actions of one call in
+                            every `sample_every`; 1 times every call.
+
+    Example usage:
+        callback = AICallback(metrics=True)  # or metrics=Metrics(sample_every=1)
+        ...
+        callback.metrics.snapshot()["detect_abuse"]["hits"]
+        print(callback.metrics.prometheus())
+    """
+
+    def __init__(self, sample_every=16):
+        self.sample_every = max(1, int(sample_every))
+        # process() calls since the last fold; AICallback.process increments it inline.
+        self.calls = 0
+        self._callback = None
+
+    def bind(self, callback):
+        if self._callback is not None and self._callback is not callback:
+            raise ValueError("Metrics instance is already bound to another AICallback")
+        self._callback = callback
+
+    def fold(self, order):
+        """
+        Move the derived process() evaluation counts into the rules' own counters.
+
+        Called before the execution order changes, since the derivation depends on it.
+        """
+        for rule, evaluations in zip(order, list(self._derived(order))):
+            rule.stats.evaluations = evaluations
+            rule.stats.stops = 0
+        self.calls = 0
+
+    def _derived(self, order):
+        # A process() call evaluates a rule unless a terminal rule ahead of it stopped it.
+        remaining = self.calls
+        for rule in order:
+            yield rule.stats.evaluations + remaining
+            remaining -= rule.stats.stops
+
+    def _labelled_rules(self):
+        # Rule names label the series; repeated names get a "#n" suffix.
+        seen = {}
+        for rule in self._callback.rules:
+            n = seen.get(rule.name, 0) + 1
+            seen[rule.name] = n
+            yield (rule.name if n == 1 else f"{rule.name}#{n}"), rule
+
+    def snapshot(self):
+        """
+        Return a point-in-time copy of all rule metrics.
+
+        Returns:
+            dict: rule name -> {"evaluations", "hits", "chars_added", "chars_removed",
+                  "condition", "action"}, where the last two are histogram summaries with
+                  count, sum, p50/p99 and cumulative (upper bound seconds, count) buckets
+                  over the sampled calls.
+        """
+        order = self._callback._order or []
+        evaluations = {id(rule): n for rule, n in zip(order, self._derived(order))}
+        out = {}
+        for label, rule in self._labelled_rules():
+            stats = rule.stats
+            out[label] = {
+                "evaluations": evaluations.get(id(rule), stats.evaluations),
+                "hits": stats.hits,
+                "chars_added": stats.chars_added,
+                "chars_removed": stats.chars_removed,
+                "condition": stats.condition.snapshot(),
+                "action": stats.action.snapshot(),
+            }
+        return out
+
+    def prometheus(self, prefix="ai_callback"):
+        """
+        Render all rule metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): Metric name prefix.
+
+        Returns:
+            str: Exposition text, ready to serve from a /metrics endpoint.
+        """
+        snap = self.snapshot()
+        lines = []
+        for kind, help_text in (
+            ("condition", "Sampled time spent evaluating a rule's condition."),
+            ("action", "Sampled time spent running a rule's action."),
+        ):
+            name = f"{prefix}_rule_{kind}_seconds"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for label, data in snap.items():
+                rule = _escape(label)
+                hist = data[kind]
+                for le, count in hist["buckets"]:
+                    lines.append(f'{name}_bucket{{rule="{rule}",le="{le:.9g}"}} {count}')
+                lines.append(f'{name}_bucket{{rule="{rule}",le="+Inf"}} {hist["count"]}')
+                lines.append(f'{name}_sum{{rule="{rule}"}} {hist["sum_seconds"]:.9g}')
+                lines.append(f'{name}_count{{rule="{rule}"}} {hist["count"]}')
+        for key, help_text in (
+            ("evaluations", "Times a rule's condition was evaluated."),
+            ("hits", "Times a rule's condition matched and its action ran."),
+            ("chars_added", "Characters added to responses by a rule's action."),
+            ("chars_removed", "Characters removed from responses by a rule's action."),
+        ):
+            name = f"{prefix}_rule_{key}_total"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for label, data in snap.items():
+                lines.append(f'{name}{{rule="{_escape(label)}"}} {data[key]}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,131 @@
+# ai_callback/models.py
+"""
+Lazy, thread-safe registry for the ML models used by model-backed conditions.
+
+Models are registered as zero-argument factories and only built the first time
+someone asks for them, so importing the rule library stays cheap for users who
+only need the keyword and regex conditions.
+"""
+import contextlib
+import os
+import threading
+
+# name -> zero-argument callable that builds the model
+_FACTORIES = {}
+# name -> loaded model instance
+_MODELS = {}
+_LOCK = threading.Lock()
+
+
+def _reset_lock_after_fork():
+    # A thread of the parent may have held the lock at fork time; the child starts clean.
+    global _LOCK
+    _LOCK = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_lock_after_fork)
+
+
+def register_model(name, factory):
+    """
+    Register (or replace) the factory used to build the model called `name`.
+
+    Replacing a factory drops any instance that was already loaded, which makes it
+    easy to swap in a local stub for offline runs.
+
+    Args:
+        name (str): Registry key, e.g. "toxicity".
+        factory (callable): Zero-argument function returning the loaded model.
+
+    Example usage:
+        register_model("toxicity", lambda: my_stub_pipeline)
+    """
+    with _LOCK:
+        _FACTORIES[name] = factory
+        _MODELS.pop(name, None)
+
+
+def get_model(name):
+    """
+    Return the model called `name`, loading it on first use.
+
+    Loading happens at most once per process, even when several threads ask for
+    the same model at the same time.
+
+    Args:
+        name (str): Registry key of a registered model.
+
+    Returns:
+        The loaded model instance.
+
+    Raises:
+        KeyError: If no factory was registered under `name`.
+    """
+    model = _MODELS.get(name)
+    if model is not None:
+        return model
+    with _LOCK:
+        model = _MODELS.get(name)
+        if model is None:
+            if name not in _FACTORIES:
+                raise KeyError(f"No model registered under {name!r}")
+            model = _FACTORIES[name]()
+            _MODELS[name] = model
+    return model
+
+
+@contextlib.contextmanager
+def override_model(name, model):
+    """
+    Serve `model` under `name` inside a with block, then restore the previous state.
+
+    The factory and the loaded instance that were registered before (if any) are put
+    back on exit, so tests and one-off runs can swap in a stub without leaking it.
+
+    Args:
+        name (str): Registry key, e.g. "toxicity".
+        model: The instance get_model(name) returns inside the block.
+
+    Example usage:
+        with override_model("toxicity", my_stub_pipeline):
+            detect_toxicity("...")
+    """
+    with _LOCK:
+        previous = (_FACTORIES.get(name), _MODELS.get(name))
+        _FACTORIES[name] = lambda: model
+        _MODELS[name] = model
+    try:
+        yield model
+    finally:
+        factory, loaded = previous
+        with _LOCK:
+            for table, value in ((_FACTORIES, factory), (_MODELS, loaded)):
+                if value is None:
+                    table.pop(name, None)
+                else:
+                    table[name] = value
+
+
+def is_loaded(name):
+    """Return True if the model called `name` has already been built."""
+    return name in _MODELS
+
+
+def warm_up(*names):
+    """
+    Eagerly load the given models (or every registered model if none are given).
+
+    Call this in the parent process before forking workers (gunicorn `preload_app`,
+    multiprocessing with the "fork" start method, ...) so the weights are loaded
+    once and shared copy-on-write by every child instead of being loaded per worker.
+
+    Args:
+        *names (str): Registry keys to load. Defaults to all registered models.
+
+    Example usage:
+        import ai_callback.conditions  # registers "toxicity"
+        warm_up("toxicity")
+    """
+    for name in names or tuple(_FACTORIES):
+        get_model(name)
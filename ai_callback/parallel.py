@@ -0,0 +1,167 @@
+# ai_callback/parallel.py
+"""
+Process-pool execution of AICallback.process, for CPU-bound rule sets such as
+detect_toxicity that a single Python process cannot spread over many cores.
+
+Each worker process holds its own copy of the callback and of any models its
+rules use. With the "fork" start method (the default where available) the models
+are loaded once in the parent before the workers are forked, so their weights are
+shared copy-on-write instead of loaded per worker; with "spawn" the callback is
+pickled to each worker, which loads the models at startup.
+
+Conditions declare the models they need in a `models` attribute, e.g.
+`detect_toxicity.models = ("toxicity",)` (names in the ai_callback.models registry).
+"""
+import multiprocessing
+import os
+import pickle
+import sys
+
+from ai_callback.models import warm_up
+
+# The callback of the current worker process, set by the pool initializer.
+_worker_callback = None
+
+
+def required_models(callback):
+    """Return the registry names of the models used by the callback's rules, in order."""
+    names = []
+    for rule in callback.rules:
+        for name in (*getattr(rule.condition, "models", ()), *getattr(rule.action, "models", ())):
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def _init_worker(callback, models, threads):
+    global _worker_callback
+    _worker_callback = callback
+    # Several workers each running a full-width intra-op thread pool would oversubscribe
+    # the cores. Only touch torch if a model already imported it.
+    torch = sys.modules.get("torch")
+    if torch is not None and threads:
+        torch.set_num_threads(threads)
+    # No-op after fork (already loaded in the parent); loads the models under spawn.
+    if models:
+        warm_up(*models)
+
+
+def _process_one(response):
+    return _worker_callback.process(response)
+
+
+def _apply_one(fn, item):
+    return fn(_worker_callback, item)
+
+
+class CallbackPool:
+    """
+    Shards AICallback.process calls over a pool of worker processes.
+
+    Args:
+        callback (AICallback): The configured callback; rules are fixed once the pool starts.
+        workers (int, optional): Number of worker processes. Defaults to os.cpu_count().
+        chunksize (int): Responses sent to a worker per round trip.
+        preload (bool): Load the rules' models before starting the workers (in the parent
+                        under "fork", so they are shared copy-on-write).
+        threads_per_worker (int): torch intra-op threads per worker; None leaves it alone.
+        start_method (str, optional): multiprocessing start method. Defaults to "fork"
+                                      where available, else the platform default.
+
+    Raises:
+        TypeError: If the start method has to pickle the callback and one of its rules
+                   cannot be pickled (lambdas, closures, ...).
+
+    Example usage:
+        with CallbackPool(callback, workers=8) as pool:
+            outputs = pool.map(responses)  # same as [callback.process(r) for r in responses]
+    """
+
+    def __init__(self, callback, workers=None, chunksize=16, preload=True, threads_per_worker=1,
+                 start_method=None):
+        if start_method is None and "fork" in multiprocessing.get_all_start_methods():
+            start_method = "fork"
+        context = multiprocessing.get_context(start_method)
+        models = required_models(callback)
+        if context.get_start_method() != "fork":
+            _check_picklable(callback)
+        if preload and models:
+            warm_up(*models)
+        self.chunksize = chunksize
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = context.Pool(
+            self.workers,
+            initializer=_init_worker,
+            initargs=(callback, models if preload else (), threads_per_worker),
+        )
+
+    def imap(self, responses):
+        """
+        Lazily process `responses`, yielding outputs in input order as they complete.
+
+        Args:
+            responses (iterable[str]): The LLM-generated texts.
+
+        Yields:
+            str: callback.process(response) for each response, in input order.
+        """
+        return self._pool.imap(_process_one, responses, self.chunksize)
+
+    def map(self, responses):
+        """
+        Process `responses` and return the outputs as a list, in input order.
+
+        Args:
+            responses (iterable[str]): The LLM-generated texts.
+
+        Returns:
+            list[str]: callback.process(response) for each response.
+        """
+        return list(self.imap(responses))
+
+    def apply_async(self, fn, item):
+        """
+        Run fn(callback, item) in a worker, where callback is the worker's copy.
+
+        Unlike imap, nothing is queued until called, so the caller controls how much
+        work is in flight.
+
+        Args:
+            fn (callable): A picklable (module-level) function.
+            item: Its picklable argument.
+
+        Returns:
+            multiprocessing.pool.AsyncResult: `.get()` returns fn's result.
+        """
+        return self._pool.apply_async(_apply_one, (fn, item))
+
+    def close(self):
+        """Let the workers finish outstanding work and exit."""
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self):
+        """Stop the workers immediately."""
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+
+def _check_picklable(callback):
+    # Name the offending rule instead of failing later inside a worker.
+    for rule in callback.rules:
+        try:
+            pickle.dumps(rule)
+        except Exception as e:
+            raise TypeError(
+                f"Rule {rule.name!r} cannot be pickled for worker processes ({e}); "
+                "use module-level functions or picklable callables"
+            ) from e
@@ -0,0 +1,160 @@
+# ai_callback/patterns.py
+"""
+Precompiled regexes shared by the PII, URL, citation and weather rules.
+
+Every pattern is compiled once, at import time, and run on its own: the boolean
+detectors ask whether one pattern occurs (`re.search`, which stops at the first
+match), and spans are only collected for the callers that need positions. An
+AnalysisContext caches both per response, so several rules asking about the same
+pattern share one search.
+
+Patterns are written so matching stays linear in the size of the text: unbounded
+repeats that could be restarted at many positions (email parts, URL bodies) carry
+an upper bound, and `\\d{4}.*found that` is split into two patterns combined by the
+citation rule rather than matched with `.*`.
+"""
+import bisect
+import re
+
+# Length caps of the unbounded parts of the email and URL patterns: the RFC 5321
+# limits for an email's local part and domain, the DNS label limit for its top-level
+# domain, and the usual 2048-character URL limit.
+EMAIL_LOCAL_MAX = 64
+EMAIL_DOMAIN_MAX = 255
+EMAIL_TLD_MAX = 63
+URL_BODY_MAX = 2048
+
+PATTERNS = {
+    # PII.
+    "email": rf"\b[A-Za-z0-9._%+-]{{1,{EMAIL_LOCAL_MAX}}}@[A-Za-z0-9.-]{{1,{EMAIL_DOMAIN_MAX}}}"
+             rf"\.[A-Z|a-z]{{2,{EMAIL_TLD_MAX}}}\b",
+    "phone": r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b",
+    "ssn": r"\b\d{3}-?\d{2}-?\d{4}\b",
+    "credit_card": r"\b\d{4}[-. ]?\d{4}[-. ]?\d{4}[-. ]?\d{4}\b",
+    # Same character set as the original alternation ('%xx' escapes are already
+    # covered by the $-_ range), as one class so matching cannot backtrack.
+    "url": rf"https?://[a-zA-Z0-9$-_@.&+!*\\(),]{{1,{URL_BODY_MAX}}}",
+    # Citation cues (case-insensitive).
+    "research_shows": r"(?i:research shows)",
+    "studies_indicate": r"(?i:studies indicate)",
+    "according_to": r"(?i:according to .{3,30})",
+    "scientists_discovered": r"(?i:scientists discovered)",
+    "year": r"\d{4}",
+    "found_that": r"(?i:found that)",
+    # "weather in X" / "climate in X" with a capitalized location.
+    "weather": r"(?:weather|climate)\s+(?:in\s+)?[A-Z][a-z]+",
+}
+
+# Longest text a single match of the PII and URL patterns can cover.
+MAX_MATCH_LENGTH = {
+    "email": EMAIL_LOCAL_MAX + len("@") + EMAIL_DOMAIN_MAX + len(".") + EMAIL_TLD_MAX,
+    "phone": len("123-456-7890"),
+    "ssn": len("123-45-6789"),
+    "credit_card": len("1234-5678-9012-3456"),
+    "url": len("https://") + URL_BODY_MAX,
+}
+
+
+class RegexSet:
+    """
+    A fixed set of named patterns, each compiled once and matched on demand.
+
+    Example usage:
+        regex_set = RegexSet({"digits": r"\\d+", "word": r"[a-z]+"})
+        regex_set.matches("digits", "ab 12")  # Returns: True
+        regex_set.spans("digits", "ab 12")    # Returns: [(3, 5)]
+    """
+
+    def __init__(self, patterns):
+        self.names = tuple(patterns)
+        self.patterns = {name: re.compile(body) for name, body in patterns.items()}
+
+    def __getstate__(self):
+        # Pickled as sources and flags; compiled again when loaded.
+        return {"names": self.names,
+                "patterns": {name: (p.pattern, p.flags) for name, p in self.patterns.items()}}
+
+    def __setstate__(self, state):
+        self.names = state["names"]
+        self.patterns = {name: re.compile(source, flags) for name, (source, flags) in state["patterns"].items()}
+
+    def search(self, name, text):
+        """Return the first match of pattern `name` in `text`, or None."""
+        return self.patterns[name].search(text)
+
+    def matches(self, name, text):
+        """Return True if pattern `name` occurs in `text`."""
+        return self.patterns[name].search(text) is not None
+
+    def spans(self, name, text):
+        """Return the (start, end) spans of the non-overlapping matches of pattern `name` in `text`."""
+        return [m.span() for m in self.patterns[name].finditer(text)]
+
+    def any(self, names, text):
+        """Return True if any of the patterns in `names` matches `text`."""
+        return any(self.patterns[name].search(text) is not None for name in names)
+
+    def scan(self, text):
+        """
+        Find every match of every pattern in `text`.
+
+        Runs every pattern over the whole text; prefer matches() or spans() for the
+        patterns you need.
+
+        Returns:
+            dict: Maps each pattern name with at least one match to its spans, as
+                  returned by spans().
+        """
+        found = {}
+        for name in self.names:
+            spans = self.spans(name, text)
+            if spans:
+                found[name] = spans
+        return found
+
+
+# Set used by the stock conditions and actions.
+default_regex_set = RegexSet(PATTERNS)
+
+
+def year_before_found_that(text, years=None, found_that=None):
+    """
+    Return True if `text` matches `\\d{4}.*found that` (case-insensitive).
+
+    Equivalent to the regex, but answered from the "year" and "found_that" spans in
+    linear time: some four-digit run must end before a "found that" on the same line.
+
+    Args:
+        text (str): The text the spans were taken from.
+        years (list, optional): default_regex_set.spans("year", text).
+        found_that (list, optional): default_regex_set.spans("found_that", text).
+    """
+    if found_that is None:
+        found_that = default_regex_set.spans("found_that", text)
+    if not found_that:
+        return False
+    if years is None:
+        years = default_regex_set.spans("year", text)
+    if not years:
+        return False
+    year_starts = [start for start, _ in years]
+    for start, _ in found_that:
+        line_start = text.rfind("\n", 0, start) + 1
+        i = bisect.bisect_left(year_starts, line_start)
+        if i < len(year_starts) and year_starts[i] + 4 <= start:
+            return True
+    return False
+
+
+def first_weather_location(text):
+    """
+    Return the location of the first "weather in X" / "climate in X" mention, or None.
+
+    Args:
+        text (str): The text to inspect.
+    """
+    match = default_regex_set.search("weather", text)
+    if match is None:
+        return None
+    # The match always ends with the capitalized location, preceded by whitespace.
+    return match.group().split()[-1]
@@ -0,0 +1,151 @@
+# ai_callback/rules.py
+"""
+Rule metadata and the cost-aware scheduler used by AICallback.
+
+Each registered rule carries:
+- cost: estimated seconds to evaluate the condition and, when it fires, run the action;
+- terminal: the action's output does not depend on its input (like redact_entire_text),
+  so once it fires nothing else needs to run;
+- reads / writes: names of the parts of the text the condition reads and the action
+  writes. The stock names are "body" (the generated text) and "suffix" (annotations
+  appended after it); EVERYTHING means the whole text.
+
+Defaults come from attributes on the callables (`condition.cost`, `action.cost`,
+`action.terminal`, `condition.reads`, `action.writes`; actions marked `appends` write
+"suffix") and can be overridden per rule in AICallback.add_rule. Without declarations
+a rule reads and writes everything, which keeps it in declared order relative to every
+other rule.
+"""
+import heapq
+
+from ai_callback.metrics import RuleStats
+
+EVERYTHING = frozenset({"*"})
+
+# Assumed cost of a condition that does not declare one (a cheap keyword check).
+DEFAULT_COST = 1e-5
+
+
+class Rule:
+    """
+    A registered condition–action pair plus its scheduling metadata.
+
+    Unpacks like the (condition, action) tuples AICallback.rules used to hold:
+        for condition, action in callback.rules: ...
+    """
+
+    def __init__(self, condition, action, name=None, cost=None, terminal=None, reads=None, writes=None,
+                 optional=None):
+        self.condition = condition
+        self.action = action
+        self.name = name or _callable_name(condition)
+        if cost is None:
+            cost = getattr(condition, "cost", DEFAULT_COST) + getattr(action, "cost", 0.0)
+        self.cost = cost
+        self.terminal = bool(getattr(action, "terminal", False) if terminal is None else terminal)
+        if optional is None:
+            optional = getattr(action, "optional", False) or getattr(condition, "optional", False)
+        # May be skipped when a process() call runs out of budget (see ai_callback.budget).
+        self.optional = bool(optional)
+        self.reads = _resources(getattr(condition, "reads", None) if reads is None else reads)
+        if writes is None:
+            # Append-only actions (see ai_callback.streaming) only write the suffix.
+            writes = getattr(action, "writes", None)
+            if writes is None and getattr(action, "appends", False):
+                writes = ("suffix",)
+        self.writes = _resources(writes)
+        # The action's streaming Rewrite (see ai_callback.streaming), if a match of its
+        # pattern implies this rule's condition; only then can it be applied before the
+        # condition is known.
+        rewrite = getattr(action, "rewrite", None)
+        self.rewrite = rewrite if rewrite is not None and condition in rewrite.implies else None
+        # The condition takes the shared AnalysisContext instead of the string.
+        self.contextual = bool(getattr(condition, "takes_context", False))
+        # Only updated when the owning AICallback has metrics enabled.
+        self.stats = RuleStats()
+
+    def __iter__(self):
+        return iter((self.condition, self.action))
+
+    def __repr__(self):
+        return f"Rule({self.name!r}, cost={self.cost}, terminal={self.terminal})"
+
+
+def _callable_name(fn):
+    return getattr(fn, "__name__", None) or type(fn).__name__
+
+
+def _resources(names):
+    if names is None:
+        return EVERYTHING
+    return frozenset(names)
+
+
+def _overlap(a, b):
+    return bool(a & b) or (bool(a) and "*" in b) or (bool(b) and "*" in a)
+
+
+def _must_precede(first, second):
+    # Whether `first` (registered earlier) has to run before `second`.
+    if first.terminal and second.terminal:
+        # If both would fire, the earlier one decides the output.
+        return True
+    if first.terminal:
+        # Once `first` fires its output stands regardless of what ran before it, so
+        # `second` only has to wait if it writes something `first`'s condition reads.
+        return _overlap(second.writes, first.reads)
+    if second.terminal:
+        return _overlap(first.writes, second.reads)
+    return (
+        _overlap(first.writes, second.reads)
+        or _overlap(first.reads, second.writes)
+        or _overlap(first.writes, second.writes)
+    )
+
+
+def schedule(rules):
+    """
+    Order `rules` for execution without changing the result of declared-order processing.
+
+    Only orders compatible with the read/write dependencies are considered. Among the
+    rules that are free to run next, terminal rules go first (if one fires, everything
+    else is skipped), then the rules a terminal rule is waiting on, then the rest,
+    cheapest first; ties keep declared order.
+
+    Args:
+        rules (list[Rule]): Rules in declared order.
+
+    Returns:
+        list[Rule]: The same rules in execution order.
+    """
+    n = len(rules)
+    preds = [[i for i in range(j) if _must_precede(rules[i], rules[j])] for j in range(n)]
+
+    feeds_terminal = set()
+    stack = [j for j in range(n) if rules[j].terminal]
+    while stack:
+        for i in preds[stack.pop()]:
+            if i not in feeds_terminal:
+                feeds_terminal.add(i)
+                stack.append(i)
+
+    def priority(i):
+        group = 0 if rules[i].terminal else 1 if i in feeds_terminal else 2
+        return (group, rules[i].cost, i)
+
+    waiting = [len(p) for p in preds]
+    succs = [[] for _ in range(n)]
+    for j, p in enumerate(preds):
+        for i in p:
+            succs[i].append(j)
+    ready = [priority(i) for i in range(n) if not waiting[i]]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        i = heapq.heappop(ready)[-1]
+        order.append(rules[i])
+        for j in succs[i]:
+            waiting[j] -= 1
+            if not waiting[j]:
+                heapq.heappush(ready, priority(j))
+    return order
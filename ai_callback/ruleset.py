@@ -0,0 +1,322 @@
+# ai_callback/ruleset.py
+"""
+Rule sets declared as data and compiled into a loadable artifact.
+
+Building an AICallback in code means every worker re-registers its keyword lists,
+recompiles its regexes and recomputes the rule schedule at startup. A rule set can
+instead be written as a spec (plain dicts and lists, e.g. loaded from JSON or YAML),
+compiled once, and saved:
+
+    SPEC = {
+        "keywords": {"refund": ["refund", "chargeback", "money back"]},
+        "patterns": {"order_id": r"\\bORD-\\d{6}\\b"},
+        "rules": [
+            {"condition": "detect_financial_advice", "action": "add_financial_disclaimer"},
+            {"condition": {"keywords": "refund"}, "action": {"append": "\\n\\n[Refunds: see our policy.]"}},
+            {"condition": {"pattern": "order_id"}, "action": {"redact": "order_id", "with": "[ORDER]"}},
+            {"condition": {"toxicity": 0.9}, "action": "redact_entire_text"},
+        ],
+    }
+
+    compile_ruleset(SPEC).save("rules.bin")            # at build/deploy time
+    callback = load_ruleset("rules.bin").callback()    # in each worker
+
+A condition is the name of a function in ai_callback.conditions, "module:function"
+for your own, {"keywords": <list name>}, {"pattern": <pattern name>} or
+{"toxicity": <threshold>}. An action is the name of a function in ai_callback.actions,
+"module:function", {"append": <text>} or {"redact": <pattern name>, "with": <text>}.
+Other rule keys (name, cost, terminal, reads, writes, optional) are passed to add_rule.
+
+The artifact holds the spec's compiled keyword tables (including the Aho-Corasick
+automaton when pyahocorasick is installed), its patterns and the rule execution order.
+Loading it skips building the tables and the schedule; the patterns are compiled again
+from source, which takes a few milliseconds at most. Stock keyword conditions such as
+detect_abuse use the process-wide default_engine, which is not in the artifact and
+builds its tables on its first scan. Models are not part of the artifact. `ruleset.models` names the ones the rules need, and `warm()`
+(or CallbackPool's preload) loads them.
+
+Artifacts are pickles: only load files you built yourself.
+"""
+import importlib
+import pickle
+
+from ai_callback import actions, conditions
+from ai_callback.callback import AICallback
+from ai_callback.keywords import KeywordEngine
+from ai_callback.models import warm_up
+from ai_callback.patterns import RegexSet
+from ai_callback.rules import Rule, schedule
+
+# Bumped whenever the artifact layout changes; older artifacts must be recompiled.
+FORMAT_VERSION = 2
+
+_RULE_OPTIONS = ("name", "cost", "terminal", "reads", "writes", "optional")
+
+
+class CompiledRuleSet:
+    """
+    A compiled rule set: ready-made conditions and actions plus their execution order.
+
+    Build one with compile_ruleset() or load_ruleset(); call `callback()` for an
+    AICallback running the rules.
+    """
+
+    def __init__(self, rules, order, engine, regex_set, spec):
+        self.rules = rules  # [(condition, action, add_rule keyword arguments)]
+        self.order = order  # indexes into `rules`, as computed by ai_callback.rules.schedule
+        self.engine = engine
+        self.regex_set = regex_set
+        self.spec = spec
+        models = []
+        for condition, action, _ in rules:
+            for name in (*getattr(condition, "models", ()), *getattr(action, "models", ())):
+                if name not in models:
+                    models.append(name)
+        self.models = tuple(models)
+
+    def callback(self, metrics=False, memo=None):
+        """
+        Return a new AICallback running these rules.
+
+        Args:
+            metrics (bool or Metrics): Passed to AICallback.
+            memo (bool or Memo, optional): Passed to AICallback.
+        """
+        callback = AICallback(metrics=metrics, memo=memo)
+        for condition, action, options in self.rules:
+            callback.add_rule(condition, action, **options)
+        # The schedule was computed when the rule set was compiled.
+        callback._order = [callback.rules[i] for i in self.order]
+        return callback
+
+    def warm(self):
+        """Load the models the rules need (see ai_callback.models.warm_up)."""
+        if self.models:
+            warm_up(*self.models)
+
+    def save(self, path):
+        """Write the compiled rule set to `path`."""
+        with open(path, "wb") as f:
+            pickle.dump({"format": FORMAT_VERSION, "ruleset": self}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def __repr__(self):
+        return f"CompiledRuleSet({len(self.rules)} rules, models={self.models!r})"
+
+
+def compile_ruleset(spec):
+    """
+    Compile a rule-set spec (see the module docstring for the format).
+
+    Args:
+        spec (dict): With "rules" and optionally "keywords" and "patterns".
+
+    Returns:
+        CompiledRuleSet: The compiled rules; `.save(path)` writes the artifact.
+
+    Raises:
+        ValueError: If the spec refers to an unknown condition, action, keyword list
+                    or pattern, or a rule has unknown keys.
+
+    Example usage:
+        callback = compile_ruleset({"rules": [
+            {"condition": "detect_abuse", "action": "redact_abusive_language"},
+        ]}).callback()
+    """
+    engine = KeywordEngine()
+    for name, keywords in spec.get("keywords", {}).items():
+        engine.register(name, keywords)
+    patterns = dict(spec.get("patterns", {}))
+    regex_set = RegexSet(patterns) if patterns else None
+
+    built = []
+    for i, entry in enumerate(spec["rules"]):
+        unknown = set(entry) - {"condition", "action", *_RULE_OPTIONS}
+        if unknown:
+            raise ValueError(f"Rule {i} has unknown keys: {sorted(unknown)}")
+        condition = _condition(entry["condition"], engine, regex_set, patterns)
+        action = _action(entry["action"], regex_set, patterns)
+        options = {key: entry[key] for key in _RULE_OPTIONS if key in entry}
+        built.append((condition, action, options))
+
+    rules = [Rule(condition, action, **options) for condition, action, options in built]
+    position = {id(rule): i for i, rule in enumerate(rules)}
+    order = tuple(position[id(rule)] for rule in schedule(rules))
+    return CompiledRuleSet(built, order, engine, regex_set, spec)
+
+
+def load_ruleset(path, warm=False):
+    """
+    Load a rule set saved with CompiledRuleSet.save().
+
+    Args:
+        path (str): Artifact path.
+        warm (bool): Also load the models the rules need.
+
+    Returns:
+        CompiledRuleSet: The rule set; `.callback()` builds an AICallback.
+
+    Raises:
+        ValueError: If the file was written by an incompatible version of this module.
+    """
+    with open(path, "rb") as f:
+        artifact = pickle.load(f)
+    if not isinstance(artifact, dict) or artifact.get("format") != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} rule-set artifact; recompile it")
+    ruleset = artifact["ruleset"]
+    if warm:
+        ruleset.warm()
+    return ruleset
+
+
+###################
+# SPEC CONDITIONS
+###################
+
+class KeywordMatch:
+    """True if any keyword of list `name` in `engine` occurs in the response."""
+
+    takes_context = True
+
+    def __init__(self, engine, name):
+        self.engine = engine
+        self.name = name
+        self.__name__ = f"detect_{name}"
+
+    def __call__(self, response):
+        if isinstance(response, str):
+            return self.engine.matches(self.name, response)
+        return self.name in response.keyword_hits(self.engine)
+
+    @property
+    def window(self):
+        return max(map(len, self.engine.keywords(self.name)))
+
+
+class PatternMatch:
+    """True if pattern `name` of `regex_set` matches the response."""
+
+    takes_context = True
+
+    def __init__(self, regex_set, name):
+        self.regex_set = regex_set
+        self.name = name
+        self.__name__ = f"detect_{name}"
+
+    def __call__(self, response):
+        if isinstance(response, str):
+            return self.regex_set.matches(self.name, response)
+        return response.regex_match(self.name, self.regex_set)
+
+
+class ToxicityAbove:
+    """detect_toxicity with a configurable score threshold."""
+
+    cost = conditions.detect_toxicity.cost
+    models = ("toxicity",)
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.__name__ = "detect_toxicity"
+
+    def __call__(self, response):
+        return conditions._is_toxic(conditions._toxicity_results(response), self.threshold)
+
+    def batch(self, responses, batch_size=32):
+        return conditions.detect_toxicity_batch(responses, batch_size, self.threshold)
+
+
+###################
+# SPEC ACTIONS
+###################
+
+class AppendText:
+    """Append a fixed text to the response."""
+
+    appends = True
+
+    def __init__(self, suffix):
+        self.suffix = suffix
+        self.__name__ = "append_text"
+
+    def __call__(self, response):
+        return response + self.suffix
+
+    def edit(self, text, plan):
+        plan.append(self.suffix)
+
+
+class RedactPattern:
+    """Replace every match of pattern `name` of `regex_set` with `replacement`."""
+
+    def __init__(self, regex_set, name, replacement="[REDACTED]"):
+        self.regex_set = regex_set
+        self.name = name
+        self.replacement = replacement
+        self.__name__ = f"redact_{name}"
+
+    def _matches(self, text):
+        # Leftmost non-overlapping matches, as re.sub would replace.
+        return self.regex_set.spans(self.name, text)
+
+    def __call__(self, response):
+        pieces = []
+        pos = 0
+        for start, stop in self._matches(response):
+            pieces.append(response[pos:start])
+            pieces.append(self.replacement)
+            pos = stop
+        if not pieces:
+            return response
+        pieces.append(response[pos:])
+        return "".join(pieces)
+
+    def edit(self, text, plan):
+        for start, stop in self._matches(text):
+            plan.replace(start, stop, self.replacement)
+
+
+def _condition(entry, engine, regex_set, patterns):
+    if isinstance(entry, str):
+        return _named(entry, conditions, "condition")
+    if isinstance(entry, dict) and len(entry) == 1:
+        (kind, value), = entry.items()
+        if kind == "keywords":
+            try:
+                engine.keywords(value)
+            except KeyError:
+                raise ValueError(f"Unknown keyword list {value!r}") from None
+            return KeywordMatch(engine, value)
+        if kind == "pattern":
+            _check_pattern(value, patterns)
+            return PatternMatch(regex_set, value)
+        if kind == "toxicity":
+            return ToxicityAbove(float(value))
+    raise ValueError(f"Unsupported condition {entry!r}")
+
+
+def _action(entry, regex_set, patterns):
+    if isinstance(entry, str):
+        return _named(entry, actions, "action")
+    if isinstance(entry, dict):
+        if set(entry) == {"append"}:
+            return AppendText(entry["append"])
+        if set(entry) <= {"redact", "with"} and "redact" in entry:
+            _check_pattern(entry["redact"], patterns)
+            return RedactPattern(regex_set, entry["redact"], entry.get("with", "[REDACTED]"))
+    raise ValueError(f"Unsupported action {entry!r}")
+
+
+def _named(name, module, kind):
+    # A stock callable by name, or "package.module:function".
+    if ":" in name:
+        module_name, _, name = name.partition(":")
+        module = importlib.import_module(module_name)
+    fn = None if name.startswith("_") else getattr(module, name, None)
+    if not callable(fn):
+        raise ValueError(f"Unknown {kind} {name!r} in {module.__name__}")
+    return fn
+
+
+def _check_pattern(name, patterns):
+    if name not in patterns:
+        raise ValueError(f"Unknown pattern {name!r}")
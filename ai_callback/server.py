@@ -0,0 +1,299 @@
+# ai_callback/server.py
+"""
+A local post-processing service: one AICallback shared by many client processes.
+
+Running AICallback inside every API server process means each process loads its own
+copy of toxic-bert and runs it one response at a time. CallbackServer runs a single
+rule set behind a local HTTP endpoint on TCP or a Unix socket. Concurrent requests are
+coalesced by an ai_callback.batching.MicroBatcher into process_batch calls, so
+batched conditions see batches instead of single texts. When the queue is full the
+server answers 503 right away instead of queueing without limit.
+
+Protocol (JSON over HTTP/1.1, keep-alive):
+    POST /process   {"response": "..."}  ->  200 {"output": "..."}
+                                              503 {"error": "overloaded"}
+    GET  /stats     batcher counters (see MicroBatcher.stats)
+    GET  /health    {"ok": true}
+
+Run it from a compiled rule set (see ai_callback.ruleset):
+    python -m ai_callback.server --ruleset rules.bin --unix /tmp/aicallback.sock \\
+        --max-batch 32 --max-wait-ms 5
+
+and call it with the same signature as AICallback.process:
+    client = CallbackClient("/tmp/aicallback.sock")   # or ("127.0.0.1", 8080)
+    output = client.process(response)
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ai_callback.batching import MicroBatcher, Overloaded
+from ai_callback.models import warm_up
+from ai_callback.parallel import required_models
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        if self.path != "/process":
+            return self._reply(404, {"error": "not found"})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            response = body["response"]
+            if not isinstance(response, str):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            return self._reply(400, {"error": "expected {\"response\": <string>}"})
+        try:
+            output = self.server.batcher.submit(response).result()
+        except Overloaded:
+            return self._reply(503, {"error": "overloaded"}, {"Retry-After": "1"})
+        except Exception as e:
+            return self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+        self._reply(200, {"output": output})
+
+    def do_GET(self):
+        if self.path == "/stats":
+            return self._reply(200, self.server.batcher.stats())
+        if self.path == "/health":
+            return self._reply(200, {"ok": True})
+        self._reply(404, {"error": "not found"})
+
+    def _reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # One line per request is too much for a hot local service.
+        pass
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The socketserver default of 5 refuses connections when many clients start at once.
+    request_queue_size = 128
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def _remove_stale_socket(path):
+    # A socket left behind by a previous server is replaced; any other file is not ours.
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a Unix socket")
+    os.unlink(path)
+
+
+class CallbackServer:
+    """
+    Serves `callback` over HTTP, micro-batching concurrent requests.
+
+    Args:
+        callback (AICallback): The configured callback; its rules must not change while
+                               the server runs.
+        address (tuple or str): (host, port) for TCP (port 0 picks a free port), or a
+                                filesystem path for a Unix socket.
+        max_batch (int): Largest batch passed to callback.process_batch.
+        max_wait_ms (float): Longest time a request waits for others to join its batch.
+        max_queue (int): Requests allowed to wait before the server answers 503.
+        preload (bool): Load the rules' models before accepting requests.
+
+    Raises:
+        FileExistsError: If `address` is a path to an existing file that is not a socket.
+
+    Example usage:
+        server = CallbackServer(callback, ("127.0.0.1", 0)).start()
+        client = CallbackClient(server.address)
+        ...
+        server.close()
+    """
+
+    def __init__(self, callback, address, max_batch=32, max_wait_ms=5.0, max_queue=1024, preload=True):
+        if preload:
+            models = required_models(callback)
+            if models:
+                warm_up(*models)
+        self.callback = callback
+        self.batcher = MicroBatcher(
+            lambda responses: callback.process_batch(responses, batch_size=max_batch),
+            max_batch=max_batch, max_wait_ms=max_wait_ms, max_queue=max_queue,
+        )
+        if isinstance(address, str):
+            _remove_stale_socket(address)
+            self._server = _UnixServer(address, _Handler)
+        else:
+            self._server = _TCPServer(tuple(address), _Handler)
+        self._server.batcher = self.batcher
+        self.address = self._server.server_address
+        self._thread = None
+
+    def serve_forever(self):
+        """Serve requests until close() is called from another thread."""
+        self._server.serve_forever()
+
+    def start(self):
+        """Serve requests in a background thread and return self."""
+        self._thread = threading.Thread(target=self.serve_forever, name="CallbackServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop accepting requests, finish the queued ones and release the socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+        self.batcher.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class CallbackClient:
+    """
+    Thin client for CallbackServer, with the same process() signature as AICallback.
+
+    Each thread keeps its own keep-alive connection.
+
+    Args:
+        address (tuple or str): (host, port) of a TCP server or the path of a Unix socket.
+        timeout (float): Socket timeout in seconds.
+
+    Example usage:
+        client = CallbackClient("/tmp/aicallback.sock")
+        output = client.process(response)
+    """
+
+    def __init__(self, address, timeout=30.0):
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if isinstance(self.address, str):
+                conn = _UnixConnection(self.address, self.timeout)
+            else:
+                host, port = self.address
+                conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, method, path, payload=None):
+        body = None if payload is None else json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body, headers)
+                reply = conn.getresponse()
+                data = json.loads(reply.read())
+                break
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.CannotSendRequest):
+                # A kept-alive connection the server has since dropped: reconnect once.
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        if reply.status == 503:
+            raise Overloaded(data.get("error", "overloaded"))
+        if reply.status != 200:
+            raise RuntimeError(f"server returned {reply.status}: {data.get('error')}")
+        return data
+
+    def process(self, response: str) -> str:
+        """
+        Run `response` through the server's rules.
+
+        Args:
+            response (str): The LLM-generated text to inspect and optionally modify.
+
+        Returns:
+            str: The processed text, as AICallback.process would return it.
+
+        Raises:
+            Overloaded: If the server's queue is full; retry later or shed the request.
+            RuntimeError: If the server failed to process the response.
+        """
+        return self._request("POST", "/process", {"response": response})["output"]
+
+    def stats(self):
+        """Return the server's batcher counters."""
+        return self._request("GET", "/stats")
+
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a compiled rule set over HTTP with micro-batching.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--ruleset", help="artifact written by CompiledRuleSet.save")
+    source.add_argument("--spec", help="JSON rule-set spec, compiled at startup")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-queue", type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    from ai_callback.ruleset import compile_ruleset, load_ruleset
+    if args.ruleset:
+        ruleset = load_ruleset(args.ruleset)
+    else:
+        with open(args.spec, encoding="utf-8") as f:
+            ruleset = compile_ruleset(json.load(f))
+    address = args.unix or (args.host, args.port)
+    with CallbackServer(ruleset.callback(), address, args.max_batch, args.max_wait_ms, args.max_queue) as server:
+        print(f"serving {len(ruleset.rules)} rules on {server.address}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
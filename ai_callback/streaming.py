@@ -0,0 +1,159 @@
+# ai_callback/streaming.py
+"""
+Incremental post-processing of a response that arrives in chunks.
+
+Used by AICallback.process_stream. Text is released as soon as no rule can still
+change it; the final output is always identical to AICallback.process on the
+joined text. How early text can be released depends on what the rule actions
+declare about themselves through two optional attributes:
+
+    action.appends = True
+        The action only ever adds text at the end: action(text) == text + suffix.
+        Disclaimers and other annotations fall in this group.
+
+    action.rewrite = Rewrite(pattern, replacement, max_len, implies)
+        The action is a local substitution: action(text) == pattern.sub(replacement, text),
+        and no match is longer than `max_len` or looks more than one character past its
+        end. `implies` lists the conditions that are True for any text the pattern
+        matches in. Paired with one of them, the action changes nothing whenever the
+        condition is False, so it can be applied without waiting for the condition
+        (see Rule.rewrite). Paired with any other condition, the rule holds back all
+        output like an undeclared action.
+
+Conditions are always evaluated on the complete text at end of stream, so a
+keyword or pattern split across chunks still matches. If any rule has an action
+with neither attribute (or a rewrite its condition is not implied by), nothing can be released early and the whole output is
+produced at end of stream.
+"""
+
+
+class Rewrite:
+    """
+    Streaming description of a substitution action (see module docstring).
+
+    Args:
+        pattern (re.Pattern): Compiled pattern the action substitutes.
+        replacement (str or callable): Replacement, as accepted by `pattern.sub`.
+        max_len (int): Upper bound on the length of any match of `pattern`, including
+                       any text after it that a lookahead inspects.
+        implies (iterable[callable]): Conditions that hold for every text `pattern`
+                                      matches in.
+    """
+
+    def __init__(self, pattern, replacement, max_len, implies=()):
+        self.pattern = pattern
+        self.replacement = replacement
+        self.max_len = max_len
+        self.implies = tuple(implies)
+
+    def expand(self, match):
+        if callable(self.replacement):
+            return self.replacement(match)
+        return match.expand(self.replacement)
+
+
+class _RewriteStage:
+    # Applies one Rewrite to a stream, holding back only the tail that a match could
+    # still extend into. A little already-released text is kept as left context so
+    # lookbehinds and \b behave as they do on the full text.
+
+    def __init__(self, rewrite):
+        self.rewrite = rewrite
+        self.buffer = ""
+        self.context = 0
+
+    def feed(self, text):
+        self.buffer += text
+        rewrite = self.rewrite
+        # A match starting before `safe` lies inside the buffer with at least one
+        # character to spare (for a trailing \b), so it will be the same match once
+        # more text arrives.
+        safe = len(self.buffer) - rewrite.max_len
+        if safe <= self.context:
+            return ""
+        out = []
+        pos = self.context
+        for match in rewrite.pattern.finditer(self.buffer, self.context):
+            start, end = match.span()
+            if start >= safe:
+                break
+            out.append(self.buffer[pos:start])
+            out.append(rewrite.expand(match))
+            pos = end
+        cut = max(pos, safe)
+        out.append(self.buffer[pos:cut])
+        keep = max(0, cut - rewrite.max_len)
+        self.buffer = self.buffer[keep:]
+        self.context = cut - keep
+        return "".join(out)
+
+    def flush(self):
+        # End of stream: rewrite and release everything still held back.
+        out = []
+        pos = self.context
+        for match in self.rewrite.pattern.finditer(self.buffer, self.context):
+            out.append(self.buffer[pos:match.start()])
+            out.append(self.rewrite.expand(match))
+            pos = match.end()
+        out.append(self.buffer[pos:])
+        self.buffer = ""
+        self.context = 0
+        return "".join(out)
+
+
+class StreamProcessor:
+    """
+    Feeds chunks through the rules of an AICallback and releases safe output.
+
+    Example usage:
+        stream = StreamProcessor(callback)
+        for chunk in chunks:
+            send(stream.feed(chunk))
+        send(stream.finish())
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.stages = []
+        self.barrier = False
+        for rule in callback.rules:
+            if getattr(rule.action, "appends", False):
+                continue
+            if rule.rewrite is None:
+                self.barrier = True
+                break
+            self.stages.append(_RewriteStage(rule.rewrite))
+        self._received = []
+        self._released = []
+
+    def feed(self, chunk):
+        """
+        Add the next chunk and return the output that can be released now (maybe "").
+        """
+        self._received.append(chunk)
+        if self.barrier:
+            return ""
+        for stage in self.stages:
+            chunk = stage.feed(chunk)
+            if not chunk:
+                return ""
+        self._released.append(chunk)
+        return chunk
+
+    def finish(self):
+        """
+        Run the rules on the complete text and return the output not yet released.
+
+        Raises:
+            RuntimeError: If the text already released is not a prefix of the final
+                          output, meaning some action's `appends`/`rewrite` declaration
+                          does not match what it actually does.
+        """
+        final = self.callback.process("".join(self._received))
+        released = "".join(self._released)
+        if not final.startswith(released):
+            raise RuntimeError(
+                "Streamed output diverged from process(); check the appends/rewrite "
+                "declarations of the registered actions"
+            )
+        return final[len(released):]
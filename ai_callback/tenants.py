@@ -0,0 +1,381 @@
+# ai_callback/tenants.py
+"""
+Many tenants' rule sets in one process, with identical parts stored and evaluated once.
+
+Each tenant is declared with the rule-set spec format of ai_callback.ruleset (stock
+conditions and actions by name, custom keyword lists and patterns, toxicity
+thresholds). A TenantRegistry compiles the specs into shared parts:
+
+- keyword lists with the same keywords are registered once, in one KeywordEngine
+  shared by every tenant, so one scan of a response answers all tenants' lists;
+- patterns with the same source share one RegexSet, and identical conditions,
+  actions and rules (same condition, action and options) are the same objects;
+- tenants whose rules end up identical share one AICallback;
+- the toxicity model is the process-wide one from ai_callback.models, loaded once.
+
+registry.process(response) runs the response through several tenants at once. Each
+condition is evaluated once per distinct text, whichever tenants ask for it, and
+toxicity conditions with different thresholds share one model call per text.
+registry.footprint(tenant) estimates the memory a tenant's rules take.
+
+    registry = TenantRegistry()
+    registry.add_tenant("acme", {"rules": [
+        {"condition": "detect_abuse", "action": "redact_abusive_language"},
+        {"condition": {"toxicity": 0.9}, "action": "redact_entire_text"},
+    ]})
+    registry.callback("acme").process(text)  # one tenant
+    registry.process(text)                   # {"acme": ..., ...} for every tenant
+
+Sharing one keyword engine means a single tenant's scan also looks for the other
+tenants' keywords. With pyahocorasick installed that costs next to nothing; without
+it, the scan grows with the number of distinct keywords in the registry.
+"""
+import gc
+import sys
+import threading
+import types
+
+from ai_callback import actions, conditions
+from ai_callback.callback import AICallback
+from ai_callback.context import AnalysisContext
+from ai_callback.keywords import KeywordEngine
+from ai_callback.models import warm_up
+from ai_callback.patterns import RegexSet
+from ai_callback.rules import Rule, schedule
+from ai_callback.ruleset import (
+    _RULE_OPTIONS, AppendText, KeywordMatch, PatternMatch, RedactPattern, ToxicityAbove, _named,
+)
+
+_MISSING = object()
+# Key of the raw toxicity results in a text's shared condition results.
+_TOXICITY = object()
+# Never counted in a footprint: code and modules are shared by the whole process.
+_OPAQUE = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+class TenantRegistry:
+    """
+    Tenants' rule sets compiled into shared conditions, actions, rules and callbacks.
+
+    Example usage:
+        registry = TenantRegistry()
+        registry.add_tenant("acme", {"keywords": {"refund": ["refund"]}, "rules": [
+            {"condition": {"keywords": "refund"}, "action": {"append": "\\n[Refund policy]"}},
+        ]})
+        registry.process("I want a refund.")  # {"acme": "I want a refund.\\n[Refund policy]"}
+    """
+
+    def __init__(self):
+        self.engine = KeywordEngine()
+        self._tenants = {}    # tenant id -> AICallback
+        self._interned = {}   # spec key -> shared condition, action, Rule or AICallback
+        self._users = {}      # id(shared object) -> number of tenants using it
+        self._lists = {}      # keywords -> name of their list in `engine`
+        self._lock = threading.Lock()
+        self.evaluations = 0  # conditions evaluated by process()
+        self.reused = 0       # condition results process() took from another tenant
+
+    def __contains__(self, tenant):
+        return tenant in self._tenants
+
+    def __len__(self):
+        return len(self._tenants)
+
+    @property
+    def tenants(self):
+        """Ids of the registered tenants, in registration order."""
+        return tuple(self._tenants)
+
+    def add_tenant(self, tenant, spec):
+        """
+        Compile a tenant's rule-set spec against the registry's shared parts.
+
+        Args:
+            tenant (hashable): Tenant id.
+            spec (dict): A rule-set spec (see ai_callback.ruleset). Keyword list and
+                         pattern names are local to the tenant.
+
+        Returns:
+            AICallback: The tenant's callback, possibly shared with other tenants.
+
+        Raises:
+            ValueError: If the tenant is already registered, or the spec is invalid
+                        (same checks as compile_ruleset).
+        """
+        with self._lock:
+            if tenant in self._tenants:
+                raise ValueError(f"Tenant {tenant!r} is already registered")
+            keywords = {name: _keyword_key(words) for name, words in spec.get("keywords", {}).items()}
+            patterns = dict(spec.get("patterns", {}))
+            rules = []
+            for i, entry in enumerate(spec["rules"]):
+                unknown = set(entry) - {"condition", "action", *_RULE_OPTIONS}
+                if unknown:
+                    raise ValueError(f"Rule {i} has unknown keys: {sorted(unknown)}")
+                condition = self._condition(entry["condition"], keywords, patterns)
+                action = self._action(entry["action"], patterns)
+                options = tuple((key, _frozen(entry[key])) for key in _RULE_OPTIONS if key in entry)
+                rules.append(self._intern(
+                    ("rule", id(condition), id(action), options),
+                    lambda: Rule(condition, action, **{key: entry[key] for key, _ in options}),
+                ))
+            callback = self._intern(("callback", tuple(map(id, rules))), lambda: _callback(rules))
+            self._tenants[tenant] = callback
+            for part in {id(part): part for part in self._parts(callback)}.values():
+                self._users[id(part)] = self._users.get(id(part), 0) + 1
+            return callback
+
+    def callback(self, tenant):
+        """
+        Return the AICallback running `tenant`'s rules.
+
+        Raises:
+            KeyError: If the tenant is not registered.
+        """
+        return self._tenants[tenant]
+
+    def process(self, response, tenants=None):
+        """
+        Run `response` through the rules of several tenants, sharing condition results.
+
+        Each tenant gets the same output as `registry.callback(tenant).process(response)`.
+        A condition is evaluated at most once per distinct text across all the tenants
+        (conditions marked `deterministic = False` excepted), and tenants sharing a
+        callback are processed once.
+
+        Args:
+            response (str): The LLM-generated text to inspect and optionally modify.
+            tenants (iterable, optional): Tenant ids to run. Defaults to all tenants.
+
+        Returns:
+            dict: Maps each tenant id to its output.
+
+        Raises:
+            KeyError: If a tenant is not registered.
+        """
+        with self._lock:
+            # A snapshot, so that add_tenant() on another thread cannot change it mid-loop.
+            if tenants is None:
+                callbacks = dict(self._tenants)
+            else:
+                callbacks = {tenant: self._tenants[tenant] for tenant in tenants}
+        shared = {}   # text -> (AnalysisContext, {condition or _TOXICITY: result})
+        done = {}     # id(callback) -> output
+        outputs = {}
+        for tenant, callback in callbacks.items():
+            output = done.get(id(callback))
+            if output is None:
+                output = done[id(callback)] = self._run(callback._scheduled_rules(), response, shared)
+            outputs[tenant] = output
+        return outputs
+
+    def _run(self, rules, response, shared):
+        # AICallback._process, with the context and condition results looked up per text.
+        context, results = _shared_for(shared, response)
+        for rule in rules:
+            condition = rule.condition
+            fired = results.get(condition, _MISSING)
+            if fired is _MISSING:
+                self.evaluations += 1
+                if type(condition) is ToxicityAbove:
+                    scores = results.get(_TOXICITY)
+                    if scores is None:
+                        scores = results[_TOXICITY] = conditions._toxicity_results(response)
+                    fired = conditions._is_toxic(scores, condition.threshold)
+                else:
+                    fired = condition(context if rule.contextual else response)
+                if getattr(condition, "deterministic", True):
+                    results[condition] = fired
+            else:
+                self.reused += 1
+            if fired:
+                response = rule.action(response)
+                if rule.terminal:
+                    break
+                if response is not context.text:
+                    context, results = _shared_for(shared, response)
+        return response
+
+    def stats(self):
+        """Return tenant and shared-part counts, and process()'s evaluated and reused conditions."""
+        kinds = {}
+        for key in self._interned:
+            kinds[key[0]] = kinds.get(key[0], 0) + 1
+        return {
+            "tenants": len(self._tenants),
+            "callbacks": kinds.get("callback", 0),
+            "rules": kinds.get("rule", 0),
+            "conditions": kinds.get("condition", 0),
+            "actions": kinds.get("action", 0),
+            "keyword_lists": len(self._lists),
+            "patterns": kinds.get("regex", 0),
+            "evaluations": self.evaluations,
+            "reused": self.reused,
+        }
+
+    def footprint(self, tenant=None):
+        """
+        Estimate memory, in bytes, held by a tenant's rules (or by the whole registry).
+
+        Objects used by only this tenant count as "own". Objects shared by several
+        tenants are split evenly between them and count as "shared". Stock functions,
+        modules and models are shared by the whole process and not counted. With no
+        tenant, "own" and "shared" sum over all tenants and "engine" adds the shared
+        keyword engine's compiled tables.
+
+        Args:
+            tenant (hashable, optional): Tenant id.
+
+        Returns:
+            dict: {"own": bytes, "shared": bytes, "total": bytes}, plus "engine" for the
+                  whole registry.
+
+        Raises:
+            KeyError: If the tenant is not registered.
+        """
+        with self._lock:
+            if tenant is None:
+                sizes = [self._footprint(callback) for callback in self._tenants.values()]
+                own = sum(size["own"] for size in sizes)
+                shared = sum(size["shared"] for size in sizes)
+                engine = _deep_size(self.engine, ())
+                return {"own": own, "shared": shared, "engine": engine, "total": own + shared + engine}
+            return self._footprint(self._tenants[tenant])
+
+    def _footprint(self, callback):
+        parts = {id(part): part for part in self._parts(callback)}
+        # Each part is sized without the parts it refers to, which are counted separately.
+        skip = set(parts) | {id(self.engine)}
+        own = shared = 0
+        for part in parts.values():
+            size = _deep_size(part, skip - {id(part)})
+            if type(part) is KeywordMatch:
+                size += _deep_size(self.engine.keywords(part.name), skip)
+            users = self._users.get(id(part), 1)
+            if users > 1:
+                shared += size // users
+            else:
+                own += size
+        return {"own": own, "shared": shared, "total": own + shared}
+
+    def _parts(self, callback):
+        # The registry's objects a callback is made of, callback first.
+        yield callback
+        for rule in callback.rules:
+            yield rule
+            for part in (rule.condition, rule.action):
+                if not isinstance(part, _OPAQUE):
+                    yield part
+                    regex_set = getattr(part, "regex_set", None)
+                    if regex_set is not None:
+                        yield regex_set
+
+    def warm(self):
+        """Load the models the tenants' rules need (see ai_callback.models.warm_up)."""
+        with self._lock:
+            callbacks = list(self._tenants.values())
+        models = []
+        for callback in callbacks:
+            for rule in callback.rules:
+                for name in (*getattr(rule.condition, "models", ()), *getattr(rule.action, "models", ())):
+                    if name not in models:
+                        models.append(name)
+        if models:
+            warm_up(*models)
+
+    def _intern(self, key, build):
+        part = self._interned.get(key)
+        if part is None:
+            part = self._interned[key] = build()
+        return part
+
+    def _condition(self, entry, keywords, patterns):
+        if isinstance(entry, str):
+            if entry == "detect_toxicity":
+                # Shares the per-text model call with threshold conditions.
+                return self._intern(("condition", "toxicity", 0.7), lambda: ToxicityAbove(0.7))
+            return _named(entry, conditions, "condition")
+        if isinstance(entry, dict) and len(entry) == 1:
+            (kind, value), = entry.items()
+            if kind == "keywords":
+                if value not in keywords:
+                    raise ValueError(f"Unknown keyword list {value!r}")
+                return self._intern(("condition", "keywords", keywords[value]),
+                                    lambda: KeywordMatch(self.engine, self._keyword_list(keywords[value])))
+            if kind == "pattern":
+                regex_set = self._regex_set(value, patterns)
+                return self._intern(("condition", "pattern", id(regex_set)),
+                                    lambda: PatternMatch(regex_set, "pattern"))
+            if kind == "toxicity":
+                threshold = float(value)
+                return self._intern(("condition", "toxicity", threshold), lambda: ToxicityAbove(threshold))
+        raise ValueError(f"Unsupported condition {entry!r}")
+
+    def _action(self, entry, patterns):
+        if isinstance(entry, str):
+            return _named(entry, actions, "action")
+        if isinstance(entry, dict):
+            if set(entry) == {"append"}:
+                suffix = entry["append"]
+                return self._intern(("action", "append", suffix), lambda: AppendText(suffix))
+            if set(entry) <= {"redact", "with"} and "redact" in entry:
+                regex_set = self._regex_set(entry["redact"], patterns)
+                replacement = entry.get("with", "[REDACTED]")
+                return self._intern(("action", "redact", id(regex_set), replacement),
+                                    lambda: RedactPattern(regex_set, "pattern", replacement))
+        raise ValueError(f"Unsupported action {entry!r}")
+
+    def _keyword_list(self, words):
+        # Name of the engine list holding `words`, registering it on first use.
+        name = self._lists.get(words)
+        if name is None:
+            name = self._lists[words] = f"list_{len(self._lists)}"
+            self.engine.register(name, words)
+        return name
+
+    def _regex_set(self, name, patterns):
+        if name not in patterns:
+            raise ValueError(f"Unknown pattern {name!r}")
+        source = patterns[name]
+        return self._intern(("regex", source), lambda: RegexSet({"pattern": source}))
+
+
+def _callback(rules):
+    callback = AICallback()
+    callback.rules = list(rules)
+    callback._order = schedule(callback.rules)
+    return callback
+
+
+def _shared_for(shared, text):
+    entry = shared.get(text)
+    if entry is None:
+        entry = shared[text] = (AnalysisContext(text), {})
+    return entry
+
+
+def _keyword_key(words):
+    # Matching is case-insensitive and ignores order and duplicates.
+    return tuple(sorted({word.lower() for word in words}))
+
+
+def _frozen(value):
+    # Hashable form of a rule option (reads/writes may be lists).
+    if isinstance(value, (list, set, frozenset, tuple)):
+        return tuple(sorted(value))
+    return value
+
+
+def _deep_size(obj, skip):
+    # Sum of sys.getsizeof over everything reachable from `obj`, except ids in `skip`.
+    seen = set(skip)
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _OPAQUE):
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        stack.extend(gc.get_referents(item))
+    return size
@@ -1,28 +1,178 @@
 # ai_callback/time_tracking.py
+"""
+Request-scoped timing.
+
+The current request's RequestTimer lives in a context variable, so every thread and
+every asyncio task sees its own request even when many run at once, and all times
+come from a monotonic clock, so wall-clock adjustments cannot skew them. While a
+timer is active, AICallback.process records a span per rule it evaluates; code
+around it can add its own, such as the LLM call:
+
+    timer = start_time_tracking()
+    with span("llm_call"):
+        raw = generate(prompt)
+    final = callback.process(raw)   # appends "[Time Taken: ...]" via append_time_taken
+    timer.as_dict()                  # {"total": 1.84, "spans": [{"name": "llm_call", ...}, ...]}
+"""
+import contextvars
 import time
+from contextlib import contextmanager
+
+_CURRENT = contextvars.ContextVar("ai_callback_request_timer", default=None)
+
+
+class Span:
+    """One timed section of a request. Times are clock readings in nanoseconds."""
 
-# Global variable to hold the start time
-_START_TIME = None
+    __slots__ = ("name", "start", "end", "kind", "fired")
 
-def start_time_tracking():
+    def __init__(self, name, start, end=None, kind="span", fired=None):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.kind = kind
+        # For rule spans: whether the condition matched and the action ran.
+        self.fired = fired
+
+    def __repr__(self):
+        return f"Span({self.name!r}, kind={self.kind!r}, start={self.start}, end={self.end})"
+
+
+class RequestTimer:
     """
-    Call this right before making the LLM request. 
+    Timer for one request: start time plus the spans recorded so far.
+
+    Args:
+        clock (callable): Monotonic nanosecond clock, injectable for tests.
+
+    Example usage:
+        timer = RequestTimer()
+        with timer.span("llm_call"):
+            ...
+        timer.total()  # Returns: seconds since the timer was created
     """
-    global _START_TIME
-    _START_TIME = time.time()
+
+    def __init__(self, clock=time.perf_counter_ns):
+        self.clock = clock
+        self.start = clock()
+        self.spans = []
+
+    def total(self):
+        """Seconds elapsed since the request started."""
+        return (self.clock() - self.start) / 1e9
+
+    def add(self, name, start, end, kind="span", fired=None):
+        """Record a span measured elsewhere with this timer's clock."""
+        span = Span(name, start, end, kind, fired)
+        self.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name, kind="span"):
+        """Context manager timing the enclosed block as a span called `name`."""
+        span = self.add(name, self.clock(), None, kind)
+        try:
+            yield span
+        finally:
+            span.end = self.clock()
+
+    def as_dict(self):
+        """
+        Return the request timings as plain data.
+
+        Returns:
+            dict: {"total": seconds so far, "spans": [{"name", "kind", "start",
+                  "duration", "fired"}, ...]}, with span start times in seconds
+                  relative to the start of the request. Unfinished spans have
+                  duration None.
+        """
+        spans = []
+        for span in self.spans:
+            spans.append({
+                "name": span.name,
+                "kind": span.kind,
+                "start": (span.start - self.start) / 1e9,
+                "duration": None if span.end is None else (span.end - span.start) / 1e9,
+                "fired": span.fired,
+            })
+        return {"total": self.total(), "spans": spans}
+
+
+def start_time_tracking(clock=time.perf_counter_ns):
+    """
+    Call this right before making the LLM request.
+
+    Starts a new RequestTimer for the current thread or asyncio task and everything
+    it calls. Tasks created afterwards inherit it; requests handled on other threads
+    or tasks are unaffected.
+
+    Returns:
+        RequestTimer: The new timer.
+    """
+    timer = RequestTimer(clock)
+    _CURRENT.set(timer)
+    return timer
+
+
+def current_timer():
+    """Return the RequestTimer of the current request, or None if none was started."""
+    return _CURRENT.get()
+
+
+@contextmanager
+def track_request(clock=time.perf_counter_ns):
+    """
+    Like start_time_tracking(), but scoped: the previous timer (if any) is restored
+    when the block exits.
+
+    Example usage:
+        with track_request() as timer:
+            final = callback.process(generate(prompt))
+        log(timer.as_dict())
+    """
+    timer = RequestTimer(clock)
+    token = _CURRENT.set(timer)
+    try:
+        yield timer
+    finally:
+        _CURRENT.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as a span of the current request; no-op without a timer."""
+    timer = _CURRENT.get()
+    if timer is None:
+        yield None
+        return
+    with timer.span(name) as s:
+        yield s
+
 
 def always_true_condition(response):
     """A condition that always returns True, to ensure the time action runs."""
     return True
 
+# Reads nothing, so the scheduler never has to wait for other rules on its account.
+always_true_condition.reads = ()
+
 def append_time_taken(response):
     """
-    Appends the total time since start_time_tracking() was called.
-    If _START_TIME is None, it simply returns the original response.
+    Appends the time elapsed since the current request's start_time_tracking().
+    Without a timer in the current context, it simply returns the original response.
     """
-    global _START_TIME
-    if _START_TIME is None:
+    timer = _CURRENT.get()
+    if timer is None:
         return response
 
-    elapsed = time.time() - _START_TIME
-    return response + f"\n\n[Time Taken: {elapsed:.2f} seconds]"
+    return response + f"\n\n[Time Taken: {timer.total():.2f} seconds]"
+
+def _time_taken_edit(text, plan):
+    timer = _CURRENT.get()
+    if timer is not None:
+        plan.append(f"\n\n[Time Taken: {timer.total():.2f} seconds]")
+
+append_time_taken.appends = True
+append_time_taken.edit = _time_taken_edit
+# Depends on the clock, so AICallback's memo layer never caches outputs it touched.
+append_time_taken.deterministic = False
@@ -2,6 +2,7 @@
 
 from transformers import pipeline
 from ai_callback.callback import AICallback
+from ai_callback.models import warm_up
 from ai_callback.conditions import (
     detect_financial_advice,
     detect_medical_advice,
@@ -22,6 +23,7 @@ from ai_callback.actions import (
 )
 from ai_callback.time_tracking import (
     start_time_tracking,
+    span,
     always_true_condition,
     append_time_taken
 )
@@ -50,12 +52,16 @@ def huggingface_usage_example():
     # 5) Register incomplete
     callback.add_rule(detect_incomplete_response, handle_incomplete_response)
 
-    # 6) Register toxicity detection (above a 0.7 threshold)
-    callback.add_rule(detect_toxicity, redact_entire_text)
+    # 6) Register toxicity detection (above a 0.7 threshold).
+    #    Scoring only the generated body (not our own disclaimers) lets the scheduler run
+    #    this terminal check before the weather lookup and skip it for toxic output.
+    callback.add_rule(detect_toxicity, redact_entire_text, reads={"body"})
+    # Load toxic-bert now rather than on the first detect_toxicity call
+    warm_up("toxicity")
 
     # 7) Register time tracking
     callback.add_rule(always_true_condition, append_time_taken)
-    start_time_tracking()
+    timer = start_time_tracking()
 
     # 7) Generate text from HF
     prompt = (
@@ -63,7 +69,8 @@ def huggingface_usage_example():
     )
     print(f"USER PROMPT: {prompt}")
 
-    raw_output = generator(prompt)[0]["generated_text"]
+    with span("llm_call"):
+        raw_output = generator(prompt)[0]["generated_text"]
     print("\nRAW LLM OUTPUT:")
     print(raw_output)
 
@@ -72,5 +79,9 @@ def huggingface_usage_example():
     print("\nFINAL OUTPUT AFTER CALLBACK:")
     print(final_output)
 
+    print("\nTIMINGS:")
+    for entry in timer.as_dict()["spans"]:
+        print(f"  {entry['name']}: {entry['duration']:.3f}s")
+
 if __name__ == "__main__":
     huggingface_usage_example()
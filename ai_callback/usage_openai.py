@@ -20,6 +20,7 @@ from ai_callback.actions import (
 )
 from ai_callback.time_tracking import (
     start_time_tracking,
+    span,
     always_true_condition,
     append_time_taken
 )
@@ -51,8 +52,8 @@ def openai_usage_example():
     # 6) Set OpenAI API key
     openai.api_key = "<YOUR_OPENAI_API_KEY>"
 
-    # 7) Start time tracking
-    start_time_tracking()
+    # 7) Start time tracking for this request
+    timer = start_time_tracking()
 
     prompt = (
         "Give me some financial advice about investing in crypto. "
@@ -62,12 +63,13 @@ def openai_usage_example():
     print(f"USER PROMPT: {prompt}")
 
     # 8) Make the OpenAI request
-    response = openai.Completion.create(
-        engine="text-davinci-003",
-        prompt=prompt,
-        max_tokens=80,
-        temperature=0.7
-    )
+    with span("llm_call"):
+        response = openai.Completion.create(
+            engine="text-davinci-003",
+            prompt=prompt,
+            max_tokens=80,
+            temperature=0.7
+        )
 
     raw_llm_output = response.choices[0].text.strip()
     print("\nRAW LLM OUTPUT:")
@@ -78,5 +80,9 @@ def openai_usage_example():
     print("\nFINAL OUTPUT AFTER CALLBACK:")
     print(final_output)
 
+    print("\nTIMINGS:")
+    for entry in timer.as_dict()["spans"]:
+        print(f"  {entry['name']}: {entry['duration']:.3f}s")
+
 if __name__ == "__main__":
     openai_usage_example()
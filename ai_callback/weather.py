@@ -0,0 +1,219 @@
+# ai_callback/weather.py
+"""
+Weather enrichment client used by actions.append_weather_info.
+
+Wraps the OpenWeather current-weather endpoint with:
+- a pooled requests.Session, so repeated lookups reuse TCP/TLS connections;
+- connect and read timeouts, so a slow upstream cannot hang AICallback.process;
+- a per-location TTL cache, bounded to `max_entries` locations (least recently used
+  evicted first) and dropping entries once they are past `max_stale`;
+- request coalescing: concurrent misses for the same location share one upstream call;
+- stale-while-revalidate: an expired entry is served immediately while a single
+  background refresh runs, so callers never wait on a slow upstream once a location
+  has been seen.
+"""
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+OPENWEATHER_URL = "http://api.openweathermap.org/data/2.5/weather"
+
+# Every live client, so a forked child can drop the connections it inherited.
+_CLIENTS = weakref.WeakSet()
+
+
+class _Flight:
+    # One in-flight upstream request that other callers can wait on.
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class WeatherClient:
+    """
+    Cached, time-bounded client for current weather by city name.
+
+    Args:
+        api_key (str): OpenWeather API key.
+        base_url (str): Endpoint URL; point it at a local stand-in server for testing.
+        connect_timeout (float): Seconds allowed to establish a connection.
+        read_timeout (float): Seconds allowed between bytes of the response.
+        ttl (float): Seconds a successful lookup is served from cache as fresh.
+        max_stale (float): Seconds past `ttl` an entry may still be served while refreshing.
+        pool_size (int): Maximum pooled connections per host.
+        max_entries (int): Locations kept in the cache before the least recently used
+                           is evicted.
+        clock (callable): Monotonic time source, injectable for tests.
+
+    Example usage:
+        client = WeatherClient(api_key="...", ttl=300)
+        client.get("Paris")  # Returns: "18.2°C, light rain"
+    """
+
+    def __init__(self, api_key, base_url=OPENWEATHER_URL, connect_timeout=1.0, read_timeout=2.0,
+                 ttl=600.0, max_stale=3600.0, pool_size=10, max_entries=1024, clock=time.monotonic):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.clock = clock
+        self.pool_size = pool_size
+        self.max_entries = max_entries
+        self.upstream_calls = 0
+        self._cache = OrderedDict()  # location -> (fetched_at, weather text), least recently used first
+        self._reset_connections()
+        _CLIENTS.add(self)
+
+    def _reset_connections(self):
+        # Fresh session, lock and in-flight table. Also run in forked children: sockets
+        # shared with the parent must not be reused, and the parent's lock or pending
+        # requests may have been mid-use at fork time. The cache is kept.
+        # requests is imported here, not at module level, so that loading the rules in a
+        # new worker does not pay for it until weather is actually used.
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._inflight = {}  # location -> _Flight
+        self._lock = threading.Lock()
+
+    def get(self, location):
+        """
+        Return a short weather description for `location`.
+
+        Fresh cache hits return immediately. A stale (but not too old) entry is returned
+        immediately too, with a refresh started in the background. Only a location with
+        no usable entry waits for the upstream, bounded by the timeouts.
+
+        Args:
+            location (str): City name, e.g. "Berlin".
+
+        Returns:
+            str: e.g. "25°C, clear sky", or a message saying why no data is available.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._cache.get(location)
+            if entry is not None:
+                age = now - entry[0]
+                if age >= self.ttl + self.max_stale:
+                    del self._cache[location]
+                    entry = None
+                else:
+                    self._cache.move_to_end(location)
+                    if age < self.ttl:
+                        return entry[1]
+            flight = self._inflight.get(location)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[location] = _Flight()
+
+        if entry is not None:
+            if leader:
+                threading.Thread(target=self._refresh, args=(location, flight), daemon=True).start()
+            return entry[1]
+        if leader:
+            self._refresh(location, flight)
+        else:
+            flight.done.wait()
+        return flight.result
+
+    def _refresh(self, location, flight):
+        try:
+            text, cacheable = self._fetch(location)
+            with self._lock:
+                if cacheable:
+                    self._store(location, text)
+                elif location in self._cache:
+                    # Keep serving the last good value rather than an error.
+                    text = self._cache[location][1]
+            flight.result = text
+        finally:
+            with self._lock:
+                self._inflight.pop(location, None)
+            flight.done.set()
+
+    def _store(self, location, text):
+        # Called with the lock held. Storing is rare (one upstream call), so it also
+        # sweeps out every entry past max_stale, not only the looked-up ones.
+        now = self.clock()
+        expired = [loc for loc, (fetched_at, _) in self._cache.items()
+                   if now - fetched_at >= self.ttl + self.max_stale]
+        for loc in expired:
+            del self._cache[loc]
+        self._cache[location] = (now, text)
+        self._cache.move_to_end(location)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _fetch(self, location):
+        # Returns (text, cacheable). "Not found" style answers are cached like data;
+        # transport errors are not.
+        with self._lock:
+            self.upstream_calls += 1
+        params = {"q": location, "appid": self.api_key, "units": "metric"}
+        try:
+            r = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            data = r.json()
+            if data.get("cod") == 200:
+                temp = data["main"]["temp"]
+                desc = data["weather"][0]["description"]
+                return f"{temp}°C, {desc}", True
+        except Exception as e:
+            return f"Error fetching weather: {str(e)}", False
+        return f"Weather data not available for {location}", r.status_code < 500
+
+
+def _after_fork_in_child():
+    global _default_lock
+    _default_lock = threading.Lock()
+    for client in list(_CLIENTS):
+        client._reset_connections()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def configure(api_key, **kwargs):
+    """
+    Set up the client used by append_weather_info.
+
+    Args:
+        api_key (str): OpenWeather API key.
+        **kwargs: Any other WeatherClient argument (timeouts, ttl, base_url, ...).
+
+    Returns:
+        WeatherClient: The new default client.
+    """
+    global _default_client
+    with _default_lock:
+        _default_client = WeatherClient(api_key, **kwargs)
+    return _default_client
+
+
+def get_default_client():
+    """
+    Return the client used by append_weather_info, or None if weather is not configured.
+
+    Without an explicit configure() call, a client is created from the
+    OPENWEATHER_API_KEY environment variable if it is set.
+    """
+    global _default_client
+    if _default_client is None:
+        api_key = os.environ.get("OPENWEATHER_API_KEY")
+        if api_key:
+            with _default_lock:
+                if _default_client is None:
+                    _default_client = WeatherClient(api_key)
+    return _default_client
@@ -0,0 +1,8 @@
+"""
+Benchmarks for ai_callback. Run each module from the repository root, e.g.:
+
+    python -m benchmarks.bench_import
+
+`python -m benchmarks.run` runs the full suite over the synthetic corpus in
+benchmarks/corpus.py and can save and compare JSON results between commits.
+"""
@@ -0,0 +1,91 @@
+# benchmarks/bench_async.py
+"""
+Event-loop stall benchmark: AICallback.process vs AICallback.process_async.
+
+A heartbeat task sleeps for 1 ms in a loop and records how late it wakes up while
+a batch of concurrent requests is post-processed. The rule set is the stock keyword
+rules plus a blocking stand-in for model inference / HTTP enrichment
+(time.sleep of --blocking-ms), so the run needs no model or network.
+
+Usage:
+    python -m benchmarks.bench_async [--requests N] [--blocking-ms MS]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from ai_callback import actions, conditions
+from ai_callback.callback import AICallback
+
+RESPONSE = (
+    "You should invest in index funds. The weather in Paris is mild. "
+    "This is not legal advice; consult a lawyer before any lawsuit."
+)
+
+
+def build_callback(blocking_s):
+    def slow_condition(response):
+        time.sleep(blocking_s)
+        return False
+
+    callback = AICallback()
+    callback.add_rule(conditions.detect_financial_advice, actions.add_financial_disclaimer)
+    callback.add_rule(conditions.detect_medical_advice, actions.add_medical_disclaimer)
+    callback.add_rule(conditions.detect_legal_advice, actions.add_legal_disclaimer)
+    callback.add_rule(conditions.detect_abuse, actions.redact_abusive_language)
+    callback.add_rule(slow_condition, actions.redact_entire_text)
+    callback.add_rule(conditions.detect_weather_query, actions.append_weather_info)
+    return callback
+
+
+async def heartbeat(lags, stop):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + 0.001
+        await asyncio.sleep(0.001)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def run(mode, callback, requests):
+    async def sync_request():
+        # What callers do today: call the synchronous API from a coroutine.
+        return callback.process(RESPONSE)
+
+    async def async_request():
+        return await callback.process_async(RESPONSE)
+
+    handler = sync_request if mode == "process" else async_request
+    lags, stop = [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(handler() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return results, elapsed, lags
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--blocking-ms", type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    callback = build_callback(args.blocking_ms / 1000)
+    expected = callback.process(RESPONSE)
+    print(f"{'mode':<14} {'total':>9} {'max stall':>10} {'p99 stall':>10} {'mean stall':>11}")
+    for mode in ("process", "process_async"):
+        results, elapsed, lags = asyncio.run(run(mode, callback, args.requests))
+        assert all(result == expected for result in results)
+        lags = sorted(lags) or [0.0]
+        p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+        print(f"{mode:<14} {elapsed * 1e3:>7.1f}ms {lags[-1] * 1e3:>8.1f}ms {p99 * 1e3:>8.1f}ms "
+              f"{statistics.mean(lags) * 1e3:>9.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+# benchmarks/bench_budget.py
+"""
+Latency budgets: tail latency of process() with a slow optional enrichment rule.
+
+The rule set is stock disclaimer and abuse rules (required) plus an optional
+enrichment rule whose upstream call takes a seeded log-normal time (median --median-ms,
+with a long tail), like append_weather_info on a live API. Each --budgets entry runs the
+corpus through process(response, budget=...) and reports:
+    p50/p99 ms   wall time per call
+    skipped      share of calls where the enrichment was skipped or cut off
+"none" is process() without a budget.
+
+Usage:
+    python -m benchmarks.bench_budget [--budgets none 0.2 0.05] [--median-ms 20] [--count 300]
+"""
+import argparse
+import random
+import sys
+import time
+
+from ai_callback import actions, conditions
+from ai_callback.callback import AICallback
+from benchmarks.corpus import generate
+from benchmarks.run import _percentile
+
+
+class SlowEnrichment:
+    """An append-only action whose latency follows a seeded log-normal distribution."""
+
+    optional = True
+    appends = True
+
+    def __init__(self, median_ms, seed=0):
+        self.median = median_ms / 1000
+        self.rng = random.Random(seed)
+        self.__name__ = "slow_enrichment"
+
+    def __call__(self, response):
+        time.sleep(self.median * self.rng.lognormvariate(0, 1.0))
+        return response + "\n\n[Related: see our help center.]"
+
+
+def build(median_ms):
+    callback = AICallback()
+    callback.add_rule(conditions.detect_financial_advice, actions.add_financial_disclaimer)
+    callback.add_rule(conditions.detect_abuse, actions.redact_abusive_language)
+    callback.add_rule(conditions.detect_medical_advice, actions.add_medical_disclaimer)
+    callback.add_rule(conditions.detect_question, SlowEnrichment(median_ms), cost=median_ms / 1000)
+    return callback
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budgets", nargs="+", default=["none", "0.2", "0.05", "0.02"])
+    parser.add_argument("--median-ms", type=float, default=20.0)
+    parser.add_argument("--count", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    texts = [text + " Can you help?" for text in generate("chat", args.count)]
+    print(f"{'budget':<8} {'p50 ms':>8} {'p99 ms':>8} {'skipped':>8}")
+    for entry in args.budgets:
+        budget = None if entry == "none" else float(entry)
+        callback = build(args.median_ms)
+        latencies, skipped = [], 0
+        for text in texts:
+            t0 = time.perf_counter_ns()
+            report = callback.process(text, budget=budget, report=True)
+            latencies.append(time.perf_counter_ns() - t0)
+            skipped += bool(report.skipped)
+        latencies.sort()
+        print(f"{entry:<8} {_percentile(latencies, 0.5) / 1e6:>8.1f} {_percentile(latencies, 0.99) / 1e6:>8.1f} "
+              f"{skipped / len(texts):>8.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
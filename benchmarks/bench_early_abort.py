@@ -0,0 +1,103 @@
+# benchmarks/bench_early_abort.py
+"""
+Early abort: waiting for the whole completion against stopping at the first terminal hit.
+
+A FakeLLMServer (benchmarks/fake_llm.py) streams scripted completions at --token-ms per
+token. Some of them turn toxic in their first sentence. Each prompt is run in two modes
+through the OpenAI client:
+    wait     stream the whole completion, then callback.process (what usage_openai.py does)
+    abort    ai_callback.adapters.stream_openai, which closes the stream once a terminal
+             rule fires
+The report gives wall time and the tokens the server actually generated, for the toxic
+and the clean prompts. Outputs of the two modes must match.
+
+detect_toxicity uses the stub model (benchmarks/stubs.py) unless --real-model is given.
+Requires the openai package.
+
+Usage:
+    python -m benchmarks.bench_early_abort [--token-ms 10] [--max-tokens 200]
+"""
+import argparse
+import sys
+import time
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+from ai_callback import actions, conditions
+from ai_callback.adapters import stream_openai
+from ai_callback.callback import AICallback
+from benchmarks.fake_llm import FakeLLMServer
+from benchmarks.stubs import use_stub_toxicity
+
+_FILLER = (
+    " Let me explain the details step by step so that everything is clear. There are several"
+    " factors to consider, and each of them deserves a careful look before you decide."
+)
+
+SCRIPT = {
+    "toxic-1": "Honestly, I hate you and your questions." + _FILLER * 6,
+    "toxic-2": "What a stupid idea, you idiot." + _FILLER * 6,
+    "clean-1": "Sure, here is a summary of the report." + _FILLER * 6,
+    "clean-2": "Good morning! The meeting moved to Thursday." + _FILLER * 6,
+}
+
+
+def build_callback():
+    callback = AICallback()
+    callback.add_rule(conditions.detect_financial_advice, actions.add_financial_disclaimer)
+    callback.add_rule(conditions.detect_abuse, actions.redact_entire_text)
+    callback.add_rule(conditions.detect_toxicity, actions.redact_entire_text, reads={"body"})
+    return callback
+
+
+def wait_mode(callback, client, **kwargs):
+    stream = client.chat.completions.create(stream=True, **kwargs)
+    text = "".join(chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
+    return callback.process(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--token-ms", type=float, default=10.0)
+    parser.add_argument("--max-tokens", type=int, default=200)
+    parser.add_argument("--check-chars", type=int, default=80)
+    parser.add_argument("--real-model", action="store_true")
+    args = parser.parse_args(argv)
+    if openai is None:
+        print("bench_early_abort needs the openai package")
+        return 1
+
+    if not args.real_model:
+        use_stub_toxicity()
+    callback = build_callback()
+    failed = False
+    print(f"{'prompt':<9} {'mode':<6} {'ms':>8} {'tokens':>7} {'saved':>6}")
+    with FakeLLMServer(SCRIPT, token_ms=args.token_ms).start() as server:
+        client = openai.OpenAI(api_key="fake", base_url=server.base_url)
+        for prompt in SCRIPT:
+            kwargs = {"model": "fake", "max_tokens": args.max_tokens,
+                      "messages": [{"role": "user", "content": prompt}]}
+            outputs = {}
+            for mode in ("wait", "abort"):
+                start = time.perf_counter()
+                if mode == "wait":
+                    outputs[mode], saved = wait_mode(callback, client, **kwargs), 0
+                else:
+                    result = stream_openai(callback, client, args.check_chars, **kwargs)
+                    outputs[mode], saved = result.output, result.tokens_saved
+                elapsed = (time.perf_counter() - start) * 1e3
+                # Let the server notice the disconnect before reading its count.
+                time.sleep(2 * args.token_ms / 1000)
+                sent = server.requests[-1]["tokens_sent"]
+                print(f"{prompt:<9} {mode:<6} {elapsed:>8.0f} {sent:>7} {saved:>6}")
+            if outputs["wait"] != outputs["abort"]:
+                print(f"FAIL: {prompt}: outputs differ")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# benchmarks/bench_edits.py
+"""
+process() against plan().apply() on large responses.
+
+A dozen rules that all fire (disclaimers, notes, redaction) run over code answers
+of increasing size. process() copies the whole response once per firing action;
+plan() records edits against the original and builds the output with one join.
+plan() only matches process() when no condition depends on an earlier rule's edits
+(see AICallback.plan). That holds for this rule set on this input, and the outputs are
+checked to be identical.
+
+Usage:
+    python -m benchmarks.bench_edits [--sizes 20000 200000 2000000]
+"""
+import argparse
+import sys
+import time
+
+from ai_callback import actions, conditions
+from ai_callback.callback import AICallback
+from ai_callback.keywords import KeywordCondition
+
+
+def _note(label):
+    suffix = f"\n\n[{label}]"
+
+    def add_note(response):
+        return response + suffix
+
+    add_note.__name__ = f"add_{label.lower().replace(' ', '_')}"
+    add_note.appends = True
+    add_note.edit = lambda text, plan: plan.append(suffix)
+    return add_note
+
+
+def build():
+    callback = AICallback()
+    callback.add_rule(conditions.detect_financial_advice, actions.add_financial_disclaimer)
+    callback.add_rule(conditions.detect_medical_advice, actions.add_medical_disclaimer)
+    callback.add_rule(conditions.detect_legal_advice, actions.add_legal_disclaimer)
+    callback.add_rule(conditions.detect_abuse, actions.redact_abusive_language)
+    callback.add_rule(conditions.detect_incomplete_response, actions.handle_incomplete_response)
+    callback.add_rule(conditions.detect_weather_query, actions.append_weather_info)
+    for label in ("Reviewed", "Code license", "Security note", "Style note", "Tests", "Changelog"):
+        callback.add_rule(KeywordCondition(label.lower().replace(" ", "_"), ["def "]), _note(label))
+    return callback
+
+
+def response(size):
+    block = (
+        "Here's the helper you asked about; stupid mistakes are easy here...\n"
+        "```python\ndef merge(items, key=None):\n    # invest time in tests, ask a lawyer about the license\n"
+        "    return sorted(items, key=key)\n```\n"
+        "The weather in Paris is irrelevant to the diagnosis of this bug. Don't be an Idiot.\n"
+    )
+    return (block * (size // len(block) + 1))[:size]
+
+
+def best_of(fn, arg, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20_000, 200_000, 2_000_000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    callback = build()
+    ok = True
+    for size in args.sizes:
+        text = response(size)
+        same = callback.process(text) == callback.plan(text).apply()
+        ok &= same
+        sequential = best_of(callback.process, text, args.repeats)
+        planned = best_of(lambda t: callback.plan(t).apply(), text, args.repeats)
+        print(f"{size:>9} chars  process {sequential * 1e3:8.2f} ms  plan+apply {planned * 1e3:8.2f} ms"
+              f"  ({sequential / planned:.2f}x)  identical: {same}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
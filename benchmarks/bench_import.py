@@ -0,0 +1,86 @@
+# benchmarks/bench_import.py
+"""
+Import-time benchmark for ai_callback.conditions.
+
+Each scenario runs in a fresh interpreter so module caches don't hide the cost.
+The keyword-only scenario fails (exit code 1) if torch or transformers end up
+imported, which guards the lazy loading of the toxicity model.
+
+Usage:
+    python -m benchmarks.bench_import [--repeat N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("torch", "transformers")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import ai_callback.conditions as c
+import_s = time.perf_counter() - t0
+t0 = time.perf_counter()
+{calls}
+calls_s = time.perf_counter() - t0
+print(json.dumps({{
+    "import_s": import_s,
+    "calls_s": calls_s,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+SCENARIOS = {
+    "keyword-only": (
+        "c.detect_financial_advice('You should invest in stocks.')\n"
+        "c.detect_pii('Contact john@email.com')\n"
+        "c.detect_abuse('You are an idiot.')"
+    ),
+    "toxicity": "c.detect_toxicity('You are worthless scum.')",
+}
+
+
+def run_scenario(calls):
+    probe = _PROBE.format(calls=calls, heavy=HEAVY_MODULES)
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    out = subprocess.run(
+        [sys.executable, "-c", probe], cwd=REPO_ROOT, env=env,
+        capture_output=True, text=True,
+    )
+    if out.returncode != 0:
+        return None, out.stderr.strip().splitlines()[-1]
+    return json.loads(out.stdout), None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name, calls in SCENARIOS.items():
+        samples = []
+        for _ in range(args.repeat):
+            result, error = run_scenario(calls)
+            if error:
+                print(f"{name:<14} skipped: {error}")
+                break
+            samples.append(result)
+        if not samples:
+            continue
+        import_ms = statistics.median(s["import_s"] for s in samples) * 1000
+        calls_ms = statistics.median(s["calls_s"] for s in samples) * 1000
+        heavy = sorted({m for s in samples for m in s["heavy"]})
+        print(f"{name:<14} import {import_ms:8.1f} ms   first calls {calls_ms:8.1f} ms   "
+              f"heavy modules: {', '.join(heavy) or 'none'}")
+        if name == "keyword-only" and heavy:
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
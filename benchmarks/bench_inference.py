@@ -0,0 +1,115 @@
+# benchmarks/bench_inference.py
+"""
+Throughput of AICallback.process on many threads, with and without coalesced inference.
+
+For each --threads count, client threads call callback.process (the stock rules plus
+detect_toxicity) on responses from the synthetic corpus for --seconds, first with every
+thread calling the model itself ("direct"), then with ai_callback.inference coalescing
+the calls for each --settings entry (max_batch:max_wait_ms). The report gives:
+    resp/s       completed process() calls per second
+    p50/p99 ms   latency per call
+    batch        mean batch size the inference worker ran
+
+The model is a stub (benchmarks/stubs.py) with a fixed --call-ms cost per model call
+plus --work-ms per text, so batching amortizes the per-call part as a real forward pass
+would. Every setting's outputs are checked against serial processing.
+
+Usage:
+    python -m benchmarks.bench_inference [--threads 8 16 32 64] [--settings 32:0 32:1] [--seconds 2]
+"""
+import argparse
+import sys
+import threading
+import time
+
+from ai_callback import actions, conditions, inference
+from ai_callback.callback import AICallback
+from benchmarks.corpus import corpus
+from benchmarks.run import _percentile
+from benchmarks.stubs import use_stub_toxicity
+
+RULES = [
+    (conditions.detect_financial_advice, actions.add_financial_disclaimer),
+    (conditions.detect_medical_advice, actions.add_medical_disclaimer),
+    (conditions.detect_abuse, actions.redact_abusive_language),
+    (conditions.detect_toxicity, actions.redact_entire_text),
+]
+
+
+def load(callback, texts, expected, threads, seconds):
+    # Runs `threads` clients back to back for `seconds`; returns (rate, latencies, ok).
+    latencies = [[] for _ in range(threads)]
+    mismatches = []
+    stop = time.perf_counter() + seconds
+    start_line = threading.Barrier(threads + 1)
+
+    def client(k):
+        out = latencies[k]
+        i = k
+        start_line.wait()
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            result = callback.process(texts[i % len(texts)])
+            out.append(time.perf_counter() - t0)
+            if result != expected[i % len(texts)]:
+                mismatches.append(i)
+            i += threads
+
+    workers = [threading.Thread(target=client, args=(k,)) for k in range(threads)]
+    for worker in workers:
+        worker.start()
+    start_line.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    samples = sorted(t for out in latencies for t in out)
+    return len(samples) / elapsed, samples, not mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--settings", nargs="+", default=["32:0", "32:1", "64:2"])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--responses", type=int, default=100)
+    parser.add_argument("--call-ms", type=float, default=2.0)
+    parser.add_argument("--work-ms", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    use_stub_toxicity(args.work_ms, call_ms=args.call_ms)
+    callback = AICallback()
+    for condition, action in RULES:
+        callback.add_rule(condition, action)
+    texts = [text for texts in corpus(args.responses, seed=0, categories=("chat",)).values() for text in texts]
+    expected = [callback.process(text) for text in texts]
+
+    settings = [None] + [tuple(float(x) for x in s.split(":")) for s in args.settings]
+    ok = True
+    print(f"{'threads':>7} {'setting':>8} {'resp/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'batch':>6} {'speedup':>8}")
+    for threads in args.threads:
+        baseline = None
+        for setting in settings:
+            if setting is None:
+                inference.disable("toxicity")
+                label = "direct"
+            else:
+                max_batch, max_wait_ms = setting
+                inference.enable("toxicity", max_wait_ms=max_wait_ms, max_batch=int(max_batch))
+                label = f"{int(max_batch)}:{max_wait_ms:g}"
+            rate, samples, matched = load(callback, texts, expected, threads, args.seconds)
+            stats = inference.stats("toxicity")
+            batch = f"{stats['mean_batch']:.1f}" if stats else "1.0"
+            baseline = baseline or rate
+            ok &= matched
+            print(f"{threads:>7} {label:>8} {rate:>9.0f} {_percentile(samples, 0.50) * 1e3:>8.2f}"
+                  f" {_percentile(samples, 0.99) * 1e3:>8.2f} {batch:>6} {rate / baseline:>7.1f}x")
+    inference.disable("toxicity")
+    if not ok:
+        print("FAIL: coalesced outputs differ from serial processing")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
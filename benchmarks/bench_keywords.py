@@ -0,0 +1,108 @@
+# benchmarks/bench_keywords.py
+"""
+Keyword-condition benchmark: the shared KeywordEngine against the original
+per-condition implementations (one lower() and one scan per keyword, per condition).
+
+Both sides evaluate all nine keyword conditions on the same response, which is what
+AICallback.process does with the full rule set.
+
+Usage:
+    python -m benchmarks.bench_keywords [--seconds S]
+"""
+import argparse
+import random
+import sys
+import time
+
+from ai_callback import conditions
+from ai_callback.keywords import default_engine
+
+SIZES = {"1KB": 1_000, "10KB": 10_000, "1MB": 1_000_000}
+
+# Keyword lists exactly as they were in the original conditions.py.
+LEGACY_LISTS = [
+    ["invest", "stock", "mutual fund", "crypto", "financial advice"],
+    ["medical advice", "diagnosis", "treatment", "cure", "prescription"],
+    ["legal advice", "lawsuit", "court", "attorney", "lawyer"],
+    ["idiot", "stupid", "hate you", "dumb", "kill yourself", "hell"],
+    ["hello", "hi", "greetings", "hey", "good morning", "good afternoon", "good evening"],
+    ["hack", "exploit", "bypass security", "crack password", "ddos"],
+    ["according to", "studies show", "research indicates", "scientists found", "statistics show"],
+    ["emergency", "911", "urgent", "immediately", "life-threatening", "crisis", "medical emergency", "fire alarm"],
+]
+LEGACY_POSITIVE = ["great", "excellent", "good", "happy", "wonderful"]
+LEGACY_NEGATIVE = ["bad", "terrible", "awful", "poor", "horrible"]
+
+CONDITIONS = [
+    conditions.detect_financial_advice,
+    conditions.detect_medical_advice,
+    conditions.detect_legal_advice,
+    conditions.detect_abuse,
+    conditions.detect_greeting,
+    conditions.detect_harmful_instructions,
+    conditions.detect_factual_claim,
+    conditions.detect_emergency_situation,
+    conditions.detect_sentiment,
+]
+
+VOCAB = (
+    "the model returns a value when data is passed to this function and the system "
+    "will log each request so that users can review output later for quality"
+).split()
+
+
+def legacy_all(response):
+    results = [any(kw in response.lower() for kw in keywords) for keywords in LEGACY_LISTS]
+    text_lower = response.lower()
+    pos = sum(word in text_lower for word in LEGACY_POSITIVE)
+    neg = sum(word in text_lower for word in LEGACY_NEGATIVE)
+    results.append("positive" if pos > neg else "negative" if neg > pos else "neutral")
+    return results
+
+
+def engine_all(response):
+    return [condition(response) for condition in CONDITIONS]
+
+
+def make_text(size, seed=0):
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(VOCAB)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def time_per_call(fn, texts, seconds):
+    # A fresh string per call so the engine cannot reuse a previous scan.
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn(texts[calls % len(texts)])
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return elapsed / calls
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=1.0, help="time budget per measurement")
+    args = parser.parse_args(argv)
+
+    print(f"engine backend: {default_engine.backend}")
+    print(f"{'size':>6} {'legacy':>12} {'engine':>12} {'speedup':>8}")
+    for label, size in SIZES.items():
+        texts = [make_text(size, seed) for seed in range(4)]
+        for text in texts:
+            assert legacy_all(text) == engine_all(text), "engine disagrees with legacy"
+        legacy = time_per_call(legacy_all, texts, args.seconds)
+        engine = time_per_call(engine_all, texts, args.seconds)
+        print(f"{label:>6} {legacy * 1e6:>10.1f}us {engine * 1e6:>10.1f}us {legacy / engine:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
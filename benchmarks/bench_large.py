@@ -0,0 +1,112 @@
+# benchmarks/bench_large.py
+"""
+Large responses: peak memory of process() against process_large() as the response grows.
+
+For each --sizes entry (MB) a response is built from the chat and PII corpora, with an
+abusive word and a financial keyword near the end, and written to a temporary file. Each
+mode then runs in a fresh interpreter so peak RSS (ru_maxrss) belongs to that run alone:
+    process   read the file, callback.process(text), write the result
+    large     callback.process_large(file, output file)
+"import" is the interpreter with ai_callback imported and nothing processed. The
+outputs of the two modes must be identical.
+
+Usage:
+    python -m benchmarks.bench_large [--sizes 1 4 16 64] [--window 65536]
+"""
+import argparse
+import filecmp
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_callback():
+    from ai_callback import actions, conditions
+    from ai_callback.callback import AICallback
+
+    callback = AICallback()
+    callback.add_rule(conditions.detect_financial_advice, actions.add_financial_disclaimer)
+    callback.add_rule(conditions.detect_abuse, actions.redact_abusive_language)
+    callback.add_rule(conditions.detect_medical_advice, actions.add_medical_disclaimer)
+    callback.add_rule(conditions.detect_legal_advice, actions.add_legal_disclaimer)
+    return callback
+
+
+def write_response(path, megabytes):
+    paragraphs = generate("chat", 200) + generate("pii", 200)
+    target = megabytes * 1024 * 1024
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            for paragraph in paragraphs:
+                f.write(paragraph + "\n\n")
+                written += len(paragraph) + 2
+        f.write("In short, do not be stupid about it and invest with care.\n")
+
+
+def child(mode, source, output, window):
+    import resource
+
+    callback = build_callback()
+    start = time.perf_counter()
+    if mode == "process":
+        with open(source, encoding="utf-8") as f:
+            text = f.read()
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(callback.process(text))
+    elif mode == "large":
+        with open(source, encoding="utf-8") as src, open(output, "w", encoding="utf-8") as dst:
+            callback.process_large(src, dst, window)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    print(json.dumps({"rss_mb": rss_mb, "seconds": elapsed}))
+
+
+def run_child(mode, source, output, window):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_large", "--child", mode, source, output,
+         "--window", str(window)],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--window", type=int, default=1 << 16)
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "SOURCE", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child(*args.child, args.window)
+        return 0
+
+    failed = False
+    print(f"{'MB':>4} {'import MB':>10} {'process MB':>11} {'large MB':>9} {'process s':>10} {'large s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "response.txt")
+        outputs = {mode: os.path.join(tmp, f"{mode}.txt") for mode in ("process", "large")}
+        for size in args.sizes:
+            write_response(source, size)
+            results = {mode: run_child(mode, source, os.path.join(tmp, f"{mode}.txt"), args.window)
+                       for mode in ("import", "process", "large")}
+            print(f"{size:>4} {results['import']['rss_mb']:>10.1f} {results['process']['rss_mb']:>11.1f} "
+                  f"{results['large']['rss_mb']:>9.1f} {results['process']['seconds']:>10.2f} "
+                  f"{results['large']['seconds']:>8.2f}")
+            if not filecmp.cmp(outputs["process"], outputs["large"], shallow=False):
+                print(f"FAIL: {size} MB: outputs differ")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
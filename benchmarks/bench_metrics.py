@@ -0,0 +1,81 @@
+# benchmarks/bench_metrics.py
+"""
+Overhead of per-rule metrics on the keyword rules.
+
+Runs the same keyword-only rule set with AICallback(metrics=False) and
+AICallback(metrics=True) over a fixed set of responses, interleaving repeats so
+machine noise hits both sides equally, and reports the best time of each.
+Exits non-zero when the overhead exceeds --budget percent.
+
+Usage:
+    python -m benchmarks.bench_metrics [--budget 2.0] [--size 2000]
+"""
+import argparse
+import random
+import sys
+import time
+
+from ai_callback import actions, conditions
+from ai_callback.callback import AICallback
+
+KEYWORD_RULES = [
+    (conditions.detect_abuse, actions.redact_abusive_language),
+    (conditions.detect_harmful_instructions, actions.redact_entire_text),
+    (conditions.detect_financial_advice, actions.add_financial_disclaimer),
+    (conditions.detect_medical_advice, actions.add_medical_disclaimer),
+    (conditions.detect_legal_advice, actions.add_legal_disclaimer),
+]
+
+WORDS = ("the model said that markets move quickly and your health matters when you read a "
+         "contract carefully before you invest in stocks or see a doctor about symptoms").split()
+
+
+def build(metrics):
+    callback = AICallback(metrics=metrics)
+    for condition, action in KEYWORD_RULES:
+        callback.add_rule(condition, action)
+    return callback
+
+
+def corpus(size, count=200, seed=0):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = []
+        while sum(len(w) + 1 for w in words) < size:
+            words.append(rng.choice(WORDS))
+        texts.append(" ".join(words))
+    return texts
+
+
+def run(callback, texts):
+    start = time.perf_counter()
+    for text in texts:
+        callback.process(text)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget", type=float, default=2.0, help="allowed overhead in percent")
+    parser.add_argument("--size", type=int, default=2000, help="response length in characters")
+    parser.add_argument("--repeats", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    texts = corpus(args.size)
+    plain, measured = build(False), build(True)
+    best = {False: float("inf"), True: float("inf")}
+    for _ in range(args.repeats):
+        for enabled, callback in ((False, plain), (True, measured)):
+            best[enabled] = min(best[enabled], run(callback, texts))
+
+    per_call = {k: v / len(texts) * 1e6 for k, v in best.items()}
+    overhead = (best[True] / best[False] - 1) * 100
+    print(f"metrics off  {per_call[False]:8.2f} us per response")
+    print(f"metrics on   {per_call[True]:8.2f} us per response")
+    print(f"overhead     {overhead:+8.2f} % (budget {args.budget:.1f} %)")
+    return 0 if overhead <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# benchmarks/bench_parallel.py
+"""
+Throughput of CallbackPool from 1 to N worker processes.
+
+A CPU-bound stand-in for the toxicity model (pure Python, roughly --work-ms per
+call) is registered through ai_callback.models, so the run needs no transformers
+install. Each pool's output is checked against serial callback.process.
+
+Usage:
+    python -m benchmarks.bench_parallel [--max-workers 8] [--responses 400]
+"""
+import argparse
+import os
+import sys
+import time
+
+from ai_callback import actions, conditions
+from ai_callback.callback import AICallback
+from ai_callback.parallel import CallbackPool
+from benchmarks.stubs import use_stub_toxicity
+
+
+def build():
+    callback = AICallback()
+    callback.add_rule(conditions.detect_abuse, actions.redact_abusive_language)
+    callback.add_rule(conditions.detect_toxicity, actions.redact_entire_text)
+    callback.add_rule(conditions.detect_financial_advice, actions.add_financial_disclaimer)
+    return callback
+
+
+def corpus(n):
+    samples = ["You should invest in stocks.", "I hate you, idiot.", "Have a nice day!",
+               "The weather is mild and dry."]
+    return [f"{samples[i % len(samples)]} (#{i})" for i in range(n)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--responses", type=int, default=400)
+    parser.add_argument("--work-ms", type=float, default=5.0)
+    parser.add_argument("--chunksize", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    use_stub_toxicity(args.work_ms)
+    callback = build()
+    responses = corpus(args.responses)
+
+    start = time.perf_counter()
+    expected = [callback.process(r) for r in responses]
+    serial = args.responses / (time.perf_counter() - start)
+    print(f"serial      {serial:8.1f} responses/s")
+
+    counts = sorted({2 ** i for i in range(args.max_workers.bit_length())} | {args.max_workers})
+    ok = True
+    for workers in counts:
+        with CallbackPool(callback, workers=workers, chunksize=args.chunksize) as pool:
+            pool.map(responses[:workers])  # let every worker start up
+            start = time.perf_counter()
+            outputs = pool.map(responses)
+            rate = args.responses / (time.perf_counter() - start)
+        ok &= outputs == expected
+        print(f"{workers:2d} workers  {rate:8.1f} responses/s  ({rate / serial:.2f}x serial)"
+              f"  in order: {outputs == expected}")
+    print(f"({os.cpu_count()} CPU(s) available)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
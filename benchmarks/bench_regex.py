@@ -0,0 +1,102 @@
+# benchmarks/bench_regex.py
+"""
+Worst-case regression benchmark for the regex-based rules.
+
+Runs detect_pii, detect_url, detect_citation_needed and detect_weather_query on
+adversarial inputs built to trigger backtracking or per-position restarts, at two
+sizes four times apart. Linear matching takes about 4x longer on the larger input;
+the benchmark exits with status 1 if any input grows by more than --max-growth.
+
+The original per-call regexes are timed on the same inputs, at the same two sizes,
+for comparison; some of them are quadratic, so keep --size moderate.
+
+Usage:
+    python -m benchmarks.bench_regex [--size N] [--max-growth G]
+"""
+import argparse
+import re
+import sys
+import time
+
+from ai_callback import conditions
+
+ADVERSARIAL = {
+    "url restarts": lambda n: "http://" * (n // 7),
+    "email local restarts": lambda n: "a." * (n // 2) + "@",
+    "email domain backtrack": lambda n: "x@" + "a." * (n // 2),
+    "years without 'found that'": lambda n: "1999 " * (n // 5),
+    "'according to' repeats": lambda n: "according to " * (n // 13),
+    "long digit run": lambda n: "9" * n,
+    "weather whitespace": lambda n: ("weather" + " " * 50) * (n // 57),
+}
+
+# The detectors as they were before the shared regex set.
+LEGACY_PII = [
+    r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
+    r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b",
+    r"\b\d{3}-?\d{2}-?\d{4}\b",
+    r"\b\d{4}[-. ]?\d{4}[-. ]?\d{4}[-. ]?\d{4}\b",
+]
+LEGACY_URL = r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+"
+LEGACY_CITATION = [
+    r"research shows",
+    r"studies indicate",
+    r"according to .{3,30}",
+    r"\d{4}.*found that",
+    r"scientists discovered",
+]
+LEGACY_WEATHER = r"(weather|climate)\s+(in\s+)?([A-Z][a-z]+)"
+
+
+def legacy_all(text):
+    return (
+        any(re.search(p, text) for p in LEGACY_PII),
+        bool(re.search(LEGACY_URL, text)),
+        any(re.search(p, text, re.IGNORECASE) for p in LEGACY_CITATION),
+        bool(re.search(LEGACY_WEATHER, text)),
+    )
+
+
+def current_all(text):
+    return (
+        conditions.detect_pii(text),
+        conditions.detect_url(text),
+        conditions.detect_citation_needed(text),
+        conditions.detect_weather_query(text),
+    )
+
+
+def timed(fn, text):
+    start = time.perf_counter()
+    result = fn(text)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=5_000, help="smaller input size in characters")
+    parser.add_argument("--max-growth", type=float, default=8.0)
+    args = parser.parse_args(argv)
+
+    failed = False
+    print(f"{'input':<28} {'n':>9} {'4n':>9} {'growth':>7}   {'legacy n':>9} {'legacy 4n':>9} {'growth':>7}")
+    for name, build in ADVERSARIAL.items():
+        small_s, small_result = timed(current_all, build(args.size))
+        large_s, _ = timed(current_all, build(args.size * 4))
+        legacy_small_s, legacy_result = timed(legacy_all, build(args.size))
+        legacy_large_s, _ = timed(legacy_all, build(args.size * 4))
+        growth = large_s / max(small_s, 1e-9)
+        legacy_growth = legacy_large_s / max(legacy_small_s, 1e-9)
+        flag = ""
+        if growth > args.max_growth:
+            failed = True
+            flag = "  <-- superlinear"
+        print(f"{name:<28} {small_s * 1e3:>7.1f}ms {large_s * 1e3:>7.1f}ms {growth:>6.1f}x   "
+              f"{legacy_small_s * 1e3:>7.1f}ms {legacy_large_s * 1e3:>7.1f}ms {legacy_growth:>6.1f}x{flag}")
+        if small_result != legacy_result:
+            print(f"{'':<28} note: result differs from legacy: {small_result} vs {legacy_result}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
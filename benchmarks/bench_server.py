@@ -0,0 +1,142 @@
+# benchmarks/bench_server.py
+"""
+Load generator for ai_callback.server: throughput and tail latency per batching setting.
+
+For each --settings entry (max_batch:max_wait_ms) a CallbackServer running the stock
+rules plus detect_toxicity is started in a separate process on a Unix socket. Then
+--concurrency client threads send responses from the synthetic corpus back to back for
+--seconds. The report gives:
+    req/s        completed requests per second
+    p50/p99 ms   client-side latency
+    batch        mean batch size the server ran
+    rejected     requests answered 503 (queue full)
+"1:0" is the unbatched baseline: every request runs alone.
+
+By default the model is a stub (benchmarks/stubs.py) with a fixed --call-ms cost per
+model call plus --work-ms per text, so batching amortizes the per-call part as a real
+forward pass would. Use --real-model for toxic-bert.
+
+Usage:
+    python -m benchmarks.bench_server [--settings 1:0 8:2 32:5] [--concurrency 8 32] [--seconds 3]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from ai_callback import actions, conditions
+from ai_callback.batching import Overloaded
+from ai_callback.callback import AICallback
+from ai_callback.server import CallbackClient, CallbackServer
+from benchmarks.corpus import corpus
+from benchmarks.run import _percentile
+from benchmarks.stubs import use_stub_toxicity
+
+RULES = [
+    (conditions.detect_financial_advice, actions.add_financial_disclaimer),
+    (conditions.detect_medical_advice, actions.add_medical_disclaimer),
+    (conditions.detect_abuse, actions.redact_abusive_language),
+    (conditions.detect_toxicity, actions.redact_entire_text),
+]
+
+
+def _serve(path, max_batch, max_wait_ms, max_queue, model):
+    if model is not None:
+        use_stub_toxicity(*model)
+    callback = AICallback()
+    for condition, action in RULES:
+        callback.add_rule(condition, action)
+    CallbackServer(callback, path, max_batch, max_wait_ms, max_queue).serve_forever()
+
+
+def _wait_ready(client, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return client.stats()
+        except (OSError, ConnectionError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def load(client, texts, concurrency, seconds):
+    latencies, rejected = [], [0]
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def worker(offset):
+        mine, i = [], offset
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter_ns()
+            try:
+                client.process(texts[i % len(texts)])
+            except Overloaded:
+                with lock:
+                    rejected[0] += 1
+                continue
+            mine.append(time.perf_counter_ns() - t0)
+            i += concurrency
+        client.close()
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sorted(latencies), rejected[0], time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--settings", nargs="+", default=["1:0", "8:2", "32:5", "64:10"],
+                        help="max_batch:max_wait_ms pairs")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--max-queue", type=int, default=256)
+    parser.add_argument("--call-ms", type=float, default=5.0, help="stub CPU time per model call")
+    parser.add_argument("--work-ms", type=float, default=0.2, help="stub CPU time per text")
+    parser.add_argument("--real-model", action="store_true")
+    args = parser.parse_args(argv)
+
+    settings = []
+    for entry in args.settings:
+        batch, _, wait = entry.partition(":")
+        settings.append((int(batch), float(wait or 0)))
+    texts = [text for texts in corpus(100).values() for text in texts]
+    model = None if args.real_model else (args.work_ms, None, args.call_ms)
+    context = multiprocessing.get_context("spawn")
+
+    print(f"{'batch:wait':<11} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'batch':>6} {'rejected':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for max_batch, max_wait_ms in settings:
+            path = os.path.join(tmp, f"server-{max_batch}-{max_wait_ms}.sock")
+            server = context.Process(target=_serve, args=(path, max_batch, max_wait_ms, args.max_queue, model),
+                                     daemon=True)
+            server.start()
+            try:
+                client = CallbackClient(path)
+                for concurrency in args.concurrency:
+                    before = _wait_ready(client)
+                    latencies, rejected, elapsed = load(client, texts, concurrency, args.seconds)
+                    after = client.stats()
+                    batches = after["batches"] - before["batches"]
+                    mean_batch = (after["items"] - before["items"]) / batches if batches else 0.0
+                    setting = f"{max_batch}:{max_wait_ms:g}"
+                    print(f"{setting:<11} {concurrency:>7} {len(latencies) / elapsed:>8.0f} "
+                          f"{_percentile(latencies, 0.5) / 1e6:>8.2f} {_percentile(latencies, 0.99) / 1e6:>8.2f} "
+                          f"{mean_batch:>6.1f} {rejected:>9}")
+            finally:
+                server.terminate()
+                server.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
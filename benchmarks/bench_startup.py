@@ -0,0 +1,120 @@
+# benchmarks/bench_startup.py
+"""
+Worker startup: building a rule set from its spec against loading the compiled artifact.
+
+A synthetic spec (the stock rules plus --keyword-rules keyword lists and --pattern-rules
+regexes, seeded) is written to a temporary directory and compiled once. Each scenario
+then runs in a fresh interpreter, like a newly started worker, and times:
+    import  importing ai_callback.ruleset (shared by both scenarios)
+    build   cold: compile_ruleset(spec).callback(); artifact: load_ruleset(path).callback()
+    first   the first process() call
+Both scenarios must produce the same output for the probe response.
+
+Model loading is not included: the spec has no model-backed rules, and models are
+shared across workers by CallbackPool's preload instead.
+
+Usage:
+    python -m benchmarks.bench_startup [--keyword-rules 200] [--pattern-rules 50] [--repeat 10]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from ai_callback.ruleset import compile_ruleset
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STOCK = [
+    ("detect_financial_advice", "add_financial_disclaimer"),
+    ("detect_medical_advice", "add_medical_disclaimer"),
+    ("detect_legal_advice", "add_legal_disclaimer"),
+    ("detect_abuse", "redact_abusive_language"),
+    ("detect_weather_query", "append_weather_info"),
+    ("detect_incomplete_response", "handle_incomplete_response"),
+]
+
+_PROBE = """
+import hashlib, json, os, time
+os.environ.pop("OPENWEATHER_API_KEY", None)
+t0 = time.perf_counter()
+from ai_callback.ruleset import compile_ruleset, load_ruleset
+t1 = time.perf_counter()
+{build}
+t2 = time.perf_counter()
+out = callback.process({probe!r})
+t3 = time.perf_counter()
+print(json.dumps({{"import": t1 - t0, "build": t2 - t1, "first": t3 - t2,
+                  "output": hashlib.sha1(out.encode()).hexdigest()}}))
+"""
+
+SCENARIOS = {
+    "cold": "spec = json.load(open({spec!r}))\ncallback = compile_ruleset(spec).callback()",
+    "artifact": "callback = load_ruleset({artifact!r}).callback()",
+}
+
+
+def make_spec(keyword_rules, pattern_rules, seed=0):
+    rng = random.Random(seed)
+    vocabulary = sorted({
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 10)))
+        for _ in range(keyword_rules * 30)
+    })
+    spec = {"keywords": {}, "patterns": {}, "rules": []}
+    for condition, action in STOCK:
+        spec["rules"].append({"condition": condition, "action": action})
+    for i in range(keyword_rules):
+        name = f"topic_{i}"
+        spec["keywords"][name] = rng.sample(vocabulary, 25)
+        spec["rules"].append({"condition": {"keywords": name}, "action": {"append": f"\n\n[Note {i}]"}})
+    for i in range(pattern_rules):
+        name = f"id_{i}"
+        prefix = rng.choice(vocabulary).upper()
+        spec["patterns"][name] = rf"\b{prefix}-\d{{4,8}}(?:/[A-Z]{{2,4}})?\b"
+        spec["rules"].append({"condition": {"pattern": name}, "action": {"redact": name, "with": f"[ID {i}]"}})
+    probe = " ".join(rng.sample(vocabulary, 40)) + f" {prefix}-123456/AB You should invest."
+    return spec, probe
+
+
+def run(scenario, paths, probe):
+    code = _PROBE.format(build=SCENARIOS[scenario].format(**paths), probe=probe)
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    return json.loads(out.stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--keyword-rules", type=int, default=200)
+    parser.add_argument("--pattern-rules", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    spec, probe = make_spec(args.keyword_rules, args.pattern_rules)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {"spec": os.path.join(tmp, "spec.json"), "artifact": os.path.join(tmp, "rules.bin")}
+        with open(paths["spec"], "w", encoding="utf-8") as f:
+            json.dump(spec, f)
+        compile_ruleset(spec).save(paths["artifact"])
+        print(f"{len(spec['rules'])} rules, artifact {os.path.getsize(paths['artifact']) / 1024:.0f} KiB")
+
+        results = {name: [run(name, paths, probe) for _ in range(args.repeat)] for name in SCENARIOS}
+
+    outputs = {r["output"] for runs in results.values() for r in runs}
+    print(f"{'scenario':<10} {'import ms':>10} {'build ms':>10} {'first ms':>10} {'total ms':>10}")
+    for name, runs in results.items():
+        cols = {key: statistics.median(r[key] for r in runs) * 1e3 for key in ("import", "build", "first")}
+        total = sum(cols.values())
+        print(f"{name:<10} {cols['import']:>10.1f} {cols['build']:>10.1f} {cols['first']:>10.1f} {total:>10.1f}")
+    if len(outputs) != 1:
+        print("FAIL: cold and artifact callbacks produced different output")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# benchmarks/bench_tenants.py
+"""
+Memory and throughput of many tenants: one compiled rule set each against a TenantRegistry.
+
+--tenants seeded specs are generated. Each one mixes a random subset of the stock rules,
+a few keyword lists drawn from a shared pool (tenants overlap, as when they start from
+the same templates), a toxicity threshold and one tenant-specific keyword list.
+    separate   compile_ruleset(spec).callback() per tenant; every response goes through
+               every tenant's callback.process
+    registry   TenantRegistry.add_tenant per tenant; every response goes through
+               registry.process, which shares condition results between tenants
+Memory is the traced Python allocation (tracemalloc) while building the tenants.
+detect_toxicity uses the local stub (benchmarks/stubs.py), and both scenarios must
+produce the same output for every tenant and response.
+
+Usage:
+    python -m benchmarks.bench_tenants [--tenants 1000] [--responses 50] [--work-ms 0.5]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from ai_callback.ruleset import compile_ruleset
+from ai_callback.tenants import TenantRegistry
+from benchmarks.corpus import CATEGORIES, generate
+from benchmarks.stubs import use_stub_toxicity
+
+STOCK = [
+    ("detect_financial_advice", "add_financial_disclaimer"),
+    ("detect_medical_advice", "add_medical_disclaimer"),
+    ("detect_legal_advice", "add_legal_disclaimer"),
+    ("detect_abuse", "redact_abusive_language"),
+    ("detect_incomplete_response", "handle_incomplete_response"),
+    ("detect_emergency_situation", "add_medical_disclaimer"),
+]
+
+
+def make_specs(tenants, seed=0, pool_size=40):
+    rng = random.Random(seed)
+    words = sorted({
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9)))
+        for _ in range(2000)
+    }) + ["invest", "refund", "weather", "doctor", "lawyer", "great", "terrible", "password"]
+    pool = [rng.sample(words, 20) for _ in range(pool_size)]
+    notes = [f"\n\n[Policy note {i}]" for i in range(10)]
+    specs = []
+    for t in range(tenants):
+        spec = {"keywords": {}, "patterns": {"ticket": r"\bTCK-\d{6}\b"}, "rules": []}
+        for condition, action in rng.sample(STOCK, rng.randint(3, len(STOCK))):
+            spec["rules"].append({"condition": condition, "action": action})
+        for i in rng.sample(range(pool_size), 3):
+            spec["keywords"][f"pool_{i}"] = pool[i]
+            spec["rules"].append({"condition": {"keywords": f"pool_{i}"}, "action": {"append": rng.choice(notes)}})
+        spec["keywords"]["own"] = rng.sample(words, 10)
+        spec["rules"].append({"condition": {"keywords": "own"}, "action": {"append": f"\n\n[Tenant {t}]"}})
+        spec["rules"].append({"condition": {"pattern": "ticket"}, "action": {"redact": "ticket", "with": "[TICKET]"}})
+        spec["rules"].append({"condition": {"toxicity": rng.choice([0.5, 0.7, 0.9])},
+                              "action": "redact_entire_text"})
+        specs.append(spec)
+    return specs
+
+
+def build_separate(specs):
+    return [compile_ruleset(spec).callback() for spec in specs]
+
+
+def build_registry(specs):
+    registry = TenantRegistry()
+    for t, spec in enumerate(specs):
+        registry.add_tenant(t, spec)
+    return registry
+
+
+def traced(build, specs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    built = build(specs)
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, size, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tenants", type=int, default=1000)
+    parser.add_argument("--responses", type=int, default=50)
+    parser.add_argument("--work-ms", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    use_stub_toxicity(args.work_ms)
+    specs = make_specs(args.tenants)
+    texts = [text for category in CATEGORIES for text in generate(category, args.responses // len(CATEGORIES))]
+    # Give the tenant-specific and pooled lists, the ticket pattern and the stub something to hit.
+    texts = [f"{text} Ticket TCK-{i:06d}. {'I hate this.' if i % 7 == 0 else ''}"
+             f" {specs[i % len(specs)]['keywords']['own'][0]}" for i, text in enumerate(texts)]
+
+    callbacks, separate_bytes, separate_build = traced(build_separate, specs)
+    registry, registry_bytes, registry_build = traced(build_registry, specs)
+    for callback in callbacks:  # both sides start with scheduled rules
+        callback._scheduled_rules()
+
+    start = time.perf_counter()
+    expected = [[callback.process(text) for callback in callbacks] for text in texts]
+    separate_rate = len(texts) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    outputs = [registry.process(text) for text in texts]
+    registry_rate = len(texts) / (time.perf_counter() - start)
+
+    ok = all([out[t] for t in range(len(specs))] == exp for out, exp in zip(outputs, expected))
+    stats = registry.stats()
+    per_tenant = [registry.footprint(t)["total"] for t in registry.tenants]
+    total = registry.footprint()
+
+    print(f"{args.tenants} tenants, {len(texts)} responses, keyword backend {registry.engine.backend}")
+    print(f"{'scenario':<10} {'build s':>8} {'memory MiB':>11} {'KiB/tenant':>11} {'responses/s':>12}")
+    for name, build, size, rate in (("separate", separate_build, separate_bytes, separate_rate),
+                                    ("registry", registry_build, registry_bytes, registry_rate)):
+        print(f"{name:<10} {build:>8.2f} {size / 2**20:>11.1f} {size / 1024 / args.tenants:>11.1f} {rate:>12.1f}")
+    print(f"memory {separate_bytes / registry_bytes:.1f}x smaller, throughput {registry_rate / separate_rate:.1f}x")
+    print(f"shared: {stats['callbacks']} callbacks, {stats['rules']} rules, {stats['conditions']} conditions, "
+          f"{stats['actions']} actions, {stats['keyword_lists']} keyword lists, {stats['patterns']} patterns")
+    print(f"conditions evaluated {stats['evaluations']}, reused {stats['reused']}")
+    print(f"footprint per tenant: median {statistics.median(per_tenant) / 1024:.1f} KiB, "
+          f"max {max(per_tenant) / 1024:.1f} KiB; keyword engine {total['engine'] / 1024:.0f} KiB")
+    if not ok:
+        print("FAIL: the registry's outputs differ from the separate callbacks'")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+# benchmarks/bench_timing.py
+"""
+What an active request timer adds to process().
+
+A timer makes process() record a span per rule (see ai_callback.time_tracking). This
+times the same callback with and without one. That timings stay per request across
+threads and asyncio tasks is checked by tests/test_time_tracking.py.
+
+Usage:
+    python -m benchmarks.bench_timing [--calls 20000]
+"""
+import argparse
+import sys
+import time
+
+from ai_callback.actions import add_financial_disclaimer
+from ai_callback.callback import AICallback
+from ai_callback.conditions import detect_financial_advice
+from ai_callback.time_tracking import always_true_condition, append_time_taken, start_time_tracking
+
+
+def build():
+    callback = AICallback()
+    callback.add_rule(detect_financial_advice, add_financial_disclaimer)
+    callback.add_rule(always_true_condition, append_time_taken)
+    return callback
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    callback = build()
+    text = "You should buy stocks. " * 20
+    n = args.calls
+    start = time.perf_counter()
+    for _ in range(n):
+        callback.process(text)
+    untimed = (time.perf_counter() - start) / n * 1e6
+    start_time_tracking()
+    start = time.perf_counter()
+    for _ in range(n):
+        callback.process(text)
+    timed = (time.perf_counter() - start) / n * 1e6
+    print(f"process()      {untimed:.2f} us without a timer, {timed:.2f} us with one")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
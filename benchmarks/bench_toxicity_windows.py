@@ -0,0 +1,104 @@
+# benchmarks/bench_toxicity_windows.py
+"""
+Long-response toxicity: one truncated model call against sliding windows.
+
+Builds long responses (seeded) from the synthetic chat corpus and plants one abusive
+sentence at a random position in half of them. Each scoring mode reports:
+    recall      planted responses flagged
+    false pos   clean responses flagged
+    windows     model inputs per response
+    ms/resp     wall time per response
+"single" is the old behaviour: the whole text in one call, which a 512-token model
+truncates. The windowed modes use conditions.toxicity_scores at several strides.
+
+By default the model is a stub (benchmarks/stubs.py) that only sees its first 512
+words and burns --work-ms per input. Use --real-model for toxic-bert.
+
+Usage:
+    python -m benchmarks.bench_toxicity_windows [--tokens 3000] [--strides 128 256 384 510]
+"""
+import argparse
+import random
+import sys
+import time
+
+from ai_callback import conditions
+from ai_callback.models import get_model
+from benchmarks.corpus import generate
+from benchmarks.stubs import use_stub_toxicity
+
+PLANTED = "Honestly, I hate you and everyone like you."
+
+
+def responses(count, tokens, seed=0):
+    rng = random.Random(seed)
+    sentences = generate("chat", 500, seed)
+    texts, planted = [], []
+    for i in range(count):
+        words = []
+        while len(words) < tokens:
+            words.extend(rng.choice(sentences).replace("hate", "like").split())
+        words = words[:tokens]
+        toxic = i % 2 == 0
+        if toxic:
+            words.insert(rng.randrange(len(words)), PLANTED)
+        texts.append(" ".join(words))
+        planted.append(toxic)
+    return texts, planted
+
+
+def run_mode(texts, planted, score):
+    start = time.perf_counter()
+    flags, windows = [], 0
+    for text in texts:
+        flagged, used = score(text)
+        flags.append(flagged)
+        windows += used
+    elapsed = time.perf_counter() - start
+    toxic = sum(planted)
+    return {
+        "recall": sum(f and p for f, p in zip(flags, planted)) / toxic,
+        "false_pos": sum(f and not p for f, p in zip(flags, planted)),
+        "windows": windows / len(texts),
+        "ms": elapsed / len(texts) * 1e3,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=40)
+    parser.add_argument("--tokens", type=int, default=3000, help="words per response")
+    parser.add_argument("--strides", type=int, nargs="+", default=[128, 256, 384, 510])
+    parser.add_argument("--work-ms", type=float, default=2.0, help="stub CPU time per model input")
+    parser.add_argument("--real-model", action="store_true")
+    args = parser.parse_args(argv)
+
+    if not args.real_model:
+        use_stub_toxicity(args.work_ms, max_tokens=512)
+    model = get_model("toxicity")
+    texts, planted = responses(args.count, args.tokens)
+
+    def single(text):
+        return conditions._is_toxic(model(text, truncation=True)), 1
+
+    def windowed(stride):
+        def score(text):
+            windows = conditions._windows(model, text, conditions.TOXICITY_WINDOW_TOKENS, stride)
+            scores = conditions.toxicity_scores(text, stride=stride)
+            return scores.get("toxic", 0.0) > 0.7, len(windows)
+        return score
+
+    modes = {"single": single}
+    for stride in args.strides:
+        modes[f"stride {stride}"] = windowed(stride)
+
+    print(f"{args.count} responses of {args.tokens} words, half with one planted toxic sentence")
+    print(f"{'mode':<12} {'recall':>7} {'false pos':>10} {'windows':>8} {'ms/resp':>9}")
+    for name, score in modes.items():
+        r = run_mode(texts, planted, score)
+        print(f"{name:<12} {r['recall']:>7.0%} {r['false_pos']:>10} {r['windows']:>8.1f} {r['ms']:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# benchmarks/bench_weather.py
+"""
+WeatherClient against a local stand-in for the OpenWeather API.
+
+The stand-in server answers like the real endpoint and can inject latency and
+failures per city, so the run needs no API key or network. Scenarios:
+
+    cold misses     many threads ask for the same uncached city at once
+    connection reuse distinct cities fetched one after another
+    warm hits       repeated lookups served from cache
+    slow upstream   expired entry while the upstream takes longer than the read timeout
+    failures        HTTP 500 and a hanging upstream for an uncached city
+
+Usage:
+    python -m benchmarks.bench_weather
+"""
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from ai_callback.weather import WeatherClient
+
+
+class StandInServer:
+    """OpenWeather look-alike. `latency` and `status` map city -> injected behaviour."""
+
+    def __init__(self):
+        self.latency = {}
+        self.status = {}
+        self.requests = 0
+        self.connections = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.requests += 1
+                server.connections.add(self.client_address)
+                city = parse_qs(urlparse(self.path).query)["q"][0]
+                time.sleep(server.latency.get(city, 0.0))
+                status = server.status.get(city, 200)
+                if status == 200:
+                    payload = {"cod": 200, "main": {"temp": 21.5}, "weather": [{"description": "clear sky"}]}
+                else:
+                    payload = {"cod": str(status), "message": "injected failure"}
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/data/2.5/weather"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main(argv=None):
+    server = StandInServer()
+    clock = FakeClock()
+    client = WeatherClient("test-key", base_url=server.url, connect_timeout=0.5, read_timeout=0.5,
+                           ttl=60, max_stale=600, clock=clock)
+
+    server.latency["Berlin"] = 0.2
+    with ThreadPoolExecutor(32) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(client.get, ["Berlin"] * 32))
+        elapsed = (time.perf_counter() - start) * 1000
+    print(f"cold misses       32 callers, {client.upstream_calls} upstream call(s), {elapsed:.0f} ms, "
+          f"all equal: {len(set(results)) == 1}")
+
+    server.connections.clear()
+    for i in range(20):
+        client.get(f"City{i}")
+    print(f"connection reuse  20 distinct cities over {len(server.connections)} TCP connection(s)")
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        client.get("Berlin")
+    per_hit = (time.perf_counter() - start) / 10_000 * 1e6
+    print(f"warm hits         {per_hit:.1f} us per lookup")
+
+    clock.now += 120  # past the TTL, within max_stale
+    server.latency["Berlin"] = 2.0
+    ms, result = timed(client.get, "Berlin")
+    print(f"slow upstream     stale entry served in {ms:.1f} ms: {result!r}")
+
+    server.status["Atlantis"] = 500
+    ms, result = timed(client.get, "Atlantis")
+    print(f"failures          HTTP 500 answered in {ms:.0f} ms: {result!r}")
+    server.latency["Nowhere"] = 5.0
+    ms, result = timed(client.get, "Nowhere")
+    print(f"                  hanging upstream answered in {ms:.0f} ms: {result[:60]!r}")
+    server.httpd.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
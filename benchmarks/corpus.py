@@ -0,0 +1,163 @@
+# benchmarks/corpus.py
+"""
+Seeded synthetic corpus of LLM responses for benchmarking the rule library.
+
+Categories:
+    chat          short conversational replies (1-4 sentences), some touching the
+                  financial/medical/legal/weather/abuse rules
+    code          long answers with prose and fenced code blocks
+    pii           text dense with emails, phone numbers, SSNs, card numbers and URLs
+    multilingual  replies mixing Latin, Cyrillic, CJK, Arabic scripts and emoji
+
+The same (category, count, seed) always yields the same texts, so numbers are
+comparable between commits.
+
+Usage:
+    from benchmarks.corpus import generate
+    texts = generate("chat", 200, seed=0)
+"""
+import random
+
+CATEGORIES = ("chat", "code", "pii", "multilingual")
+
+_CHAT_OPENERS = ["Sure!", "Hello there.", "Good morning!", "Great question.", "Thanks for asking.",
+                 "Hmm, let me think.", "Of course."]
+_CHAT_SENTENCES = [
+    "You could invest a small amount in index funds or a mutual fund.",
+    "Crypto prices are volatile, so be careful with stock picks.",
+    "A doctor can give you a proper diagnosis and treatment plan.",
+    "If the pain persists, ask about a prescription.",
+    "You may want to talk to an attorney before filing a lawsuit.",
+    "The court will decide on the matter next month.",
+    "The weather in Paris is usually mild in spring.",
+    "What is the climate in Berlin like right now?",
+    "That was a stupid idea, honestly.",
+    "I hate you for asking that.",
+    "Here is a summary of the main points.",
+    "Let me know if you need anything else.",
+    "Studies show that regular sleep improves memory.",
+    "In 2019 researchers found that the effect was small.",
+    "Is there anything else I can help with?",
+    "The results were excellent and everyone was happy.",
+    "The service was terrible and the food was awful.",
+]
+
+_CODE_PROSE = [
+    "Here's a function that does what you asked.",
+    "The loop below walks the list once, so it runs in linear time.",
+    "Note that the exception is re-raised after logging.",
+    "You can adapt the parameters to your use case.",
+    "This version avoids the extra copy of the input.",
+]
+_IDENTIFIERS = ["items", "result", "value", "total", "index", "node", "buffer", "count", "key", "data"]
+_FUNCTIONS = ["process", "parse", "merge", "compute", "load", "render", "validate", "flush"]
+
+_NAMES = ["alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi"]
+_DOMAINS = ["example.com", "mail.test", "corp.example.org", "uni.edu"]
+_PII_TEMPLATES = [
+    "Contact {name} at {email} or call {phone}.",
+    "The SSN on file is {ssn}.",
+    "Charge the card {card} for the renewal.",
+    "Documentation lives at {url} and the backup at {url2}.",
+    "Send the invoice to {email}; the customer's phone is {phone}.",
+    "Account owner: {name}, card ending {card}, SSN {ssn}.",
+]
+
+_MULTILINGUAL = [
+    "Hola, ¿cómo estás? El tiempo en Madrid es soleado.",
+    "Guten Morgen! Das Wetter in München ist heute schön.",
+    "Bonjour, je peux vous aider avec votre question.",
+    "Привет! Я могу помочь вам с этим вопросом.",
+    "こんにちは。今日はいい天気ですね。",
+    "你好，我可以帮你解决这个问题。",
+    "مرحبا، كيف يمكنني مساعدتك اليوم؟",
+    "नमस्ते, मैं आपकी कैसे मदद कर सकता हूँ?",
+    "Olá! Posso ajudar com investimentos em ações.",
+    "Thanks! 🙂 Let me know if that works 👍",
+    "Ciao, il medico può darti una diagnosi.",
+]
+
+
+def _chat(rng):
+    parts = [rng.choice(_CHAT_OPENERS)] if rng.random() < 0.6 else []
+    parts += rng.sample(_CHAT_SENTENCES, rng.randint(1, 4))
+    text = " ".join(parts)
+    if rng.random() < 0.1:
+        text = text.rstrip(".!?") + " and then"
+    return text
+
+
+def _code_block(rng):
+    fn = rng.choice(_FUNCTIONS)
+    var, other = rng.sample(_IDENTIFIERS, 2)
+    lines = [f"def {fn}_{var}({var}, {other}=None):", f'    """{fn.capitalize()} the {var}."""',
+             "    result = []"]
+    for _ in range(rng.randint(10, 60)):
+        a, b = rng.sample(_IDENTIFIERS, 2)
+        lines.append(rng.choice([
+            f"    for {a} in {b}:",
+            f"        result.append({a} * {rng.randint(2, 9)})",
+            f"    if {a} is None:",
+            f"        {a} = {b}.get('{rng.choice(_IDENTIFIERS)}', {rng.randint(0, 99)})",
+            f"    {a} = sorted({b}, key=len)",
+            f"    # {rng.choice(_CODE_PROSE)}",
+        ]))
+    lines.append("    return result")
+    return "```python\n" + "\n".join(lines) + "\n```"
+
+
+def _code(rng):
+    parts = []
+    for _ in range(rng.randint(1, 3)):
+        parts.append(" ".join(rng.sample(_CODE_PROSE, rng.randint(1, 3))))
+        parts.append(_code_block(rng))
+    parts.append(rng.choice(_CODE_PROSE))
+    return "\n\n".join(parts)
+
+
+def _pii(rng):
+    def digits(n):
+        return "".join(str(rng.randint(0, 9)) for _ in range(n))
+
+    sentences = []
+    for _ in range(rng.randint(3, 8)):
+        name = rng.choice(_NAMES)
+        sentences.append(rng.choice(_PII_TEMPLATES).format(
+            name=name.capitalize(),
+            email=f"{name}.{digits(3)}@{rng.choice(_DOMAINS)}",
+            phone=f"{digits(3)}-{digits(3)}-{digits(4)}",
+            ssn=f"{digits(3)}-{digits(2)}-{digits(4)}",
+            card=" ".join(digits(4) for _ in range(4)),
+            url=f"https://{rng.choice(_DOMAINS)}/{rng.choice(_IDENTIFIERS)}/{digits(5)}",
+            url2=f"http://{rng.choice(_DOMAINS)}/{rng.choice(_IDENTIFIERS)}?id={digits(6)}",
+        ))
+    return " ".join(sentences)
+
+
+def _multilingual(rng):
+    return " ".join(rng.choice(_MULTILINGUAL) for _ in range(rng.randint(2, 6)))
+
+
+_GENERATORS = {"chat": _chat, "code": _code, "pii": _pii, "multilingual": _multilingual}
+
+
+def generate(category, count, seed=0):
+    """
+    Generate `count` synthetic responses of one category.
+
+    Args:
+        category (str): One of CATEGORIES.
+        count (int): Number of responses.
+        seed (int): Seed; each category draws from its own stream.
+
+    Returns:
+        list[str]: The responses.
+    """
+    rng = random.Random(f"{seed}:{category}")
+    make = _GENERATORS[category]
+    return [make(rng) for _ in range(count)]
+
+
+def corpus(count=200, seed=0, categories=CATEGORIES):
+    """Return {category: generate(category, count, seed)} for each category."""
+    return {category: generate(category, count, seed) for category in categories}
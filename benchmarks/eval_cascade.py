@@ -0,0 +1,143 @@
+# benchmarks/eval_cascade.py
+"""
+Offline evaluation of ToxicityCascade against the toxicity model alone.
+
+Every response is scored twice: by the model (detect_toxicity_batch) and by the cascade
+(ai_callback.cascade). The report gives:
+    model fraction   share of responses the cascade still sent to the model
+    disagreement     responses where the two decisions differ, split by direction
+                     (cascade toxic / model benign and the reverse) and by the signal
+                     that decided
+    accuracy         accuracy, precision and recall of both, when the corpus has labels
+
+The corpus is a JSONL file with one {"text": ..., "label": true/false} object per line
+("label" is optional). Without --corpus, a seeded synthetic corpus is used: the
+benchmark corpus with toxic sentences planted in a fraction of the responses, labeled
+by whether a sentence was planted.
+
+By default the model is a stub (benchmarks/stubs.py), so the numbers only exercise the
+plumbing. Use --real-model for toxic-bert before trusting a cascade with real traffic.
+
+Usage:
+    python -m benchmarks.eval_cascade [--corpus data.jsonl] [--real-model] [--show 10]
+                                      [--max-disagreement 0.01]
+"""
+import argparse
+import json
+import random
+import sys
+from collections import Counter
+
+from ai_callback.cascade import ToxicityCascade
+from ai_callback.conditions import detect_toxicity_batch
+from benchmarks.corpus import corpus
+from benchmarks.stubs import use_stub_toxicity
+
+PLANTED = [
+    "Honestly, I hate you and everyone like you.",
+    "You are a stupid idiot.",
+    "Nobody wants you here, go away and never come back.",
+    "Shut up, you pathetic loser.",
+    "I will hack your account and leak everything.",
+]
+
+
+def synthetic(count, toxic_fraction, seed=0):
+    rng = random.Random(seed)
+    texts = [text for texts in corpus(count, seed).values() for text in texts]
+    rng.shuffle(texts)
+    rows = []
+    for text in texts:
+        toxic = rng.random() < toxic_fraction
+        if toxic:
+            text = f"{text} {rng.choice(PLANTED)}"
+        rows.append({"text": text, "label": toxic})
+    return rows
+
+
+def load(path):
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if not isinstance(row, dict) or not isinstance(row.get("text"), str):
+                raise ValueError(f"{path}:{n}: expected an object with a \"text\" string")
+            rows.append(row)
+    return rows
+
+
+def scores(flags, labels):
+    tp = sum(f and l for f, l in zip(flags, labels))
+    fp = sum(f and not l for f, l in zip(flags, labels))
+    fn = sum(l and not f for f, l in zip(flags, labels))
+    correct = sum(f == l for f, l in zip(flags, labels))
+    return {
+        "accuracy": correct / len(labels),
+        "precision": tp / (tp + fp) if tp + fp else 0.0,
+        "recall": tp / (tp + fn) if tp + fn else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", help="JSONL file of {\"text\", \"label\"} objects")
+    parser.add_argument("--count", type=int, default=250, help="synthetic responses per category")
+    parser.add_argument("--toxic-fraction", type=float, default=0.1, help="synthetic responses with a planted toxic sentence")
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--real-model", action="store_true")
+    parser.add_argument("--show", type=int, default=0, metavar="N", help="print up to N disagreements")
+    parser.add_argument("--max-disagreement", type=float, metavar="RATE",
+                        help="exit with status 1 if the disagreement rate exceeds RATE")
+    args = parser.parse_args(argv)
+
+    if not args.real_model:
+        use_stub_toxicity()
+    rows = load(args.corpus) if args.corpus else synthetic(args.count, args.toxic_fraction)
+    if not rows:
+        print("empty corpus")
+        return 1
+    texts = [row["text"] for row in rows]
+
+    model = detect_toxicity_batch(texts, args.batch_size, args.threshold)
+    cascade = ToxicityCascade(threshold=args.threshold)
+    stages = [cascade.decide(text)[1] for text in texts]
+    flags = cascade.batch(texts, args.batch_size)
+    stats = cascade.stats()
+
+    disagreements = [i for i, (c, m) in enumerate(zip(flags, model)) if c != m]
+    by_stage = Counter((stages[i], "toxic" if flags[i] else "benign") for i in disagreements)
+    rate = len(disagreements) / len(texts)
+
+    print(f"{len(texts)} responses, {stats['model_calls']} sent to the model "
+          f"(model fraction {stats['model_fraction']:.1%})")
+    print(f"{'stage':<10} {'toxic':>7} {'benign':>7}")
+    for name, counts in stats["decided_by"].items():
+        print(f"{name:<10} {counts['toxic']:>7} {counts['benign']:>7}")
+    print(f"disagreement with model-only: {len(disagreements)} ({rate:.2%})")
+    print(f"  cascade toxic, model benign: {sum(flags[i] for i in disagreements)}")
+    print(f"  cascade benign, model toxic: {sum(not flags[i] for i in disagreements)}")
+    for (stage, verdict), n in sorted(by_stage.items()):
+        print(f"  decided {verdict} by {stage}: {n}")
+
+    if all("label" in row for row in rows):
+        labels = [bool(row["label"]) for row in rows]
+        print(f"{'decider':<10} {'accuracy':>9} {'precision':>10} {'recall':>7}")
+        for name, decided in (("model", model), ("cascade", flags)):
+            r = scores(decided, labels)
+            print(f"{name:<10} {r['accuracy']:>9.1%} {r['precision']:>10.1%} {r['recall']:>7.1%}")
+
+    for i in disagreements[:args.show]:
+        verdict = "toxic" if flags[i] else "benign"
+        print(f"- cascade {verdict} ({stages[i]}), model {'toxic' if model[i] else 'benign'}: {texts[i][:120]!r}")
+
+    if args.max_disagreement is not None and rate > args.max_disagreement:
+        print(f"FAIL: disagreement {rate:.2%} exceeds {args.max_disagreement:.2%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+# benchmarks/fake_llm.py
+"""
+A local fake of the OpenAI streaming chat-completions endpoint, for testing adapters.
+
+POST /v1/chat/completions with "stream": true answers with server-sent events, one
+word per chunk, --token-ms apart, as a real model generating tokens would. The
+completion for a request is script[<last user message>], else the default completion.
+max_tokens is honoured. The server records how many tokens it actually sent before
+the client hung up, so early-abort adapters can be checked end to end:
+
+    server = FakeLLMServer({"hi": "Hello! ..."}, token_ms=20).start()
+    client = openai.OpenAI(api_key="fake", base_url=server.base_url)
+    ...
+    server.requests  # [{"prompt": ..., "tokens_sent": 12, "completed": False}, ...]
+
+Usage:
+    python -m benchmarks.fake_llm [--port 8001] [--token-ms 20]
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_COMPLETION = (
+    "Thanks for your question. Here is a short overview of the topic, followed by a few "
+    "practical suggestions you can try today. First, start small and measure the results. "
+    "Second, ask for feedback early. Finally, write down what worked so you can repeat it."
+)
+
+_TOKEN = re.compile(r"\S+\s*")
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        server = self.server.fake
+        prompt = next((m.get("content", "") for m in reversed(body.get("messages", []))
+                       if m.get("role") == "user"), "")
+        tokens = _TOKEN.findall(server.script.get(prompt, server.default))
+        limit = body.get("max_tokens") or body.get("max_completion_tokens")
+        if limit is not None:
+            tokens = tokens[:limit]
+        record = {"prompt": prompt, "tokens_sent": 0, "completed": False}
+        with server.lock:
+            server.requests.append(record)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        model = body.get("model", "fake")
+        try:
+            for token in tokens:
+                time.sleep(server.token_ms / 1000)
+                self._event(model, {"role": "assistant", "content": token}, None)
+                record["tokens_sent"] += 1
+            reason = "length" if limit is not None and len(tokens) == limit else "stop"
+            self._event(model, {}, reason)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            record["completed"] = True
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled; a real server would stop generating here.
+            pass
+
+    def _event(self, model, delta, finish_reason):
+        chunk = {
+            "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": 0, "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        self.wfile.write(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeLLMServer:
+    """
+    Streams scripted completions over a fake OpenAI chat-completions API.
+
+    Args:
+        script (dict, optional): {prompt: completion} for the last user message.
+        token_ms (float): Delay before each streamed token.
+        default (str): Completion for prompts not in the script.
+        address (tuple): (host, port) to listen on; port 0 picks a free port.
+    """
+
+    def __init__(self, script=None, token_ms=20.0, default=DEFAULT_COMPLETION, address=("127.0.0.1", 0)):
+        self.script = dict(script or {})
+        self.token_ms = token_ms
+        self.default = default
+        self.requests = []
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(address, _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        host, port = self._server.server_address[:2]
+        self.base_url = f"http://{host}:{port}/v1"
+        self._thread = None
+
+    def start(self):
+        """Serve in a background thread and return self."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="FakeLLMServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def close(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    args = parser.parse_args(argv)
+    server = FakeLLMServer(token_ms=args.token_ms, address=(args.host, args.port))
+    print(f"fake LLM at {server.base_url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+# benchmarks/run.py
+"""
+Benchmark suite for the rule library.
+
+Measures, on each category of the synthetic corpus (benchmarks/corpus.py):
+    condition:<name>   every stock condition on every response
+    action:<name>      every stock action on the responses its rule's condition matches
+    process            AICallback.process with the full stock rule set
+    process_batch      AICallback.process_batch with the same rule set
+
+and reports throughput (responses/s and MB/s) and p50/p99 latency per call.
+detect_toxicity uses a local stub (benchmarks/stubs.py) unless --real-model is given,
+and weather lookups use mock data unless --live-weather is given, so a default run
+is offline and deterministic.
+
+Results can be written as JSON (--output) and compared against an earlier run
+(--compare), which exits non-zero if any throughput dropped by more than
+--threshold percent.
+
+Usage:
+    python -m benchmarks.run --output bench-$(git rev-parse --short HEAD).json
+    python -m benchmarks.run --compare bench-abc1234.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from ai_callback import actions, conditions
+from ai_callback.callback import AICallback
+from benchmarks.corpus import CATEGORIES, corpus
+from benchmarks.stubs import use_stub_toxicity
+
+# (condition, action) pairs of the stock rule set, as registered by the usage scripts.
+STOCK_RULES = [
+    (conditions.detect_financial_advice, actions.add_financial_disclaimer),
+    (conditions.detect_medical_advice, actions.add_medical_disclaimer),
+    (conditions.detect_legal_advice, actions.add_legal_disclaimer),
+    (conditions.detect_abuse, actions.redact_abusive_language),
+    (conditions.detect_weather_query, actions.append_weather_info),
+    (conditions.detect_incomplete_response, actions.handle_incomplete_response),
+    (conditions.detect_toxicity, actions.redact_entire_text),
+]
+
+# Conditions that are not part of a stock rule but ship in conditions.py.
+EXTRA_CONDITIONS = [
+    conditions.detect_question,
+    conditions.detect_greeting,
+    conditions.detect_pii,
+    conditions.detect_code_snippet,
+    conditions.detect_harmful_instructions,
+    conditions.detect_url,
+    conditions.detect_sentiment,
+    conditions.detect_factual_claim,
+    conditions.detect_emergency_situation,
+    conditions.detect_citation_needed,
+]
+
+
+def build_callback():
+    callback = AICallback()
+    for condition, action in STOCK_RULES:
+        callback.add_rule(condition, action)
+    return callback
+
+
+def measure(fn, texts, repeat):
+    """Call fn on each text `repeat` times; return the stats dict for the run."""
+    latencies = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter_ns()
+            fn(text)
+            latencies.append(time.perf_counter_ns() - start)
+    return summarize(latencies, sum(len(t.encode("utf-8")) for t in texts) * repeat)
+
+
+def measure_batch(fn, texts, repeat):
+    """Time fn(texts) as a whole; latency figures are per response."""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        fn(texts)
+        per_text = (time.perf_counter_ns() - start) / len(texts)
+        latencies.extend([per_text] * len(texts))
+    return summarize(latencies, sum(len(t.encode("utf-8")) for t in texts) * repeat)
+
+
+def summarize(latencies_ns, total_bytes):
+    ordered = sorted(latencies_ns)
+    total_s = sum(ordered) / 1e9
+    return {
+        "n": len(ordered),
+        "per_s": len(ordered) / total_s if total_s else float("inf"),
+        "mb_per_s": total_bytes / 1e6 / total_s if total_s else float("inf"),
+        "p50_us": _percentile(ordered, 0.50) / 1e3,
+        "p99_us": _percentile(ordered, 0.99) / 1e3,
+    }
+
+
+def _percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(texts_by_category, repeat):
+    results = {}
+    callback = build_callback()
+    for category, texts in texts_by_category.items():
+        for condition, action in STOCK_RULES:
+            results[f"condition:{condition.__name__}/{category}"] = measure(condition, texts, repeat)
+            matched = [t for t in texts if condition(t)]
+            if matched:
+                results[f"action:{action.__name__}/{category}"] = measure(action, matched, repeat)
+        for condition in EXTRA_CONDITIONS:
+            results[f"condition:{condition.__name__}/{category}"] = measure(condition, texts, repeat)
+        results[f"process/{category}"] = measure(callback.process, texts, repeat)
+        results[f"process_batch/{category}"] = measure_batch(callback.process_batch, texts, repeat)
+    return results
+
+
+def metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "count": args.count,
+        "repeat": args.repeat,
+        "toxicity": "model" if args.real_model else f"stub ({args.stub_work_ms} ms)",
+    }
+
+
+def print_table(results):
+    print(f"{'benchmark':<58} {'resp/s':>11} {'MB/s':>8} {'p50 us':>9} {'p99 us':>9}")
+    for name, r in results.items():
+        print(f"{name:<58} {r['per_s']:>11.0f} {r['mb_per_s']:>8.1f} {r['p50_us']:>9.1f} {r['p99_us']:>9.1f}")
+
+
+def compare(old, new, threshold):
+    """Print throughput changes between two result sets; return the regressed names."""
+    regressions = []
+    print(f"\ncompared with {old['meta'].get('commit')} ({old['meta'].get('timestamp')}):")
+    for name, r in new["results"].items():
+        before = old["results"].get(name)
+        if before is None:
+            continue
+        change = (r["per_s"] / before["per_s"] - 1) * 100
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        if flag or abs(change) > threshold:
+            print(f"  {name:<58} {change:+7.1f}%{flag}")
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0f}%")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=200, help="responses per category")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="passes over each category")
+    parser.add_argument("--categories", nargs="+", choices=CATEGORIES, default=list(CATEGORIES))
+    parser.add_argument("--stub-work-ms", type=float, default=0.0,
+                        help="CPU time the toxicity stub burns per text")
+    parser.add_argument("--real-model", action="store_true", help="use the real toxicity model")
+    parser.add_argument("--live-weather", action="store_true",
+                        help="keep OPENWEATHER_API_KEY and query the real weather API")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="throughput drop, in percent, counted as a regression")
+    args = parser.parse_args(argv)
+
+    if not args.real_model:
+        use_stub_toxicity(args.stub_work_ms)
+    if not args.live_weather:
+        os.environ.pop("OPENWEATHER_API_KEY", None)
+
+    results = run(corpus(args.count, args.seed, args.categories), args.repeat)
+    report = {"meta": metadata(args), "results": results}
+    print_table(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nwrote {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            old = json.load(f)
+        if compare(old, report, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# benchmarks/stubs.py
+"""
+Offline stand-ins for the models behind model-backed conditions.
+"""
+import time
+
+from ai_callback.models import register_model
+
+
+class StubToxicity:
+    """
+    Pipeline-shaped stand-in for toxic-bert: flags texts containing "hate" and burns
+    roughly `work_ms` of CPU per text, like a classifier forward pass would. With
+    `max_tokens`, only the first that many words are looked at, like a model that
+    truncates its input. `call_ms` is a fixed cost per call, whatever its batch size,
+    like the per-forward overhead that batching amortizes.
+    """
+
+    def __init__(self, work_ms=0.0, max_tokens=None, call_ms=0.0):
+        self.rounds = self._calibrate(work_ms) if work_ms > 0 else 0
+        self.call_rounds = self._calibrate(call_ms) if call_ms > 0 else 0
+        self.max_tokens = max_tokens
+
+    @staticmethod
+    def _calibrate(work_ms):
+        start = time.perf_counter()
+        StubToxicity._burn(1000)
+        per_round = (time.perf_counter() - start) / 1000
+        return max(1, int(work_ms / 1000 / per_round))
+
+    @staticmethod
+    def _burn(rounds):
+        x = 0
+        for i in range(rounds):
+            x = (x * 31 + i) % 1_000_003
+        return x
+
+    def _score(self, text):
+        self._burn(self.rounds)
+        if self.max_tokens is not None:
+            text = " ".join(text.split()[:self.max_tokens])
+        score = 0.95 if "hate" in text else 0.02
+        return [{"label": "toxic", "score": score}]
+
+    def __call__(self, inputs, **kwargs):
+        self._burn(self.call_rounds)
+        if isinstance(inputs, str):
+            return self._score(inputs)
+        return [self._score(text) for text in inputs]
+
+
+def use_stub_toxicity(work_ms=0.0, max_tokens=None, call_ms=0.0):
+    """Register a StubToxicity as the "toxicity" model and return it."""
+    stub = StubToxicity(work_ms, max_tokens, call_ms)
+    register_model("toxicity", lambda: stub)
+    return stub
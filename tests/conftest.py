@@ -0,0 +1,12 @@
+import contextlib
+
+import pytest
+
+from ai_callback.models import override_model
+
+
+@pytest.fixture
+def toxicity_model():
+    """Install a toxicity model for one test: `toxicity_model(stub)` returns the stub."""
+    with contextlib.ExitStack() as stack:
+        yield lambda model: stack.enter_context(override_model("toxicity", model))
@@ -0,0 +1,244 @@
+import http.client
+import json
+import queue
+import sys
+import time
+import types
+from urllib.parse import urlsplit
+
+import pytest
+
+from ai_callback import actions, conditions
+from ai_callback.adapters import EarlyStop, stream_hf, stream_openai
+from ai_callback.callback import AICallback
+from benchmarks.fake_llm import FakeLLMServer
+from benchmarks.stubs import StubToxicity
+
+REMOVED = actions.redact_entire_text("")
+TOXIC = "I hate you. " + "This sentence keeps going for a while. " * 10
+BENIGN = "Invest wisely. " + "This sentence keeps going for a while. " * 10
+
+
+@pytest.fixture(autouse=True)
+def stub(toxicity_model):
+    return toxicity_model(StubToxicity())
+
+
+def _callback(*rules):
+    callback = AICallback()
+    for condition, action in rules:
+        callback.add_rule(condition, action)
+    return callback
+
+
+def _words(text):
+    return [word + " " for word in text.split(" ") if word]
+
+
+def _feed(guard, text):
+    for i, delta in enumerate(_words(text)):
+        if guard.feed(delta):
+            return i + 1
+    return None
+
+
+def test_stops_after_the_first_toxic_sentence():
+    callback = _callback((conditions.detect_toxicity, actions.redact_entire_text))
+    guard = EarlyStop(callback, check_chars=1000)
+    assert _feed(guard, TOXIC) == 3  # "I hate you." ends a sentence
+    result = guard.result(max_tokens=100)
+    assert result.aborted and result.output == REMOVED
+    assert result.rule == "detect_toxicity"
+    assert result.tokens_generated == 3 and result.tokens_saved == 97
+
+
+def test_no_terminal_rule_fires_gives_process_output():
+    callback = _callback((conditions.detect_financial_advice, actions.add_financial_disclaimer),
+                         (conditions.detect_toxicity, actions.redact_entire_text))
+    guard = EarlyStop(callback)
+    assert _feed(guard, BENIGN) is None
+    result = guard.result(max_tokens=100)
+    assert not result.aborted and result.tokens_saved == 0
+    assert result.output == callback.process("".join(_words(BENIGN)))
+
+
+def test_checks_run_no_side_effecting_actions():
+    calls = []
+
+    def counting_weather(response):
+        calls.append(response)
+        return response + "\n[weather]"
+
+    counting_weather.appends = True
+    callback = _callback((lambda response: True, counting_weather),
+                         (conditions.detect_toxicity, actions.redact_entire_text))
+    callback.rules[0].terminal = False
+    guard = EarlyStop(callback, check_chars=5)
+    assert _feed(guard, BENIGN) is None
+    assert calls == []
+    guard.result()
+    assert len(calls) == 1  # only the final process()
+
+
+def test_rewrite_that_a_terminal_condition_reads_is_applied():
+    def redacted(response):
+        return "[REDACTED]" in response
+
+    callback = _callback((conditions.detect_abuse, actions.redact_abusive_language),
+                         (redacted, actions.redact_entire_text))
+    guard = EarlyStop(callback, check_chars=1000)
+    assert [rule.name for rule in guard.rules] == ["detect_abuse", "redacted"]
+    assert _feed(guard, "You idiot. More text follows here.") == 2
+    assert guard.result().output == callback.process("You idiot.")
+
+
+def test_terminal_rule_reading_an_unknown_edit_is_left_to_process():
+    callback = _callback((conditions.detect_abuse, lambda response: response.upper()),
+                         (conditions.detect_toxicity, actions.redact_entire_text))
+    guard = EarlyStop(callback)
+    assert guard.rules == []
+    assert _feed(guard, TOXIC) is None
+    assert guard.result().output == callback.process("".join(_words(TOXIC)))
+
+
+class _SSEClient:
+    """The part of openai.OpenAI that stream_openai uses, over plain HTTP."""
+
+    def __init__(self, base_url):
+        url = urlsplit(base_url)
+        self.host, self.port, self.path = url.hostname, url.port, url.path
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+    def _create(self, stream, **body):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=5)
+        connection.request("POST", self.path + "/chat/completions", json.dumps({**body, "stream": stream}),
+                           {"Content-Type": "application/json"})
+        return _SSEStream(connection, connection.getresponse())
+
+
+class _SSEStream:
+    def __init__(self, connection, response):
+        self.connection = connection
+        self.response = response
+
+    def __iter__(self):
+        for line in self.response:
+            if not line.startswith(b"data: "):
+                continue
+            data = line[len(b"data: "):].strip()
+            if data == b"[DONE]":
+                return
+            choices = json.loads(data)["choices"]
+            yield types.SimpleNamespace(choices=[
+                types.SimpleNamespace(delta=types.SimpleNamespace(content=c["delta"].get("content")))
+                for c in choices
+            ])
+
+    def close(self):
+        self.response.close()
+        self.connection.close()
+
+
+def _wait_for_server(server, seconds=2.0):
+    # The server notices the hang-up on its next writes; wait until its record settles.
+    deadline = time.monotonic() + seconds
+    last = None
+    while time.monotonic() < deadline:
+        sent = server.requests[-1]["tokens_sent"]
+        if sent == last:
+            return server.requests[-1]
+        last = sent
+        time.sleep(0.05)
+    return server.requests[-1]
+
+
+def test_stream_openai_hangs_up_on_a_toxic_completion():
+    callback = _callback((conditions.detect_toxicity, actions.redact_entire_text))
+    total = len(_words(TOXIC))
+    with FakeLLMServer({"toxic": TOXIC, "benign": BENIGN}, token_ms=5).start() as server:
+        client = _SSEClient(server.base_url)
+        result = stream_openai(callback, client, model="fake", max_tokens=total,
+                               messages=[{"role": "user", "content": "toxic"}])
+        assert result.aborted and result.output == REMOVED
+        assert result.tokens_generated == 3
+        assert result.tokens_saved == total - 3
+        record = _wait_for_server(server)
+        assert not record["completed"] and record["tokens_sent"] < total
+
+        result = stream_openai(callback, client, model="fake",
+                               messages=[{"role": "user", "content": "benign"}])
+        assert not result.aborted
+        assert result.output == callback.process(BENIGN.rstrip(" ") + " ")
+        assert _wait_for_server(server)["completed"]
+
+
+def test_stream_openai_with_the_openai_client():
+    openai = pytest.importorskip("openai")
+    callback = _callback((conditions.detect_toxicity, actions.redact_entire_text))
+    with FakeLLMServer({"toxic": TOXIC}, token_ms=5).start() as server:
+        client = openai.OpenAI(api_key="fake", base_url=server.base_url)
+        result = stream_openai(callback, client, model="fake", max_tokens=50,
+                               messages=[{"role": "user", "content": "toxic"}])
+    assert result.aborted and result.output == REMOVED
+
+
+class _FakeStreamer:
+    # TextIteratorStreamer's interface as stream_hf uses it.
+    def __init__(self, tokenizer, **kwargs):
+        self.queue = queue.Queue()
+
+    def put_text(self, text):
+        self.queue.put(text)
+
+    def end(self):
+        self.queue.put(None)
+
+    def __iter__(self):
+        while (text := self.queue.get()) is not None:
+            yield text
+
+
+class _FakeGenerator:
+    # A "text-generation" pipeline emitting one word per step until a criterion stops it.
+    def __init__(self, text):
+        self.words = _words(text)
+        self.tokenizer = object()
+        self.model = types.SimpleNamespace(generation_config=types.SimpleNamespace(max_new_tokens=len(self.words)))
+        self.steps = 0
+
+    def __call__(self, prompt, streamer, stopping_criteria, **kwargs):
+        for word in self.words:
+            self.steps += 1
+            streamer.put_text(word)
+            time.sleep(0.002)
+            if any(criterion(None, None) for criterion in stopping_criteria):
+                break
+        streamer.end()
+
+
+@pytest.fixture
+def fake_transformers(monkeypatch):
+    module = types.ModuleType("transformers")
+    module.StoppingCriteria = object
+    module.StoppingCriteriaList = list
+    module.TextIteratorStreamer = _FakeStreamer
+    monkeypatch.setitem(sys.modules, "transformers", module)
+
+
+def test_stream_hf_stops_generation(fake_transformers):
+    callback = _callback((conditions.detect_toxicity, actions.redact_entire_text))
+    generator = _FakeGenerator(TOXIC)
+    result = stream_hf(callback, generator, "prompt")
+    assert result.aborted and result.output == REMOVED
+    assert generator.steps < len(generator.words)
+    assert result.tokens_generated == generator.steps
+    assert result.tokens_saved == len(generator.words) - generator.steps
+
+
+def test_stream_hf_runs_to_the_end_when_nothing_fires(fake_transformers):
+    callback = _callback((conditions.detect_toxicity, actions.redact_entire_text))
+    generator = _FakeGenerator(BENIGN)
+    result = stream_hf(callback, generator, "prompt", max_new_tokens=500)
+    assert not result.aborted
+    assert generator.steps == len(generator.words)
+    assert result.output == callback.process("".join(generator.words))
@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+from ai_callback.batching import MicroBatcher, Overloaded
+
+
+def test_results_in_submission_order():
+    with MicroBatcher(lambda items: [x * 2 for x in items], max_batch=4, max_wait_ms=1) as batcher:
+        futures = [batcher.submit(i) for i in range(10)]
+        assert [f.result(timeout=5) for f in futures] == [i * 2 for i in range(10)]
+
+
+def test_submit_after_close_raises():
+    batcher = MicroBatcher(lambda items: items)
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(1)
+
+
+def test_close_under_concurrent_submits_resolves_every_future():
+    # Every accepted item must be processed; a submit racing close() either gets a
+    # future that resolves or raises RuntimeError, never a future that hangs.
+    for _ in range(20):
+        batcher = MicroBatcher(lambda items: items, max_batch=8, max_wait_ms=0, max_queue=10_000)
+        accepted = []
+        start = threading.Barrier(5)
+
+        def client():
+            start.wait()
+            for i in range(200):
+                try:
+                    accepted.append(batcher.submit(i))
+                except (RuntimeError, Overloaded):
+                    return
+
+        threads = [threading.Thread(target=client) for _ in range(4)]
+        for t in threads:
+            t.start()
+        start.wait()
+        batcher.close()
+        for t in threads:
+            t.join()
+        for future in accepted:
+            future.result(timeout=5)
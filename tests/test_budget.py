@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+
+from ai_callback.budget import RunReport
+from ai_callback.callback import AICallback
+
+
+class FakeClock:
+    """A clock that only moves when told to, from any thread."""
+
+    def __init__(self):
+        self.now = 100.0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            return self.now
+
+    def advance(self, seconds):
+        with self._lock:
+            self.now += seconds
+
+
+def _taking(clock, seconds, result=True):
+    # A condition that "takes" `seconds` of fake time.
+    def condition(response):
+        clock.advance(seconds)
+        return result
+    return condition
+
+
+def _append(suffix):
+    return lambda response: response + suffix
+
+
+def test_optional_rule_that_does_not_fit_is_skipped():
+    clock = FakeClock()
+    callback = AICallback()
+    callback.add_rule(_taking(clock, 0.030), _append(" [required]"), name="required")
+    callback.add_rule(_taking(clock, 0.0), _append(" [optional]"), name="enrich", cost=0.025, optional=True)
+    report = callback.process("text", budget=0.050, clock=clock, report=True)
+    assert report.output == "text [required]"
+    assert report.skipped == [{"rule": "enrich", "reason": "budget", "remaining": pytest.approx(0.020)}]
+    assert report.elapsed == pytest.approx(0.030)
+    assert not report.over_budget
+
+
+def test_optional_rule_that_fits_runs():
+    clock = FakeClock()
+    callback = AICallback()
+    callback.add_rule(_taking(clock, 0.010), _append(" [required]"), name="required")
+    callback.add_rule(_taking(clock, 0.005), _append(" [optional]"), name="enrich", cost=0.010, optional=True)
+    report = callback.process("text", budget=0.050, clock=clock, report=True)
+    assert report.output == "text [required] [optional]"
+    assert report.skipped == []
+    assert report.elapsed == pytest.approx(0.015)
+
+
+def test_optional_rule_running_past_the_deadline_is_cut_off():
+    clock = FakeClock()
+    callback = AICallback()
+    callback.add_rule(_taking(clock, 0.080), _append(" [optional]"), name="slow", cost=0.001, optional=True)
+    callback.add_rule(_taking(clock, 0.0), _append(" [required]"), name="required")
+    report = callback.process("text", budget=0.050, clock=clock, report=True)
+    assert report.output == "text [required]"
+    assert report.skipped == [{"rule": "slow", "reason": "cut_off", "remaining": pytest.approx(0.050)}]
+    assert report.over_budget
+
+
+def test_required_rules_run_past_the_budget():
+    clock = FakeClock()
+    callback = AICallback()
+    callback.add_rule(_taking(clock, 0.200), _append(" [first]"), name="first")
+    callback.add_rule(_taking(clock, 0.0), _append(" [optional]"), name="enrich", optional=True)
+    callback.add_rule(_taking(clock, 0.100), _append(" [second]"), name="second")
+    report = callback.process("text", budget=0.050, clock=clock, report=True)
+    assert report.output == "text [first] [second]"
+    assert [entry["rule"] for entry in report.skipped] == ["enrich"]
+    assert report.skipped[0]["reason"] == "budget"
+    assert report.skipped[0]["remaining"] == 0.0
+    assert report.elapsed == pytest.approx(0.300)
+    assert report.budget == 0.050
+    assert report.over_budget
+
+
+def test_budget_returns_text_without_report():
+    clock = FakeClock()
+    callback = AICallback()
+    callback.add_rule(_taking(clock, 0.0), _append("!"))
+    assert callback.process("text", budget=0.050, clock=clock) == "text!"
+
+
+def test_report_without_budget():
+    callback = AICallback()
+    callback.add_rule(lambda response: True, _append("!"))
+    report = callback.process("text", report=True)
+    assert isinstance(report, RunReport)
+    assert report.output == "text!" and report.skipped == [] and report.budget is None
+
+
+def test_negative_budget_is_rejected():
+    with pytest.raises(ValueError):
+        AICallback().process("text", budget=-1)
@@ -0,0 +1,96 @@
+import json
+import os
+
+import pytest
+
+from ai_callback import actions, conditions
+from ai_callback.bulk import run
+from ai_callback.callback import AICallback
+
+
+def _callback():
+    callback = AICallback()
+    callback.add_rule(conditions.detect_abuse, actions.redact_abusive_language)
+    return callback
+
+
+@pytest.mark.parametrize("content", ["", "\n\n  \n"])
+def test_empty_input(tmp_path, content):
+    src = tmp_path / "in.jsonl"
+    src.write_text(content, encoding="utf-8")
+    out = tmp_path / "out.jsonl"
+    assert run(_callback(), str(src), str(out), workers=1, progress=0) == 0
+    assert out.read_text(encoding="utf-8") == ""
+    assert not os.path.exists(str(out) + ".ckpt")
+
+
+def test_records_in_order(tmp_path):
+    src = tmp_path / "in.jsonl"
+    texts = ["You are an idiot.", "Hello.", "So stupid."]
+    src.write_text("".join(json.dumps({"response": t}) + "\n" for t in texts), encoding="utf-8")
+    out = tmp_path / "out.jsonl"
+    assert run(_callback(), str(src), str(out), workers=1, chunk_size=2, progress=0) == 3
+    outputs = [json.loads(line)["output"] for line in out.read_text(encoding="utf-8").splitlines()]
+    assert outputs == [_callback().process(t) for t in texts]
+    assert not os.path.exists(str(out) + ".ckpt")
+
+
+def _crash(response):
+    # Stands in for the process dying partway through a run.
+    if "CRASH" in response:
+        raise RuntimeError("crashed")
+    return False
+
+
+def _texts(n, crash_at=None):
+    texts = [("You idiot, number %d." if i % 3 else "Record %d is fine.") % i for i in range(n)]
+    if crash_at is not None:
+        texts[crash_at] += " CRASH"
+    return texts
+
+
+def _write(path, texts):
+    path.write_text("".join(json.dumps({"id": i, "response": t}) + "\n" for i, t in enumerate(texts)),
+                    encoding="utf-8")
+
+
+def _read(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_resume_after_interrupt_has_no_duplicate_or_missing_records(tmp_path, workers):
+    texts = _texts(50, crash_at=27)
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write(src, texts)
+    crashing = _callback()
+    crashing.add_rule(_crash, actions.redact_entire_text)
+    with pytest.raises(RuntimeError):
+        run(crashing, str(src), str(out), workers=workers, chunk_size=4, progress=0)
+    with open(str(out) + ".ckpt", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    assert 0 < checkpoint["records"] <= 24 and checkpoint["records"] % 4 == 0
+    # A chunk that was being written when the process died.
+    with open(out, "ab") as f:
+        f.write(b'{"id": 99, "respo')
+
+    done = run(_callback(), str(src), str(out), workers=workers, chunk_size=4, resume=True, progress=0)
+    assert done == 50 - checkpoint["records"]
+    records = _read(out)
+    assert [record["id"] for record in records] == list(range(50))
+    assert [record["output"] for record in records] == [_callback().process(t) for t in texts]
+    assert not os.path.exists(str(out) + ".ckpt")
+
+
+@pytest.mark.parametrize("hits_only", [False, True])
+def test_workers_match_a_single_process(tmp_path, hits_only):
+    src = tmp_path / "in.jsonl"
+    _write(src, _texts(103))
+    single, pooled = tmp_path / "single.jsonl", tmp_path / "pooled.jsonl"
+    assert run(_callback(), str(src), str(single), hits_only=hits_only, workers=1, chunk_size=5, progress=0) == 103
+    assert run(_callback(), str(src), str(pooled), hits_only=hits_only, workers=3, chunk_size=5, progress=0) == 103
+    assert pooled.read_bytes() == single.read_bytes()
+    if hits_only:
+        assert [record["record"] for record in _read(pooled)] == list(range(103))
+    else:
+        assert [record["id"] for record in _read(pooled)] == list(range(103))
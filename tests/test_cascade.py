@@ -0,0 +1,27 @@
+import pytest
+
+from ai_callback import cascade
+from ai_callback.context import AnalysisContext
+from ai_callback.keywords import default_engine
+from benchmarks.stubs import StubToxicity
+
+
+def test_cues_are_not_registered_on_the_default_engine():
+    with pytest.raises(KeyError):
+        default_engine.keywords("toxicity_cues")
+    assert "toxicity_cues" not in default_engine.scan("I hate this trash")
+
+
+def test_cue_signal_uses_the_cascade_engine():
+    signal = cascade.CueSignal()
+    assert signal(AnalysisContext("Have a nice day.")) is False
+    assert signal(AnalysisContext("You are trash.")) is None
+
+
+def test_cascade_decides_with_its_own_cues(toxicity_model):
+    toxicity_model(StubToxicity())
+    toxicity = cascade.ToxicityCascade()
+    assert toxicity("Have a nice day.") is False
+    assert toxicity("I hate rainy days.") is True  # cue present, so the stub model decides
+    stats = toxicity.stats()
+    assert stats["calls"] == 2 and stats["model_calls"] == 1
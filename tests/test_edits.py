@@ -0,0 +1,47 @@
+from ai_callback import actions, conditions
+from ai_callback.callback import AICallback
+from ai_callback.edits import EditPlan
+from benchmarks import bench_edits
+from benchmarks.corpus import CATEGORIES, generate
+
+
+def _stock():
+    callback = AICallback()
+    callback.add_rule(conditions.detect_financial_advice, actions.add_financial_disclaimer)
+    callback.add_rule(conditions.detect_medical_advice, actions.add_medical_disclaimer)
+    callback.add_rule(conditions.detect_abuse, actions.redact_abusive_language)
+    callback.add_rule(conditions.detect_incomplete_response, actions.handle_incomplete_response)
+    return callback
+
+
+def test_plan_matches_process_when_no_condition_depends_on_earlier_edits():
+    callback = _stock()
+    for category in CATEGORIES:
+        for text in generate(category, 50):
+            assert callback.plan(text).apply() == callback.process(text)
+
+
+def test_plan_matches_process_on_the_benchmark_input():
+    callback = bench_edits.build()
+    text = bench_edits.response(20_000)
+    assert callback.plan(text).apply() == callback.process(text)
+
+
+def test_plan_differs_when_an_earlier_edit_changes_a_later_condition():
+    # Documented in AICallback.plan: conditions in plan() see the original text.
+    callback = AICallback()
+    callback.add_rule(conditions.detect_abuse, actions.redact_abusive_language)
+    callback.add_rule(conditions.detect_weather_query, actions.append_weather_info)
+    text = "What is the weather in Hellsinki"
+    assert callback.process(text) == "What is the weather in [REDACTED]sinki"
+    planned = callback.plan(text).apply()
+    assert planned.startswith("What is the weather in [REDACTED]sinki")
+    assert "Hellsinki" in planned[len(text):]
+
+
+def test_edit_plan_first_recorded_replacement_wins():
+    plan = EditPlan("you idiot")
+    plan.replace(4, 9, "[REDACTED]")
+    plan.replace(6, 9, "X")
+    plan.append("!")
+    assert plan.apply() == "you [REDACTED]!"
@@ -0,0 +1,44 @@
+import pickle
+
+import pytest
+
+from ai_callback import conditions
+from ai_callback.keywords import KeywordCondition, KeywordEngine, default_engine
+
+
+def test_reregistering_a_different_list_raises():
+    engine = KeywordEngine()
+    engine.register("greeting", ["hello"])
+    with pytest.raises(ValueError):
+        engine.register("greeting", ["yo"])
+    assert engine.keywords("greeting") == ("hello",)
+
+
+def test_reregistering_the_same_list_is_allowed():
+    engine = KeywordEngine()
+    engine.register("greeting", ["Hello", "hi"])
+    engine.register("greeting", ["hello", "HI"])
+    assert engine.scan("hi there") == {"greeting": {"hi"}}
+
+
+def test_replace_is_explicit():
+    engine = KeywordEngine()
+    engine.register("greeting", ["hello"])
+    engine.register("greeting", ["yo"], replace=True)
+    assert engine.scan("yo, hello") == {"greeting": {"yo"}}
+
+
+def test_user_condition_cannot_rewrite_a_stock_list():
+    stock = default_engine.keywords("abuse")
+    with pytest.raises(ValueError):
+        KeywordCondition("abuse", ["refund"])
+    assert default_engine.keywords("abuse") == stock
+    assert conditions.detect_abuse("You idiot")
+    assert not conditions.detect_abuse("I want a refund")
+
+
+def test_condition_survives_pickling():
+    detect_refund = KeywordCondition("test_refund", ["refund", "chargeback"])
+    loaded = pickle.loads(pickle.dumps(detect_refund))
+    assert loaded("Please issue a chargeback")
+    assert not loaded("Thanks")
@@ -0,0 +1,75 @@
+import io
+
+import pytest
+
+from ai_callback import actions, conditions
+from ai_callback.callback import AICallback
+from ai_callback.patterns import (
+    EMAIL_DOMAIN_MAX, EMAIL_LOCAL_MAX, EMAIL_TLD_MAX, MAX_MATCH_LENGTH, URL_BODY_MAX, default_regex_set,
+)
+
+LONGEST = {
+    "email": "a" * EMAIL_LOCAL_MAX + "@" + "b" * EMAIL_DOMAIN_MAX + "." + "c" * EMAIL_TLD_MAX,
+    "phone": "123-456-7890",
+    "ssn": "123-45-6789",
+    "credit_card": "1234-5678-9012-3456",
+    "url": "https://" + "d" * URL_BODY_MAX,
+}
+
+
+def _callback(*rules):
+    callback = AICallback()
+    for condition, action in rules:
+        callback.add_rule(condition, action)
+    return callback
+
+
+def _large(callback, text, window):
+    sink = io.StringIO()
+    callback.process_large(io.StringIO(text), sink, window)
+    return sink.getvalue()
+
+
+@pytest.mark.parametrize("name", sorted(LONGEST))
+def test_max_match_length_is_the_longest_match(name):
+    text = LONGEST[name]
+    assert len(text) == MAX_MATCH_LENGTH[name]
+    assert default_regex_set.spans(name, f" {text} ") == [(1, 1 + len(text))]
+
+
+@pytest.mark.parametrize("name", sorted(LONGEST))
+@pytest.mark.parametrize("window", [16, 100, 1000])
+def test_longest_match_found_across_window_boundaries(name, window):
+    condition = conditions.detect_url if name == "url" else conditions.detect_pii
+    callback = _callback((condition, actions.add_legal_disclaimer))
+    match = LONGEST[name]
+    # Slide the match over the first window boundaries, a few characters at a time.
+    for offset in range(0, 2 * window + len(match), max(1, (window + len(match)) // 40)):
+        text = "word " * (offset // 5) + match + " end" + " filler" * (window // 7 + 3)
+        assert conditions.detect_pii(text) or conditions.detect_url(text)
+        assert _large(callback, text, window) == callback.process(text), offset
+
+
+@pytest.mark.parametrize("window", [8, 20, 64])
+def test_rules_over_window_boundaries_match_process(window):
+    callback = _callback(
+        (conditions.detect_abuse, actions.redact_abusive_language),
+        (conditions.detect_financial_advice, actions.add_financial_disclaimer),
+        (conditions.detect_pii, actions.add_legal_disclaimer),
+        (conditions.detect_url, actions.add_medical_disclaimer),
+    )
+    pieces = ["you idiot", "invest in stocks", "mail jane.doe@example.com", "call 555-123-4567",
+              "see https://example.com/a/b", "12345678901234 is not a phone number"]
+    for piece in pieces:
+        for pad in range(0, 2 * window):
+            text = "x" * pad + " " + piece + " tail" * 10
+            assert _large(callback, text, window) == callback.process(text), (piece, pad)
+
+
+def test_terminal_rule_fires_on_a_match_across_windows():
+    callback = _callback((conditions.detect_pii, actions.redact_entire_text))
+    for pad in range(0, 40):
+        text = "x " * pad + LONGEST["email"] + " tail" * 20
+        assert _large(callback, text, 32) == actions.redact_entire_text(text)
+    clean = "nothing to see here " * 50
+    assert _large(callback, clean, 32) == clean
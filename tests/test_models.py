@@ -0,0 +1,28 @@
+import pytest
+
+from ai_callback.models import get_model, is_loaded, override_model, register_model
+
+
+def test_override_restores_a_missing_factory():
+    with override_model("test_missing", "stub"):
+        assert get_model("test_missing") == "stub"
+    assert not is_loaded("test_missing")
+    with pytest.raises(KeyError):
+        get_model("test_missing")
+
+
+def test_override_restores_the_previous_factory_and_instance():
+    first = object()
+    with override_model("test_previous", first):
+        with override_model("test_previous", "stub"):
+            assert get_model("test_previous") == "stub"
+        assert get_model("test_previous") is first
+    assert not is_loaded("test_previous")
+
+
+def test_restored_factory_still_loads_lazily():
+    register_model("test_lazy", lambda: "loaded")
+    with override_model("test_lazy", "stub"):
+        assert get_model("test_lazy") == "stub"
+    assert not is_loaded("test_lazy")
+    assert get_model("test_lazy") == "loaded"
@@ -0,0 +1,63 @@
+import pickle
+import random
+import re
+
+from ai_callback import conditions
+from ai_callback.context import AnalysisContext
+from ai_callback.patterns import RegexSet, first_weather_location, year_before_found_that
+from benchmarks.bench_regex import legacy_all
+
+
+def test_spans_and_matches():
+    regex_set = RegexSet({"digits": r"\d+", "word": r"[a-z]+"})
+    assert regex_set.matches("digits", "ab 12")
+    assert not regex_set.matches("digits", "ab")
+    assert regex_set.spans("digits", "1 ab 23") == [(0, 1), (5, 7)]
+    assert regex_set.scan("ab 12") == {"word": [(0, 2)], "digits": [(3, 5)]}
+
+
+def test_pickled_set_matches_like_the_original():
+    regex_set = RegexSet({"ticket": r"\bTCK-\d{6}\b"})
+    loaded = pickle.loads(pickle.dumps(regex_set))
+    text = "see TCK-123456 and TCK-654321"
+    assert loaded.spans("ticket", text) == regex_set.spans("ticket", text) == [(4, 14), (19, 29)]
+
+
+def test_year_before_found_that_matches_the_regex():
+    rng = random.Random(0)
+    pieces = ["1999", "12", "found that", "Found That", "\n", " ", "x", "20201"]
+    for _ in range(2000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 8)))
+        expected = re.search(r"\d{4}.*found that", text, re.IGNORECASE) is not None
+        assert year_before_found_that(text) == expected, text
+
+
+def test_first_weather_location():
+    assert first_weather_location("What is the weather in Paris and the climate in Rome?") == "Paris"
+    assert first_weather_location("no weather here") is None
+
+
+def test_detectors_agree_with_the_legacy_regexes():
+    texts = [
+        "Mail me at jane.doe@example.com or call 555-123-4567.",
+        "SSN 123-45-6789, card 4111 1111 1111 1111.",
+        "See https://example.com/a?b=c for details.",
+        "Research shows that tea helps. According to the survey, yes.",
+        "In 2019 researchers found that sleep matters.",
+        "In 2019 researchers\nfound that sleep matters.",
+        "What's the weather in Berlin today?",
+        "Nothing special here.",
+    ]
+    for text in texts:
+        current = (conditions.detect_pii(text), conditions.detect_url(text),
+                   conditions.detect_citation_needed(text), conditions.detect_weather_query(text))
+        assert current == legacy_all(text), text
+
+
+def test_context_caches_searches_and_spans():
+    context = AnalysisContext("call 555-123-4567 or 555-765-4321")
+    assert context.regex_match("phone")
+    assert context.regex_spans("phone") == [(5, 17), (21, 33)]
+    assert context.regex_spans("phone") is context.regex_spans("phone")
+    assert not context.regex_match("url")
+    assert context.regex_spans("url") == []
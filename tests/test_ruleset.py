@@ -0,0 +1,35 @@
+import pickle
+
+import pytest
+
+from ai_callback.ruleset import compile_ruleset, load_ruleset
+
+SPEC = {
+    "keywords": {"refund": ["refund", "chargeback"]},
+    "patterns": {"order_id": r"\bORD-\d{6}\b"},
+    "rules": [
+        {"condition": "detect_abuse", "action": "redact_abusive_language"},
+        {"condition": {"keywords": "refund"}, "action": {"append": "\n[Refunds: see our policy.]"}},
+        {"condition": {"pattern": "order_id"}, "action": {"redact": "order_id", "with": "[ORDER]"}},
+    ],
+}
+
+
+def test_loaded_artifact_matches_the_compiled_rule_set(tmp_path):
+    path = tmp_path / "rules.bin"
+    compiled = compile_ruleset(SPEC)
+    compiled.save(path)
+    loaded = load_ruleset(path)
+    texts = ["Refund for ORD-123456 and ORD-654321, you idiot.", "Nothing here.", "ORD-12345"]
+    for text in texts:
+        assert loaded.callback().process(text) == compiled.callback().process(text)
+    assert loaded.callback().process(texts[0]) == (
+        "Refund for [ORDER] and [ORDER], you [REDACTED].\n[Refunds: see our policy.]"
+    )
+
+
+def test_artifact_of_another_format_is_rejected(tmp_path):
+    path = tmp_path / "rules.bin"
+    path.write_bytes(pickle.dumps({"format": 0, "ruleset": None}))
+    with pytest.raises(ValueError):
+        load_ruleset(path)
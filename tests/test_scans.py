@@ -0,0 +1,67 @@
+import gc
+import threading
+
+from ai_callback import conditions
+from ai_callback.callback import AICallback
+from ai_callback.keywords import KeywordEngine, default_engine
+from ai_callback.patterns import RegexSet, default_regex_set
+
+
+def _holds(owner, obj):
+    # True if `obj` is referenced from `owner`'s attributes, directly or one container down.
+    gc.collect()
+    held = [vars(owner)] + list(vars(owner).values())
+    return any(r is h for r in gc.get_referrers(obj) for h in held)
+
+
+def test_scans_do_not_keep_the_text_alive():
+    engine = KeywordEngine()
+    engine.register("greeting", ["hello"])
+    regex_set = RegexSet({"digits": r"\d+"})
+    text = "hello 42 " * 100_000
+    assert engine.scan(text) == {"greeting": {"hello"}}
+    assert regex_set.spans("digits", text)
+    assert not _holds(engine, text)
+    assert not _holds(regex_set, text)
+
+
+def test_concurrent_scans_of_different_texts():
+    engine = KeywordEngine()
+    engine.register("even", ["even"])
+    engine.register("odd", ["odd"])
+    regex_set = RegexSet({"even": "even", "odd": "odd"})
+    errors = []
+    start_line = threading.Barrier(8)
+
+    def client(k):
+        expected = "even" if k % 2 == 0 else "odd"
+        start_line.wait()
+        for i in range(2000):
+            text = f"{expected} {i}"
+            if set(engine.scan(text)) != {expected} or set(regex_set.scan(text)) != {expected}:
+                errors.append((k, i))
+
+    threads = [threading.Thread(target=client, args=(k,)) for k in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+def test_context_shares_one_scan_between_conditions(monkeypatch):
+    scans, searches = [], []
+    scan = default_engine.scan
+    monkeypatch.setattr(default_engine, "scan", lambda *args: scans.append(args) or scan(*args))
+    matches = default_regex_set.matches
+    monkeypatch.setattr(default_regex_set, "matches", lambda name, text: searches.append(name) or matches(name, text))
+    callback = AICallback()
+    callback.add_rule(conditions.detect_financial_advice, lambda r: r + " [f]")
+    callback.add_rule(conditions.detect_medical_advice, lambda r: r + " [m]")
+    callback.add_rule(conditions.detect_pii, lambda r: r + " [p]")
+    callback.add_rule(conditions.detect_pii, lambda r: r + " [p2]")
+    callback.add_rule(conditions.detect_citation_needed, lambda r: r + " [c]")
+    callback.process("Nothing to see here.")  # no rule fires, so one context
+    assert len(scans) == 1
+    assert sorted(searches) == sorted(set(searches))
+    assert set(conditions.PII_PATTERNS) <= set(searches)
@@ -0,0 +1,34 @@
+import os
+import socket
+
+import pytest
+
+from ai_callback import actions, conditions
+from ai_callback.callback import AICallback
+from ai_callback.server import CallbackClient, CallbackServer
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+def _callback():
+    callback = AICallback()
+    callback.add_rule(conditions.detect_abuse, actions.redact_abusive_language)
+    return callback
+
+
+def test_replaces_a_stale_socket(tmp_path):
+    path = str(tmp_path / "callback.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)  # left behind as if by a crashed server
+    stale.close()
+    with CallbackServer(_callback(), path, preload=False).start():
+        assert CallbackClient(path).process("You idiot.") == _callback().process("You idiot.")
+    assert not os.path.exists(path)
+
+
+def test_refuses_to_remove_a_file_that_is_not_a_socket(tmp_path):
+    path = tmp_path / "callback.sock"
+    path.write_text("not a socket")
+    with pytest.raises(FileExistsError):
+        CallbackServer(_callback(), str(path), preload=False)
+    assert path.read_text() == "not a socket"
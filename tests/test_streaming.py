@@ -0,0 +1,104 @@
+import io
+import random
+import re
+
+import pytest
+
+from ai_callback import actions, conditions
+from ai_callback.actions import ABUSIVE_KEYWORDS, redact_abusive_language
+from ai_callback.callback import AICallback
+from benchmarks.corpus import CATEGORIES, generate
+
+
+def _callback():
+    callback = AICallback()
+    callback.add_rule(conditions.detect_financial_advice, actions.add_financial_disclaimer)
+    callback.add_rule(conditions.detect_medical_advice, actions.add_medical_disclaimer)
+    callback.add_rule(conditions.detect_abuse, actions.redact_abusive_language)
+    callback.add_rule(conditions.detect_legal_advice, actions.add_legal_disclaimer)
+    callback.add_rule(conditions.detect_incomplete_response, actions.handle_incomplete_response)
+    return callback
+
+
+def _random_chunks(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(0, 12)))) if len(text) > 1 else []
+    bounds = [0, *cuts, len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def _texts():
+    texts = [text for category in CATEGORIES for text in generate(category, 25)]
+    texts += ["You are an idiot, stupid and dumb. Go to hell.", "stupidiot", "I HATE YOU, Idiot...",
+              "invest in crypto, see a lawyer about the diagnosis", "kill yourself" * 3, ""]
+    return texts
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_chunkings_match_process(seed):
+    rng = random.Random(seed)
+    callback = _callback()
+    for text in _texts():
+        chunks = _random_chunks(text, rng)
+        assert "".join(callback.process_stream(chunks)) == callback.process(text), chunks
+
+
+def test_chunk_boundary_inside_every_keyword():
+    callback = _callback()
+    for keyword in ABUSIVE_KEYWORDS:
+        text = f"Well, {keyword} is what I said about the {keyword.upper()} thing."
+        start = text.index(keyword)
+        for cut in range(start + 1, start + len(keyword)):
+            chunks = [text[:cut], text[cut:]]
+            assert "".join(callback.process_stream(chunks)) == callback.process(text)
+
+
+def test_one_character_chunks():
+    callback = _callback()
+    text = "Honestly that was stupidiot, you idiot; hate you. Invest wisely..."
+    assert "".join(callback.process_stream(list(text))) == callback.process(text)
+
+
+def _replace_in_order(text):
+    # Behaviour before the single-pass pattern: each keyword replaced in turn.
+    for word in ABUSIVE_KEYWORDS:
+        text = re.sub(re.escape(word), "[REDACTED]", text, flags=re.IGNORECASE)
+    return text
+
+
+def test_redaction_matches_replacing_keywords_in_order():
+    assert redact_abusive_language("stupidiot") == "stup[REDACTED]"
+    assert redact_abusive_language("stupidumb") == "[REDACTED]umb"
+    rng = random.Random(0)
+    pieces = [*ABUSIVE_KEYWORDS, "stup", "id", "iot", "hel", "l", "you", "kill", " ", "x", "DUMB", "Hell"]
+    for _ in range(2000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 8)))
+        assert redact_abusive_language(text) == _replace_in_order(text), text
+
+
+def test_rewrite_paired_with_another_condition_is_held_back():
+    # The rewrite's matches do not imply detect_legal_advice, so nothing may be
+    # redacted until the condition is known.
+    callback = AICallback()
+    callback.add_rule(conditions.detect_legal_advice, actions.redact_abusive_language)
+    assert callback.rules[0].rewrite is None
+    text = "You idiot, that is not how it works."
+    chunks = [text[:12], text[12:]]
+    stream = callback.process_stream(chunks)
+    assert list(stream) == [text]
+
+
+def test_rewrite_paired_with_its_condition_streams():
+    callback = AICallback()
+    callback.add_rule(conditions.detect_abuse, actions.redact_abusive_language)
+    assert callback.rules[0].rewrite is actions.redact_abusive_language.rewrite
+    text = "You idiot, " + "that is not how it works. " * 10
+    pieces = list(callback.process_stream([text[:60], text[60:]]))
+    assert len(pieces) > 1
+    assert "".join(pieces) == callback.process(text)
+
+
+def test_process_large_rejects_a_rewrite_of_another_condition():
+    callback = AICallback()
+    callback.add_rule(conditions.detect_legal_advice, actions.redact_abusive_language)
+    with pytest.raises(ValueError):
+        callback.process_large("You idiot.", io.StringIO())
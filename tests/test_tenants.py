@@ -0,0 +1,134 @@
+import threading
+
+import pytest
+
+from ai_callback.ruleset import compile_ruleset
+from ai_callback.tenants import TenantRegistry
+from benchmarks.corpus import CATEGORIES, generate
+from benchmarks.stubs import StubToxicity
+
+
+class CountingStub(StubToxicity):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def __call__(self, inputs, **kwargs):
+        self.calls += 1
+        return super().__call__(inputs, **kwargs)
+
+
+def _spec(threshold=0.7, own=("refund",), note="\n[Policy]"):
+    return {
+        "keywords": {"pool": ["Invest", "crypto"], "own": list(own)},
+        "patterns": {"ticket": r"\bTCK-\d{6}\b"},
+        "rules": [
+            {"condition": "detect_abuse", "action": "redact_abusive_language"},
+            {"condition": "detect_medical_advice", "action": "add_medical_disclaimer"},
+            {"condition": {"keywords": "pool"}, "action": {"append": note}},
+            {"condition": {"keywords": "own"}, "action": {"append": "\n[Own]"}},
+            {"condition": {"pattern": "ticket"}, "action": {"redact": "ticket", "with": "[TICKET]"}},
+            {"condition": {"toxicity": threshold}, "action": "redact_entire_text"},
+        ],
+    }
+
+
+@pytest.fixture
+def stub(toxicity_model):
+    return toxicity_model(CountingStub())
+
+
+def test_identical_parts_are_interned():
+    registry = TenantRegistry()
+    a = registry.add_tenant("a", _spec())
+    b = registry.add_tenant("b", _spec())
+    c = registry.add_tenant("c", {**_spec(), "keywords": {"pool": ["crypto", "INVEST"], "own": ["refund"]}})
+    assert a is b is c  # same rules, once keyword lists are normalized
+    d = registry.add_tenant("d", _spec(threshold=0.9, own=("chargeback",)))
+    assert d is not a
+    shared = [rule for rule in d.rules if rule in a.rules]
+    assert len(shared) == 4  # all but the own-list and toxicity rules
+    stats = registry.stats()
+    assert stats["tenants"] == 4
+    assert stats["callbacks"] == 2
+    assert stats["rules"] == 8
+    assert stats["keyword_lists"] == 3
+    assert stats["patterns"] == 1
+
+
+def test_duplicate_tenant_is_rejected():
+    registry = TenantRegistry()
+    registry.add_tenant("a", _spec())
+    with pytest.raises(ValueError):
+        registry.add_tenant("a", _spec())
+
+
+def test_outputs_match_each_tenants_own_callback(stub):
+    specs = {
+        "a": _spec(),
+        "b": _spec(threshold=0.5, own=("lawyer",)),
+        "c": _spec(threshold=0.9, note="\n[Other policy]"),
+    }
+    registry = TenantRegistry()
+    for tenant, spec in specs.items():
+        registry.add_tenant(tenant, spec)
+    callbacks = {tenant: compile_ruleset(spec).callback() for tenant, spec in specs.items()}
+    texts = [text for category in CATEGORIES for text in generate(category, 5)]
+    texts += ["I hate you, idiot. Ticket TCK-123456.", "Invest in crypto for a refund.", "", "see a lawyer"]
+    for text in texts:
+        outputs = registry.process(text)
+        assert outputs == {tenant: callback.process(text) for tenant, callback in callbacks.items()}, text
+        assert registry.process(text, tenants=["b"]) == {"b": outputs["b"]}
+
+
+def test_toxicity_thresholds_share_one_model_call(stub):
+    registry = TenantRegistry()
+    for i, threshold in enumerate((0.5, 0.7, 0.9)):
+        registry.add_tenant(i, {"rules": [{"condition": {"toxicity": threshold}, "action": "redact_entire_text"}]})
+    before = registry.stats()
+    registry.process("A perfectly nice answer.")
+    assert stub.calls == 1
+    stats = registry.stats()
+    assert stats["evaluations"] - before["evaluations"] == 3
+    outputs = registry.process("I hate this.")
+    assert stub.calls == 2
+    assert len(set(outputs.values())) == 1 and outputs[0] != "I hate this."
+
+
+def test_footprint_splits_shared_parts():
+    registry = TenantRegistry()
+    registry.add_tenant("a", _spec())
+    registry.add_tenant("b", _spec())
+    registry.add_tenant("c", _spec(own=("chargeback", "dispute", "fraud")))
+    a, c = registry.footprint("a"), registry.footprint("c")
+    assert a["own"] == 0 and a["shared"] > 0  # a's callback is b's too
+    assert c["own"] > 0
+    assert a["total"] == a["own"] + a["shared"]
+    total = registry.footprint()
+    assert total["engine"] > 0
+    assert total["own"] == sum(registry.footprint(t)["own"] for t in registry.tenants)
+    assert total["total"] == total["own"] + total["shared"] + total["engine"]
+    with pytest.raises(KeyError):
+        registry.footprint("missing")
+
+
+def test_process_while_tenants_are_added(stub):
+    registry = TenantRegistry()
+    registry.add_tenant(0, _spec())
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        try:
+            while not stop.is_set():
+                registry.process("Invest in crypto.")
+        except Exception as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for i in range(1, 300):
+        registry.add_tenant(i, _spec(own=(f"word{i}",)))
+    stop.set()
+    thread.join()
+    assert not errors
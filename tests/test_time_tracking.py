@@ -0,0 +1,102 @@
+import asyncio
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_callback.actions import add_financial_disclaimer
+from ai_callback.callback import AICallback
+from ai_callback.conditions import detect_financial_advice
+from ai_callback.time_tracking import (
+    always_true_condition, append_time_taken, current_timer, span, start_time_tracking, track_request,
+)
+
+TIME_TAKEN = re.compile(r"\[Time Taken: ([\d.]+) seconds\]")
+RULES = ["detect_financial_advice", "always_true_condition"]
+REQUESTS = 32
+
+
+def _callback():
+    callback = AICallback()
+    callback.add_rule(detect_financial_advice, add_financial_disclaimer)
+    callback.add_rule(always_true_condition, append_time_taken)
+    return callback
+
+
+class StepClock:
+    """Request `i`'s clock: starts at i * 10**15 ns and advances 1 ms per reading."""
+
+    def __init__(self, i):
+        self.now = i * 10**15
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.now += 1_000_000
+            return self.now
+
+
+def _check(i, timer, output):
+    # Every span comes from request i's own clock, and nothing else was recorded.
+    assert timer.clock.now // 10**15 == i
+    assert [s.name for s in timer.spans] == ["llm_call", *RULES]
+    for s in timer.spans:
+        assert i * 10**15 <= s.start <= s.end < (i + 1) * 10**15
+    # Opening and closing the span are consecutive readings of its own clock.
+    assert timer.as_dict()["spans"][0]["duration"] == 0.001
+    reported = float(TIME_TAKEN.search(output).group(1))
+    assert 0 < reported < 1  # a few ms of request i's clock, not another request's offset
+
+
+def test_timings_stay_isolated_across_threads():
+    callback = _callback()
+    barrier = threading.Barrier(REQUESTS)
+
+    def request(i):
+        timer = start_time_tracking(StepClock(i))
+        barrier.wait()  # every thread has its own timer before anyone records
+        with span("llm_call"):
+            barrier.wait()  # all llm_call spans open at once
+        output = callback.process("You should buy stocks.")
+        assert current_timer() is timer
+        _check(i, timer, output)
+        return True
+
+    with ThreadPoolExecutor(REQUESTS) as pool:
+        assert all(pool.map(request, range(REQUESTS)))
+
+
+def test_timings_stay_isolated_across_asyncio_tasks():
+    callback = _callback()
+
+    async def request(i, started):
+        timer = start_time_tracking(StepClock(i))
+        started.append(i)
+        while len(started) < REQUESTS:
+            await asyncio.sleep(0)
+        with span("llm_call"):
+            await asyncio.sleep(0)
+        output = await callback.process_async("You should buy stocks.")
+        assert current_timer() is timer
+        _check(i, timer, output)
+
+    async def main():
+        started = []
+        await asyncio.gather(*(request(i, started) for i in range(REQUESTS)))
+
+    asyncio.run(main())
+
+
+def test_track_request_restores_the_previous_timer():
+    outer = start_time_tracking()
+    with track_request() as inner:
+        assert current_timer() is inner
+    assert current_timer() is outer
+
+
+def test_no_timer_means_no_time_taken():
+    def run():
+        return _callback().process("Hello.")
+
+    # A fresh thread starts with an empty context.
+    with ThreadPoolExecutor(1) as pool:
+        assert "[Time Taken" not in pool.submit(run).result()
@@ -0,0 +1,60 @@
+import pytest
+
+from ai_callback import conditions
+from ai_callback.conditions import TOXICITY_WINDOW_TOKENS, detect_toxicity, detect_toxicity_batch
+
+
+class MultiLabelPipeline:
+    """
+    Pipeline-shaped stand-in that, like a text-classification pipeline, returns only the
+    top label unless called with top_k=None. Texts with "scum" score highest on "insult"
+    and above the threshold on "toxic". Records the kwargs and texts of each call.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def _labels(self, text):
+        if "scum" in text:
+            return [{"label": "insult", "score": 0.9}, {"label": "toxic", "score": 0.8}]
+        return [{"label": "toxic", "score": 0.02}, {"label": "insult", "score": 0.01}]
+
+    def __call__(self, inputs, **kwargs):
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        self.calls.append((kwargs, texts))
+        results = [self._labels(text) if kwargs.get("top_k", 1) is None else self._labels(text)[:1]
+                   for text in texts]
+        return results[0] if isinstance(inputs, str) else results
+
+
+@pytest.fixture
+def pipeline(toxicity_model):
+    return toxicity_model(MultiLabelPipeline())
+
+
+def test_verdict_does_not_depend_on_length(pipeline):
+    short = "You are worthless scum."
+    long = short + " filler" * 100  # past TOXICITY_WINDOW_TOKENS characters, few tokens
+    assert len(long) > TOXICITY_WINDOW_TOKENS
+    assert detect_toxicity(short)
+    assert detect_toxicity(long)
+    assert detect_toxicity_batch([short, long]) == [True, True]
+    assert {kwargs.get("top_k", 1) for kwargs, _ in pipeline.calls} == {None}
+
+
+def test_window_by_token_count_not_characters(pipeline):
+    few_tokens = "scum " + "x" * (4 * TOXICITY_WINDOW_TOKENS)
+    assert detect_toxicity(few_tokens)
+    assert pipeline.calls[-1][1] == [few_tokens]
+
+    many_tokens = "ok " * (2 * TOXICITY_WINDOW_TOKENS) + "scum"
+    assert detect_toxicity(many_tokens)
+    windows = pipeline.calls[-1][1]
+    assert len(windows) > 1
+    assert all(len(window.split()) <= TOXICITY_WINDOW_TOKENS for window in windows)
+
+
+def test_batch_matches_single_calls(pipeline):
+    texts = ["fine", "scum", "ok " * 1000 + "scum", "ok " * 1000, "y" * 2000]
+    assert detect_toxicity_batch(texts, batch_size=2) == [detect_toxicity(text) for text in texts]
+    assert conditions._toxicity_results_batch(texts) == [conditions._toxicity_results(text) for text in texts]
@@ -0,0 +1,240 @@
+import http.server
+import json
+import socket
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+pytest.importorskip("requests")
+
+from ai_callback.weather import WeatherClient  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingClient(WeatherClient):
+    """WeatherClient whose upstream answers "<location> weather" without a network."""
+
+    def _fetch(self, location):
+        with self._lock:
+            self.upstream_calls += 1
+        return f"{location} weather", True
+
+
+def _client(**kwargs):
+    clock = FakeClock()
+    return CountingClient("test-key", clock=clock, **kwargs), clock
+
+
+def test_cache_is_bounded_least_recently_used_first():
+    client, clock = _client(max_entries=3)
+    for location in ("Paris", "Berlin", "Rome"):
+        client.get(location)
+    client.get("Paris")  # Berlin is now the least recently used
+    client.get("Oslo")
+    assert list(client._cache) == ["Rome", "Paris", "Oslo"]
+    assert client.upstream_calls == 4
+    client.get("Paris")
+    assert client.upstream_calls == 4
+
+
+def test_entries_past_max_stale_are_dropped():
+    client, clock = _client(ttl=10, max_stale=20)
+    client.get("Paris")
+    client.get("Berlin")
+    clock.now += 31
+    assert client.get("Paris") == "Paris weather"  # too old to serve: fetched again
+    assert client.upstream_calls == 3
+    # Storing Paris swept out Berlin, which nobody asked for again.
+    assert list(client._cache) == ["Paris"]
+
+
+def test_stale_entry_is_kept_and_served():
+    client, clock = _client(ttl=10, max_stale=20)
+    client.get("Paris")
+    clock.now += 15
+    assert client.get("Paris") == "Paris weather"
+    assert "Paris" in client._cache
+
+
+class _Upstream:
+    """
+    Local stand-in for the OpenWeather endpoint, for WeatherClient(base_url=...).
+
+    Answers {"cod": 200, ...} with `temp` degrees for every location, after sleeping
+    `delay` seconds before sending anything. `status` sets an error answer instead.
+    Counts the requests per location in `calls`.
+    """
+
+    def __init__(self):
+        self.temp = 18.2
+        self.delay = 0.0
+        self.status = 200
+        self.calls = {}
+        self.lock = threading.Lock()
+        upstream = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                location = parse_qs(urlsplit(self.path).query)["q"][0]
+                with upstream.lock:
+                    upstream.calls[location] = upstream.calls.get(location, 0) + 1
+                time.sleep(upstream.delay)
+                if upstream.status == 200:
+                    body = {"cod": 200, "main": {"temp": upstream.temp}, "weather": [{"description": "light rain"}]}
+                else:
+                    body = {"cod": str(upstream.status), "message": "error"}
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(upstream.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except OSError:
+                    pass  # the client gave up (read timeout)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/data/2.5/weather"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def upstream():
+    server = _Upstream()
+    yield server
+    server.close()
+
+
+def _timed(fn, *args):
+    start = time.monotonic()
+    result = fn(*args)
+    return result, time.monotonic() - start
+
+
+def test_answers_from_the_upstream(upstream):
+    client = WeatherClient("test-key", base_url=upstream.url)
+    assert client.get("Paris") == "18.2°C, light rain"
+    assert client.get("Paris") == "18.2°C, light rain"
+    assert upstream.calls == {"Paris": 1}
+
+
+def test_not_found_is_cached_but_server_errors_are_not(upstream):
+    client = WeatherClient("test-key", base_url=upstream.url)
+    upstream.status = 404
+    assert client.get("Atlantis") == "Weather data not available for Atlantis"
+    client.get("Atlantis")
+    assert upstream.calls == {"Atlantis": 1}
+    upstream.status = 503
+    assert client.get("Paris") == "Weather data not available for Paris"
+    upstream.status = 200
+    assert client.get("Paris") == "18.2°C, light rain"
+    assert upstream.calls["Paris"] == 2
+
+
+def test_concurrent_misses_share_one_upstream_call(upstream):
+    upstream.delay = 0.3
+    client = WeatherClient("test-key", base_url=upstream.url)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def get():
+        barrier.wait()
+        results.append(client.get("Paris"))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["18.2°C, light rain"] * 8
+    assert upstream.calls == {"Paris": 1}
+
+
+def test_read_timeout_bounds_a_slow_upstream(upstream):
+    upstream.delay = 3.0
+    client = WeatherClient("test-key", base_url=upstream.url, read_timeout=0.2)
+    text, elapsed = _timed(client.get, "Paris")
+    assert text.startswith("Error fetching weather")
+    assert elapsed < 1.5
+    # Transport errors are not cached: the next lookup asks again.
+    upstream.delay = 0.0
+    assert client.get("Paris") == "18.2°C, light rain"
+    assert upstream.calls == {"Paris": 2}
+
+
+def test_connect_timeout_bounds_an_unresponsive_host():
+    # A listener that never accepts: once its backlog is full, connections hang.
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(0)
+    fillers = []
+    try:
+        for _ in range(16):
+            filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            filler.settimeout(0.2)
+            fillers.append(filler)
+            try:
+                filler.connect(listener.getsockname())
+            except socket.timeout:
+                break
+        else:
+            pytest.skip("cannot make a local connect hang on this platform")
+        client = WeatherClient("test-key", base_url=f"http://127.0.0.1:{listener.getsockname()[1]}/",
+                               connect_timeout=0.2, read_timeout=10.0)
+        text, elapsed = _timed(client.get, "Paris")
+        assert text.startswith("Error fetching weather")
+        assert elapsed < 2.0
+    finally:
+        for filler in fillers:
+            filler.close()
+        listener.close()
+
+
+def test_stale_entry_served_while_a_slow_refresh_runs(upstream):
+    clock = FakeClock()
+    client = WeatherClient("test-key", base_url=upstream.url, ttl=10, max_stale=100, clock=clock)
+    assert client.get("Paris") == "18.2°C, light rain"
+    upstream.delay = 0.5
+    upstream.temp = 20.0
+    clock.now += 15
+    for _ in range(5):
+        text, elapsed = _timed(client.get, "Paris")
+        assert text == "18.2°C, light rain"
+        assert elapsed < 0.25
+    # One background refresh for all the stale lookups.
+    deadline = time.monotonic() + 5
+    while client.get("Paris") != "20.0°C, light rain":
+        assert time.monotonic() < deadline, "refresh never completed"
+        time.sleep(0.05)
+    assert upstream.calls == {"Paris": 2}
+
+
+def test_failed_refresh_keeps_the_last_good_value(upstream):
+    clock = FakeClock()
+    client = WeatherClient("test-key", base_url=upstream.url, ttl=10, max_stale=100, read_timeout=0.2, clock=clock)
+    client.get("Paris")
+    upstream.delay = 1.0
+    clock.now += 15
+    assert client.get("Paris") == "18.2°C, light rain"
+    deadline = time.monotonic() + 5
+    while client._inflight:
+        assert time.monotonic() < deadline, "refresh never completed"
+        time.sleep(0.05)
+    assert client._cache["Paris"][1] == "18.2°C, light rain"